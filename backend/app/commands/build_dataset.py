@@ -0,0 +1,102 @@
+"""
+Build the memory-mappable, partitioned version of the suggestion dataset.
+
+    python -m app.commands.build_dataset [--csv PATH] [--out DIR] [--force]
+    python -m app.commands.build_dataset --append NEW_ROWS.csv [--out DIR]
+
+The service memory-maps the build when it matches the current CSV, so every
+worker on a node shares one page-cache copy and startup parses nothing. The
+text vector index used to rank suggestions by user description is built too.
+
+Rows are stored in partitions per Category and Platform. A rebuild only
+writes partitions whose content changed, and ``--append`` adds new rows as
+new partitions; either way the manifest is switched atomically and running
+servers load just the new partitions.
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from app.dataset.columnar import MANIFEST_NAME, read_manifest
+from app.dataset.partitions import open_partition, read_partitions, write_partitions
+from app.dataset.store import CSV_PATH, columns_path_for, file_version, vectors_path_for
+from app.dataset.vectors import VectorIndex
+
+
+def build_vectors(out_path: str, vectors_path: str):
+    """Build the vector index of every partition that doesn't have one yet"""
+    _, partitions = read_partitions(out_path)
+    for partition in partitions:
+        table, _ = open_partition(out_path, partition)
+        VectorIndex.load_or_build(table, vectors_path, partition.id)
+
+
+def build(csv_path: str, out_path: str, force: bool = False) -> str:
+    """Convert ``csv_path`` into a partitioned build at ``out_path`` and return its version"""
+    stat = os.stat(csv_path)
+    source_version = file_version(csv_path)
+    metadata = {
+        "source": os.path.basename(csv_path),
+        "source_mtime": stat.st_mtime,
+        "source_size": stat.st_size,
+        "source_version": source_version,
+    }
+
+    if not force and os.path.exists(os.path.join(out_path, MANIFEST_NAME)):
+        try:
+            manifest = read_manifest(out_path)
+        except ValueError:
+            manifest = {}
+        if manifest.get("source_version") == source_version:
+            print(f"✅ {out_path} is already up to date (version {manifest['version']})")
+            build_vectors(out_path, vectors_path_for(csv_path))
+            return manifest["version"]
+
+    started = time.perf_counter()
+    manifest = write_partitions(pd.read_csv(csv_path), out_path, metadata)
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ Built {out_path} - {manifest['rows']} rows in {len(manifest['partitions'])} partitions, "
+        f"version {manifest['version']} in {elapsed:.1f}s"
+    )
+
+    build_vectors(out_path, vectors_path_for(csv_path))
+    return manifest["version"]
+
+
+def append(rows_path: str, out_path: str, csv_path: str) -> str:
+    """Add the rows of ``rows_path`` to the build at ``out_path`` as new partitions"""
+    manifest = read_manifest(out_path)
+    metadata = {key: value for key, value in manifest.items() if key.startswith("source")}
+
+    started = time.perf_counter()
+    manifest = write_partitions(pd.read_csv(rows_path), out_path, metadata, append=True)
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ Appended {rows_path} to {out_path} - now {manifest['rows']} rows in "
+        f"{len(manifest['partitions'])} partitions, version {manifest['version']} in {elapsed:.1f}s"
+    )
+
+    build_vectors(out_path, vectors_path_for(csv_path))
+    return manifest["version"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the partitioned columnar suggestion dataset")
+    parser.add_argument("--csv", default=CSV_PATH, help="Source CSV (default: %(default)s)")
+    parser.add_argument("--out", default=None, help="Output directory (default: next to the CSV)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the build is up to date")
+    parser.add_argument("--append", metavar="CSV", help="Append the rows of this CSV as new partitions")
+    args = parser.parse_args()
+
+    out_path = args.out or columns_path_for(args.csv)
+    if args.append:
+        append(args.append, out_path, args.csv)
+    else:
+        build(args.csv, out_path, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
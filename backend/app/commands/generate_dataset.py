@@ -0,0 +1,268 @@
+"""
+Generate the synthetic suggestion dataset (the notebook's generator, scaled up).
+
+    python -m app.commands.generate_dataset [--rows N] [--seed S] [--out PATH]
+
+Sentences are drawn without replacement from the template space by mapping
+row numbers through a seeded permutation of its combination indices, so
+nothing is retried and no set of seen sentences is kept. Every value is a
+pure function of the seed and the row number: the output is reproducible,
+independent of the chunk size, and memory stays bounded by one chunk.
+"""
+import argparse
+import os
+import string
+import time
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+JAIPUR_AREAS = [
+    "Malviya Nagar", "Vaishali Nagar", "Mansarovar", "Jagatpura", "Pratap Nagar",
+    "C Scheme", "Civil Lines", "Raja Park", "Sanganer", "Ajmer Road", "Bapu Nagar",
+    "Sodala", "Durgapura", "Gopalpura", "Jhotwara", "Bani Park", "Shyam Nagar",
+    "Tonk Road", "Vidhyadhar Nagar", "Nirman Nagar", "Ambabari", "Sirsi Road",
+    "Mahesh Nagar", "Lal Kothi", "Transport Nagar", "Sitapura", "Chitrakoot",
+    "Hasanpura", "Patrakar Colony", "Adarsh Nagar", "Subhash Nagar", "Brahmpuri",
+    "Tilak Nagar", "Shastri Nagar", "Khatipura", "Murlipura", "Kalwar Road",
+    "Harmada", "Bhankrota", "Mahapura", "Sirsi Extension", "Kukas", "Amer Road",
+    "Kanota", "Achrol", "Bagru", "Phagi", "Chaksu", "Jobner Road", "Bindayaka",
+    "Vatika", "Beelwa", "Agra Road", "Jamwa Ramgarh", "Gandhi Path", "Queens Road",
+    "New Sanganer Road", "Gopalpura Bypass", "Triveni Nagar", "SFS Mansarovar",
+    "Heerapura", "Kartarpura", "Barkat Nagar",
+]
+
+WORDS = {
+    "a": ["premium", "modern", "stylish", "elegant", "bold", "fresh", "classic",
+          "smart", "vibrant", "minimal", "refined", "urban", "sleek", "comfortable", "trendy"],
+    "n": ["fashion", "clothing", "outfits", "apparel", "collection", "designs",
+          "styles", "wardrobe", "wear", "garments"],
+    "v": ["crafted", "designed", "created", "tailored", "built", "made", "prepared", "curated"],
+    "b": ["for everyday comfort", "for modern lifestyle", "for confident look",
+          "for effortless wear", "for premium feel", "for lasting durability",
+          "for active routine", "for smart appearance"],
+    "c": ["shop today", "explore now", "grab the offer", "discover more",
+          "upgrade your style", "refresh your wardrobe", "experience better fashion"],
+}
+
+TEMPLATES = [
+    "{a} {n} {v} {b} {c}",
+    "{v} {a} {n} {b} {c}",
+    "{c} with {a} {n} {b}",
+    "{a} {n} that feels {b} {c}",
+    "{c} and enjoy {a} {n} {b}",
+    "{v} for {a} {n} lovers {c}",
+    "{a} {n} specially {v} {b} {c}",
+    "{c} your {a} {n} {b}",
+]
+
+COLUMNS = [
+    "User_ID", "Ad_No", "Category", "User_Description",
+    "Price", "Price_Range", "Gender", "Age_Min", "Age_Max", "Age_Range",
+    "Locations", "Platform", "Format", "Total_Budget", "Daily_Budget",
+    "Keyword", "Headline", "Ad_Description", "Image_Prompt",
+]
+
+SENTENCE_COLUMNS = ["Keyword", "Headline", "Ad_Description", "Image_Prompt"]
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _mix(values: np.ndarray, key: int) -> np.ndarray:
+    """splitmix64 finalizer of ``values ^ key``: a fast, seeded integer hash"""
+    with np.errstate(over="ignore"):
+        x = values.astype(np.uint64) ^ np.uint64(key & 0xFFFFFFFFFFFFFFFF)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return (x ^ (x >> np.uint64(31))) & _MASK64
+
+
+def _key(seed: int, *parts: int) -> int:
+    """Derive an independent 64-bit key for one use of the seed"""
+    key = seed & 0xFFFFFFFFFFFFFFFF
+    for part in parts:
+        key = int(_mix(np.array([part], dtype=np.uint64), key)[0])
+    return key
+
+
+def _uniform_ints(ids: np.ndarray, key: int, low: int, high: int) -> np.ndarray:
+    """One integer in [low, high] per id, a fixed function of (key, id)"""
+    return low + (_mix(ids, key) % np.uint64(high - low + 1)).astype(np.int64)
+
+
+class IndexPermutation:
+    """
+    Seeded bijection of ``[0, size)``: a balanced Feistel network over the
+    smallest even number of bits that covers ``size``, with cycle walking to
+    stay inside the range. Mapping ``0, 1, 2, ...`` through it samples the
+    range without replacement, one chunk at a time.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size: int, key: int):
+        self.size = size
+        self.half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.mask = np.uint64((1 << self.half_bits) - 1)
+        self.keys = [int(_mix(np.array([i], dtype=np.uint64), key)[0]) for i in range(self.ROUNDS)]
+
+    def _encrypt(self, x: np.ndarray) -> np.ndarray:
+        shift = np.uint64(self.half_bits)
+        left, right = x >> shift, x & self.mask
+        for key in self.keys:
+            left, right = right, left ^ (_mix(right, key) & self.mask)
+        return (left << shift) | right
+
+    def __call__(self, positions: np.ndarray) -> np.ndarray:
+        values = self._encrypt(positions.astype(np.uint64))
+        outside = values >= np.uint64(self.size)
+        while outside.any():
+            values[outside] = self._encrypt(values[outside])
+            outside = values >= np.uint64(self.size)
+        return values.astype(np.int64)
+
+
+class SentenceSpace:
+    """
+    All distinct sentences the templates can produce, numbered ``0..size-1``.
+
+    Each template only counts the slots it uses (some leave out the verb or
+    the benefit), so every index is a different sentence.
+    """
+
+    def __init__(self, templates: List[str], words: dict):
+        self.words = {slot: np.array(values, dtype=object) for slot, values in words.items()}
+        self.templates: List[Tuple[List[Tuple[str, str]], List[str]]] = []
+        sizes = []
+        for template in templates:
+            parts = [(literal, slot) for literal, slot, _, _ in string.Formatter().parse(template)]
+            slots = [slot for _, slot in parts if slot]
+            self.templates.append((parts, slots))
+            sizes.append(int(np.prod([len(words[slot]) for slot in slots])))
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.size = int(self.offsets[-1])
+
+    def render(self, indices: np.ndarray) -> np.ndarray:
+        """Sentences for an array of indices, as an object array"""
+        result = np.empty(len(indices), dtype=object)
+        template_ids = np.searchsorted(self.offsets, indices, side="right") - 1
+        for t, (parts, slots) in enumerate(self.templates):
+            where = np.flatnonzero(template_ids == t)
+            if len(where) == 0:
+                continue
+            # Mixed-radix digits of the index within the template pick the words
+            remainder = indices[where] - self.offsets[t]
+            chosen = {}
+            for slot in reversed(slots):
+                remainder, digit = np.divmod(remainder, len(self.words[slot]))
+                chosen[slot] = self.words[slot][digit]
+            text = np.full(len(where), "", dtype=object)
+            for literal, slot in parts:
+                if literal:
+                    text = text + literal
+                if slot:
+                    text = text + chosen[slot]
+            result[where] = text
+        return result
+
+
+def generate_chunk(
+    start: int, stop: int, seed: int, ads_per_user: int, space: SentenceSpace
+) -> pd.DataFrame:
+    """Rows ``start..stop-1`` of the dataset"""
+    rows = np.arange(start, stop, dtype=np.int64)
+    user_ids = rows // ads_per_user + 1
+    users = np.unique(user_ids)
+    per_row = np.searchsorted(users, user_ids)
+
+    # Per-user attributes, like the notebook draws them once per user
+    price = _uniform_ints(users, _key(seed, 1), 300, 3000)
+    genders = np.array(["Male", "Female", "Transgender", "Other"], dtype=object)
+    gender = genders[_uniform_ints(users, _key(seed, 2), 0, 3)]
+    platform = np.array(["Meta", "Google"], dtype=object)[_uniform_ints(users, _key(seed, 3), 0, 1)]
+    ad_format = np.array(["Image", "Video"], dtype=object)[_uniform_ints(users, _key(seed, 4), 0, 1)]
+    total_budget = _uniform_ints(users, _key(seed, 5), 800, 5000)
+    daily_budget = _uniform_ints(users, _key(seed, 6), 200, 1200)
+
+    # 4-7 distinct areas per user: the lowest-scoring areas of a per-user random ordering
+    area_ids = np.arange(len(JAIPUR_AREAS), dtype=np.uint64)
+    scores = _mix(users[:, None].astype(np.uint64) * np.uint64(len(JAIPUR_AREAS)) + area_ids, _key(seed, 7))
+    order = np.argsort(scores, axis=1)
+    counts = _uniform_ints(users, _key(seed, 8), 4, 7)
+    locations = np.array(
+        [",".join(JAIPUR_AREAS[a] for a in order[i, :counts[i]]) for i in range(len(users))],
+        dtype=object,
+    )
+
+    frame = {
+        "User_ID": user_ids,
+        "Ad_No": rows % ads_per_user + 1,
+        "Category": "Clothing",
+        "User_Description": ("User provided clothing campaign text " + users.astype(str).astype(object))[per_row],
+        "Price": price[per_row],
+        "Price_Range": ((price - 200).astype(str).astype(object) + "-" + (price + 500).astype(str).astype(object))[per_row],
+        "Gender": gender[per_row],
+        "Age_Min": 1,
+        "Age_Max": 100,
+        "Age_Range": "one to hundred",
+        "Locations": locations[per_row],
+        "Platform": platform[per_row],
+        "Format": ad_format[per_row],
+        "Total_Budget": total_budget[per_row],
+        "Daily_Budget": daily_budget[per_row],
+    }
+
+    # Each column walks its own permutation of the sentence space; past the
+    # space size a new permutation starts, so sentences repeat only across blocks
+    for c, column in enumerate(SENTENCE_COLUMNS):
+        indices = np.empty(len(rows), dtype=np.int64)
+        blocks = rows // space.size
+        for block in np.unique(blocks):
+            where = blocks == block
+            permutation = IndexPermutation(space.size, _key(seed, 100 + c, int(block)))
+            indices[where] = permutation(rows[where] % space.size)
+        frame[column] = space.render(indices)
+
+    return pd.DataFrame(frame, columns=COLUMNS)
+
+
+def generate(out_path: str, rows: int, seed: int = 0, ads_per_user: int = 10, chunk_size: int = 200_000):
+    """Write ``rows`` rows to ``out_path`` as CSV, one chunk at a time"""
+    space = SentenceSpace(TEMPLATES, WORDS)
+    if rows > space.size:
+        print(f"⚠️ {rows} rows exceed the {space.size} distinct sentences, sentences repeat every {space.size} rows")
+
+    started = time.perf_counter()
+    # Write next to the target and swap in at the end, so a watching server never reads a partial file
+    tmp_path = f"{out_path}.tmp-{os.getpid()}"
+    try:
+        for start in range(0, rows, chunk_size):
+            chunk = generate_chunk(start, min(start + chunk_size, rows), seed, ads_per_user, space)
+            chunk.to_csv(tmp_path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+            print(f"   {min(start + chunk_size, rows)}/{rows} rows")
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Generated {out_path} - {rows} rows (seed {seed}) in {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic suggestion dataset")
+    parser.add_argument("--rows", type=int, default=100_000, help="Number of ads (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    parser.add_argument("--ads-per-user", type=int, default=10, help="Ads per user (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=200_000, help="Rows per chunk (default: %(default)s)")
+    parser.add_argument(
+        "--out", default="adpattern_final_production.csv", help="Output CSV (default: %(default)s)"
+    )
+    args = parser.parse_args()
+
+    generate(args.out, args.rows, seed=args.seed, ads_per_user=args.ads_per_user, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare the database's indexes with the registry in app.database.indexes.
+
+    python -m app.commands.index_report [--create]
+
+Reports registered indexes that are missing (or exist without their unique
+constraint), indexes no query has used since the server last started (from
+$indexStats), and indexes that exist but aren't registered. ``--create``
+creates the missing ones, as app startup does.
+"""
+import argparse
+from typing import Dict, List, Optional
+
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+
+from app.config.settings import settings
+from app.database.indexes import INDEXES
+
+
+def index_usage(collection) -> Optional[Dict[str, dict]]:
+    """Accesses per index name, or None where $indexStats isn't allowed"""
+    try:
+        return {stat["name"]: stat["accesses"] for stat in collection.aggregate([{"$indexStats": {}}])}
+    except OperationFailure:
+        return None
+
+
+def report(database) -> List[Dict]:
+    rows = []
+    for name in sorted({spec.collection for spec in INDEXES}):
+        collection = database[name]
+        existing = collection.index_information()
+        usage = index_usage(collection)
+        # An index with the registered keys serves the queries whatever it is called
+        by_keys = {tuple(tuple(key) for key in info["key"]): index_name for index_name, info in existing.items()}
+
+        def row(index_name: str, keys, status: str, used_by: str = "") -> Dict:
+            accesses = usage.get(index_name) if usage is not None else None
+            ops = accesses["ops"] if accesses else None
+            if status == "ok" and ops == 0:
+                status = "unused"
+            return {
+                "collection": name,
+                "index": index_name,
+                "keys": ", ".join(f"{field}:{direction}" for field, direction in keys),
+                "status": status,
+                "ops": "?" if ops is None else ops,
+                "used_by": used_by,
+            }
+
+        matched = set()
+        for spec in INDEXES:
+            if spec.collection != name:
+                continue
+            found = by_keys.get(tuple(spec.keys))
+            if found is None:
+                rows.append(row(spec.name, spec.keys, "missing", spec.used_by))
+            else:
+                matched.add(found)
+                status = "not unique" if spec.unique and not existing[found].get("unique") else "ok"
+                rows.append(row(found, spec.keys, status, spec.used_by))
+        for index_name, info in existing.items():
+            if index_name != "_id_" and index_name not in matched:
+                rows.append(row(index_name, info["key"], "unregistered"))
+    return rows
+
+
+def create_missing(database):
+    for spec in INDEXES:
+        database[spec.collection].create_index(spec.keys, **spec.options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report missing and unused MongoDB indexes")
+    parser.add_argument("--create", action="store_true", help="Create the missing registered indexes first")
+    args = parser.parse_args()
+
+    client = MongoClient(settings.mongodb_url)
+    try:
+        database = client[settings.database_name]
+        if args.create:
+            create_missing(database)
+        rows = report(database)
+    finally:
+        client.close()
+
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in rows[0]} if rows else {}
+    print("  ".join(column.ljust(width) for column, width in widths.items()))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in widths.items()))
+
+    missing = [row for row in rows if row["status"] in ("missing", "not unique")]
+    unused = [row for row in rows if row["status"] == "unused"]
+    print(f"\n{len(missing)} missing, {len(unused)} unused (ops counted since the server last started)")
+
+
+if __name__ == "__main__":
+    main()
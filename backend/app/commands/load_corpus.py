@@ -0,0 +1,101 @@
+"""
+Import the suggestion dataset into MongoDB, for SUGGESTION_SOURCE=mongo.
+
+    python -m app.commands.load_corpus [--csv PATH] [--batch-size N] [--drop]
+
+API nodes then query the corpus collection instead of keeping their own copy
+of the CSV. Rows are inserted in unordered batches with their CSV position
+as _id, so an interrupted import can simply be run again: rows already
+present are skipped. Indexes are created once the data is in.
+
+Every import gets a new id in the corpus metadata document, at its start and
+again at its end; API nodes use it as the version of their cached pages and
+cursors.
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+from app.config.settings import settings
+from app.dataset.store import CSV_PATH
+from app.services.suggestion_corpus import (
+    CORPUS_INDEXES,
+    CORPUS_META_ID,
+    LEGACY_CORPUS_INDEXES,
+    corpus_document,
+    corpus_meta_name,
+)
+
+DUPLICATE_KEY = 11000
+
+
+def mark_import(collection, loading: bool):
+    """Give the corpus a new import id, so cached pages and cursors of the old data expire"""
+    meta = collection.database[corpus_meta_name(collection.name)]
+    meta.replace_one(
+        {"_id": CORPUS_META_ID},
+        {
+            "import_id": str(ObjectId()),
+            "loading": loading,
+            "rows": collection.estimated_document_count(),
+            "updated_at": datetime.now(timezone.utc),
+        },
+        upsert=True,
+    )
+
+
+def load(csv_path: str, collection, batch_size: int = 5000, drop: bool = False):
+    """Insert every row of ``csv_path`` into ``collection`` and create its indexes"""
+    if drop:
+        collection.drop()
+    mark_import(collection, loading=True)
+
+    started = time.perf_counter()
+    inserted = skipped = 0
+    first_row = 0
+    for chunk in pd.read_csv(csv_path, chunksize=batch_size):
+        documents = [corpus_document(first_row + i, record) for i, record in enumerate(chunk.to_dict("records"))]
+        first_row += len(chunk)
+        try:
+            inserted += len(collection.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details["writeErrors"]
+            if any(error["code"] != DUPLICATE_KEY for error in errors):
+                raise
+            inserted += e.details["nInserted"]
+            skipped += len(errors)
+        print(f"   {first_row} rows read, {inserted} inserted, {skipped} already present")
+
+    for keys, options in CORPUS_INDEXES:
+        collection.create_index(keys, **options)
+    existing = collection.index_information()
+    for name in LEGACY_CORPUS_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+    mark_import(collection, loading=False)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Loaded {csv_path} into {collection.name} - {inserted} inserted, {skipped} skipped in {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the suggestion dataset into MongoDB")
+    parser.add_argument("--csv", default=CSV_PATH, help="Source CSV (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert_many call")
+    parser.add_argument("--drop", action="store_true", help="Drop the collection first instead of resuming")
+    args = parser.parse_args()
+
+    client = MongoClient(settings.mongodb_url)
+    try:
+        collection = client[settings.database_name][settings.suggestion_corpus_collection]
+        load(args.csv, collection, batch_size=args.batch_size, drop=args.drop)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
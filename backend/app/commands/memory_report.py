@@ -0,0 +1,74 @@
+"""
+Report the memory each column of the suggestion dataset takes.
+
+    python -m app.commands.memory_report [--csv PATH]
+
+"Before" is the column as a pandas DataFrame read from the CSV (one Python
+object per string), "after" is the column as the service stores it: numeric
+arrays, UTF-8 string columns, or integer codes plus a dictionary for text
+that repeats a handful of values.
+"""
+import argparse
+from typing import Dict, List
+
+import pandas as pd
+
+from app.dataset.columnar import ColumnTable, DictColumn, StringColumn
+from app.dataset.store import CSV_PATH
+
+
+def encoding(column) -> str:
+    if isinstance(column, DictColumn):
+        return f"dictionary ({len(column.dictionary)} values)"
+    if isinstance(column, StringColumn):
+        return "string"
+    return str(column.dtype)
+
+
+def report(df: pd.DataFrame) -> List[Dict]:
+    """Bytes per column before and after encoding"""
+    table = ColumnTable.from_frame(df)
+    return [
+        {
+            "column": name,
+            "encoding": encoding(table[name]),
+            "before": int(df[name].memory_usage(index=False, deep=True)),
+            "after": int(table[name].nbytes),
+        }
+        for name in df.columns
+    ]
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the memory used by each dataset column")
+    parser.add_argument("--csv", default=CSV_PATH, help="Source CSV (default: %(default)s)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    rows = report(df)
+    width = max(len(row["column"]) for row in rows)
+    print(f"{len(df)} rows from {args.csv}\n")
+    print(f"{'Column':<{width}}  {'Before':>10}  {'After':>10}  {'Saved':>6}  Encoding")
+    for row in rows + [{
+        "column": "Total",
+        "encoding": "",
+        "before": sum(row["before"] for row in rows),
+        "after": sum(row["after"] for row in rows),
+    }]:
+        saved = 1 - row["after"] / row["before"] if row["before"] else 0.0
+        print(
+            f"{row['column']:<{width}}  {format_bytes(row['before']):>10}  "
+            f"{format_bytes(row['after']):>10}  {saved:>6.0%}  {row['encoding']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,11 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    principal_cache_size: int = 10000  # Authenticated users cached by token, 0 disables
+    principal_cache_ttl: int = 60  # Seconds, at most; entries never outlive their token
+    password_hash_workers: int = 4  # Threads hashing/verifying passwords (bcrypt)
+    password_hash_queue_size: int = 64  # Logins waiting for a thread before returning 503
+    password_hash_queue_timeout: float = 2.0  # Seconds a login may wait for a thread, 0 disables
     
     # Meta/Facebook API
     meta_app_id: str = ""
@@ -34,6 +39,29 @@ class Settings(BaseSettings):
     google_ads_client_secret: str = ""
     google_ads_developer_token: str = ""
     
+    # Campaigns
+    campaign_bulk_max_size: int = 500  # Operations per /api/campaigns/bulk call
+    metrics_collection: str = "campaign_metrics"  # Time-series collection of metric events
+    metrics_flush_size: int = 1000  # Buffered events that trigger a flush
+    metrics_flush_interval: float = 1.0  # Seconds between flushes of a partly filled buffer
+    metrics_buffer_max: int = 50000  # Buffered events before uploads get 503
+    metrics_body_max_mb: int = 4  # Largest NDJSON upload to /api/metrics/events
+    
+    # Suggestion Dataset
+    suggestion_source: str = "dataset"  # "dataset" (local CSV/build) or "mongo" (see app.commands.load_corpus)
+    suggestion_corpus_collection: str = "suggestion_corpus"
+    dataset_path: str = ""  # Defaults to adpattern_final_production.csv in backend/ or root
+    dataset_reload_interval: int = 30  # Seconds between change checks, 0 disables
+    dataset_partition_budget_mb: int = 0  # Memory for loaded partitions of a columnar build, 0 = no limit
+    suggestion_cache_size: int = 1024  # Cached suggestion responses, 0 disables
+    suggestion_cache_ttl: int = 300  # Seconds
+    suggestion_match_cache_size: int = 64  # Match lists kept for paging with next_cursor
+    suggestion_batch_max_size: int = 500  # Requests per /generate-suggestions/batch call
+    suggestion_workers: int = 2  # Threads computing suggestions
+    suggestion_queue_size: int = 32  # Requests waiting for a thread before returning 503
+    suggestion_queue_timeout: float = 5.0  # Seconds a request may wait for a thread, 0 disables
+    suggestion_diversity_pool: int = 200  # Candidates per list re-ranked when a request sets diversity
+    
     @property
     def allowed_origins_list(self) -> List[str]:
         """Convert comma-separated origins to list"""
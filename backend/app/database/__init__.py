@@ -1,3 +1,8 @@
 from app.database.mongodb import db, get_db
+from app.database.indexes import INDEXES, IndexSpec, ensure_indexes
+from app.database.repository import delete_owned, find_owned, insert_document, update_owned, utcnow
 
-__all__ = ["db", "get_db"]
+__all__ = [
+    "db", "get_db", "INDEXES", "IndexSpec", "ensure_indexes",
+    "delete_owned", "find_owned", "insert_document", "update_owned", "utcnow",
+]
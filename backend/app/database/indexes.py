@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from app.config.settings import settings
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One index the application relies on, and the queries that use it"""
+    collection: str
+    keys: List[Tuple[str, int]]
+    name: str
+    unique: bool = False
+    used_by: str = ""
+    replaces: Tuple[str, ...] = ()  # Names this index had before, dropped once it can be created
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        return {"name": self.name, "unique": self.unique}
+
+
+# Indexes created at startup. Compound keys put equality filters first and
+# sort keys after them, so each route's query is a bounded index scan.
+INDEXES: List[IndexSpec] = [
+    IndexSpec(
+        "users", [("email", ASCENDING)], "email_unique", unique=True,
+        used_by="register (duplicate check), login, current user lookup",
+    ),
+    IndexSpec(
+        "campaigns",
+        [
+            ("user_id", ASCENDING), ("status", ASCENDING), ("platform", ASCENDING),
+            ("updated_at", DESCENDING), ("_id", DESCENDING),
+        ],
+        "user_status_platform_updated_id", replaces=("user_status_platform",),
+        used_by="campaign list pages filtered by status and platform, campaign summary rebuild",
+    ),
+    IndexSpec(
+        "campaigns", [("user_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], "user_updated_id",
+        used_by="campaign list pages (keyset cursor)",
+    ),
+    IndexSpec(
+        "ad_accounts", [("user_id", ASCENDING), ("platform", ASCENDING), ("account_id", ASCENDING)],
+        "user_platform_account_unique", unique=True, replaces=("user_platform_account",),
+        used_by="connect (duplicate check), ad account list",
+    ),
+    IndexSpec(
+        settings.metrics_collection, [("campaign.campaign_id", ASCENDING), ("timestamp", ASCENDING)], "campaign_time",
+        used_by="metric history of a campaign",
+    ),
+]
+
+
+async def has_duplicates(collection, spec: IndexSpec) -> bool:
+    """Whether two documents share the keys of ``spec``, which would make it fail as a unique index"""
+    pipeline = [
+        {"$group": {"_id": {field.replace(".", "_"): f"${field}" for field, _ in spec.keys}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 1},
+    ]
+    return bool(await collection.aggregate(pipeline).to_list(length=1))
+
+
+async def replace_legacy(collection, spec: IndexSpec) -> bool:
+    """
+    Drop the indexes ``spec`` replaces, so it can be created with their keys.
+    Returns False, keeping them, if a unique ``spec`` couldn't be built anyway.
+    """
+    legacy = [name for name in await collection.index_information() if name in spec.replaces]
+    if not legacy:
+        return True
+    if spec.unique and await has_duplicates(collection, spec):
+        print(
+            f"❌ Duplicate {', '.join(field for field, _ in spec.keys)} in {spec.collection}, "
+            f"keeping index {', '.join(legacy)} until they are removed"
+        )
+        return False
+    for name in legacy:
+        await collection.drop_index(name)
+        print(f"🔁 Dropped index {spec.collection}.{name}, replaced by {spec.name}")
+    return True
+
+
+async def ensure_indexes(database) -> List[str]:
+    """
+    Create every registered index that doesn't exist yet and return the
+    names of those that failed. A failed plain index is logged and the app
+    still starts; a failed unique index (e.g. duplicate emails) stops startup,
+    since routes rely on it to reject duplicates.
+    """
+    failed = []
+    for spec in INDEXES:
+        try:
+            if not await replace_legacy(database[spec.collection], spec):
+                failed.append(spec)
+                continue
+            await database[spec.collection].create_index(spec.keys, **spec.options)
+        except PyMongoError as e:
+            print(f"❌ Could not create index {spec.collection}.{spec.name}: {e}")
+            failed.append(spec)
+    print(f"✅ Indexes ready ({len(INDEXES) - len(failed)}/{len(INDEXES)})")
+
+    unique = [f"{spec.collection}.{spec.name}" for spec in failed if spec.unique]
+    if unique:
+        raise RuntimeError(f"Unique indexes could not be created: {', '.join(unique)}")
+    return [spec.name for spec in failed]
@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING, ReturnDocument
+
+Update = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+# Newest first; _id breaks ties between documents updated in the same millisecond
+KEYSET_SORT = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+
+
+def utcnow() -> datetime:
+    """Current UTC time at the millisecond precision MongoDB stores"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def with_str_id(document: Dict[str, Any]) -> Dict[str, Any]:
+    """A document with its ObjectId _id as a string, as the response schemas expect"""
+    document["_id"] = str(document["_id"])
+    return document
+
+
+def owned_filter(document_id: str, owner: str, **conditions) -> Dict[str, Any]:
+    """Filter for a document by id that belongs to ``owner`` (its user_id)"""
+    return {"_id": ObjectId(document_id), "user_id": owner, **conditions}
+
+
+async def insert_document(collection, document: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a document and return it as stored, without reading it back"""
+    result = await collection.insert_one(document)
+    document["_id"] = result.inserted_id
+    return with_str_id(document)
+
+
+async def find_owned(collection, document_id: str, owner: str) -> Optional[Dict[str, Any]]:
+    document = await collection.find_one(owned_filter(document_id, owner))
+    return with_str_id(document) if document else None
+
+
+async def update_owned(
+    collection,
+    document_id: str,
+    owner: str,
+    update: Update,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+    **conditions,
+) -> Optional[Dict[str, Any]]:
+    """
+    Update a document the user owns (and that matches ``conditions``) and
+    return it as updated (or as it was, with ReturnDocument.BEFORE), in one
+    round trip. None if no document matched.
+    """
+    document = await collection.find_one_and_update(
+        owned_filter(document_id, owner, **conditions), update, return_document=return_document
+    )
+    return with_str_id(document) if document else None
+
+
+async def delete_owned(
+    collection, document_id: str, owner: str, projection: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Delete a document the user owns and return its ``projection`` fields; None if there was none"""
+    document = await collection.find_one_and_delete(
+        owned_filter(document_id, owner), projection=projection or {"_id": 1}
+    )
+    return with_str_id(document) if document else None
+
+
+def encode_keyset_cursor(document: Dict[str, Any]) -> str:
+    """Opaque cursor for the documents after ``document`` in KEYSET_SORT order"""
+    state = {"u": document["updated_at"].isoformat(), "i": str(document["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def keyset_filter(cursor: str) -> Dict[str, Any]:
+    """
+    Filter for the documents after a cursor's position. Combined with an index
+    on (..., updated_at, _id) it seeks straight there, so every page costs the
+    same however deep it is. Raises ValueError for a malformed cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        updated_at = datetime.fromisoformat(state["u"])
+        last_id = ObjectId(state["i"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+    return {"$or": [
+        {"updated_at": {"$lt": updated_at}},
+        {"updated_at": updated_at, "_id": {"$lt": last_id}},
+    ]}
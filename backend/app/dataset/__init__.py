@@ -0,0 +1,4 @@
+from app.dataset.store import dataset_store, DatasetSnapshot, CSV_PATH
+from app.dataset.stats import model_stats
+
+__all__ = ["dataset_store", "DatasetSnapshot", "CSV_PATH", "model_stats"]
@@ -0,0 +1,274 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Bump when the on-disk layout changes
+FORMAT_VERSION = 5
+MANIFEST_NAME = "manifest.json"
+
+# Text columns whose values repeat at least this many times on average are dictionary-encoded
+DICTIONARY_MIN_REPEATS = 4
+
+
+class StringColumn:
+    """
+    Strings stored as one UTF-8 byte heap plus ``rows + 1`` offsets.
+
+    Row ``i`` is ``data[offsets[i]:offsets[i + 1]]``. Both arrays can be
+    memory-mapped, so the column costs no private memory per process.
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, valid: Optional[np.ndarray] = None):
+        self.offsets = offsets
+        self.data = data
+        self.valid = valid  # None when the column has no nulls
+        self._buffer = memoryview(data)
+
+    @classmethod
+    def from_values(cls, values: Iterable) -> "StringColumn":
+        encoded: List[bytes] = []
+        valid: List[bool] = []
+        for value in values:
+            if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA:
+                encoded.append(b"")
+                valid.append(False)
+            else:
+                encoded.append(str(value).encode("utf-8"))
+                valid.append(True)
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        valid_array = None if all(valid) else np.array(valid, dtype=bool)
+        return cls(offsets, data, valid_array)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        if self.valid is not None and not self.valid[row]:
+            return None
+        return str(self._buffer[self.offsets[row]:self.offsets[row + 1]], "utf-8")
+
+    def take(self, rows) -> List[Optional[str]]:
+        """Decode the given rows, None for nulls"""
+        rows = np.asarray(rows, dtype=np.int64)
+        buffer = self._buffer
+        values = [
+            str(buffer[start:end], "utf-8")
+            for start, end in zip(self.offsets[rows].tolist(), self.offsets[rows + 1].tolist())
+        ]
+        if self.valid is not None:
+            for i in np.flatnonzero(~self.valid[rows]).tolist():
+                values[i] = None
+        return values
+
+    def to_numpy(self) -> np.ndarray:
+        """Decode the whole column into an object array (NaN for nulls)"""
+        buffer = bytes(self._buffer)
+        offsets = self.offsets.tolist()
+        values = np.empty(len(self), dtype=object)
+        values[:] = [buffer[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(self))]
+        if self.valid is not None:
+            values[~self.valid] = np.nan
+        return values
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.data.nbytes + (self.valid.nbytes if self.valid is not None else 0)
+
+
+class DictColumn:
+    """
+    Low-cardinality strings as integer codes into a dictionary of the
+    distinct values, stored as a StringColumn; code -1 is null.
+
+    Codes take 1-4 bytes per row instead of one string each, and filters can
+    group or compare codes without decoding any string.
+    """
+
+    def __init__(self, codes: np.ndarray, dictionary: StringColumn):
+        self.codes = codes
+        self.dictionary = dictionary
+        self._categories: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, uniques: Iterable) -> "DictColumn":
+        uniques = list(uniques)
+        dtype = np.int8 if len(uniques) < 2**7 else np.int16 if len(uniques) < 2**15 else np.int32
+        return cls(codes.astype(dtype), StringColumn.from_values(uniques))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def categories(self) -> np.ndarray:
+        """Decoded dictionary plus a trailing NaN, so indexing it with code -1 gives a null"""
+        if self._categories is None:
+            categories = np.empty(len(self.dictionary) + 1, dtype=object)
+            categories[:-1] = self.dictionary.to_numpy()
+            categories[-1] = np.nan
+            self._categories = categories
+        return self._categories
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        code = int(self.codes[row])
+        return None if code < 0 else self.dictionary[code]
+
+    def take(self, rows) -> List[Optional[str]]:
+        """Decode the given rows, None for nulls"""
+        codes = self.codes[np.asarray(rows, dtype=np.int64)]
+        values = self.categories[codes].tolist()
+        for i in np.flatnonzero(codes < 0).tolist():
+            values[i] = None
+        return values
+
+    def to_numpy(self) -> np.ndarray:
+        """Decode the whole column into an object array (NaN for nulls)"""
+        return self.categories[self.codes]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.dictionary.nbytes
+
+
+def text_column(values: np.ndarray) -> Union[StringColumn, DictColumn]:
+    """Dictionary-encode a text column if its values repeat enough, else store the strings"""
+    codes, uniques = pd.factorize(values)
+    if len(uniques) * DICTIONARY_MIN_REPEATS <= len(values):
+        return DictColumn.from_codes(codes, uniques)
+    return StringColumn.from_values(values)
+
+
+Column = Union[np.ndarray, StringColumn, DictColumn]
+
+
+class ColumnTable:
+    """
+    Read-only columnar table: numeric columns as NumPy arrays and text
+    columns as StringColumn. Tables opened from disk are memory-mapped.
+    """
+
+    def __init__(self, columns: Dict[str, Column], num_rows: int):
+        self.columns = columns
+        self.num_rows = num_rows
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def values(self, name: str) -> np.ndarray:
+        """Whole column as a NumPy array (object array for text)"""
+        column = self.columns[name]
+        if isinstance(column, (StringColumn, DictColumn)):
+            return column.to_numpy()
+        return np.asarray(column)
+
+    def codes(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Integer codes of a column (-1 for nulls) and the distinct values they stand for"""
+        column = self.columns[name]
+        if isinstance(column, DictColumn):
+            return np.asarray(column.codes), column.categories[:-1]
+        codes, uniques = pd.factorize(self.values(name))
+        return codes, np.asarray(uniques, dtype=object)
+
+    def take(self, name: str, rows: Iterable[int]) -> List:
+        """Values of one column at the given rows, None for nulls"""
+        column = self.columns[name]
+        if isinstance(column, (StringColumn, DictColumn)):
+            return column.take(rows)
+        return [None if pd.isna(v) else v for v in column[np.asarray(rows, dtype=np.int64)].tolist()]
+
+    def to_frame(self, names: Optional[List[str]] = None) -> pd.DataFrame:
+        """Decode some (or all) columns into a DataFrame"""
+        names = names or list(self.columns)
+        return pd.DataFrame({name: self.values(name) for name in names})
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ColumnTable":
+        columns: Dict[str, Column] = {}
+        for name in df.columns:
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+                columns[name] = series.to_numpy()
+            else:
+                columns[name] = text_column(series.to_numpy(dtype=object))
+        return cls(columns, len(df))
+
+    @classmethod
+    def open(cls, path: str, specs: List[dict], num_rows: int) -> "ColumnTable":
+        """Memory-map columns written by ``write_columns`` (read-only)"""
+        columns: Dict[str, Column] = {}
+        for spec in specs:
+            name, base = spec["name"], os.path.join(path, spec["file"])
+            if spec["kind"] == "string":
+                columns[name] = _open_strings(base)
+            elif spec["kind"] == "dictionary":
+                columns[name] = DictColumn(np.load(f"{base}.codes.npy", mmap_mode="r"), _open_strings(f"{base}.dict"))
+            else:
+                columns[name] = np.load(f"{base}.npy", mmap_mode="r")
+        return cls(columns, num_rows)
+
+
+def _open_strings(base: str) -> StringColumn:
+    valid_path = f"{base}.valid.npy"
+    return StringColumn(
+        offsets=np.load(f"{base}.offsets.npy", mmap_mode="r"),
+        data=np.load(f"{base}.data.npy", mmap_mode="r"),
+        valid=np.load(valid_path, mmap_mode="r") if os.path.exists(valid_path) else None,
+    )
+
+
+def _save_strings(base: str, column: StringColumn):
+    np.save(f"{base}.offsets.npy", column.offsets)
+    np.save(f"{base}.data.npy", column.data)
+    if column.valid is not None:
+        np.save(f"{base}.valid.npy", column.valid)
+
+
+def read_manifest(path: str) -> dict:
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format {manifest.get('format')} in {path}")
+    return manifest
+
+
+def write_columns(table: ColumnTable, path: str) -> List[dict]:
+    """Write a table as one ``.npy`` file per array under ``path`` and return the column specs"""
+    os.makedirs(path, exist_ok=True)
+    specs = []
+    for i, (name, column) in enumerate(table.columns.items()):
+        # Column names come from CSV headers, so don't use them as file names
+        base = f"c{i:03d}"
+        if isinstance(column, StringColumn):
+            _save_strings(os.path.join(path, base), column)
+            specs.append({"name": name, "file": base, "kind": "string"})
+        elif isinstance(column, DictColumn):
+            np.save(os.path.join(path, f"{base}.codes.npy"), column.codes)
+            _save_strings(os.path.join(path, f"{base}.dict"), column.dictionary)
+            specs.append({"name": name, "file": base, "kind": "dictionary"})
+        else:
+            np.save(os.path.join(path, f"{base}.npy"), np.asarray(column))
+            specs.append({"name": name, "file": base, "kind": "numeric", "dtype": str(column.dtype)})
+    return specs
+
+
+def write_manifest(path: str, manifest: dict):
+    """Replace ``path/manifest.json`` atomically, so readers only ever see a complete one"""
+    manifest_tmp = os.path.join(path, f"{MANIFEST_NAME}.tmp-{os.getpid()}")
+    with open(manifest_tmp, "w") as f:
+        json.dump({"format": FORMAT_VERSION, **manifest}, f, indent=2)
+    os.replace(manifest_tmp, os.path.join(path, MANIFEST_NAME))
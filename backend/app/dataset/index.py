@@ -0,0 +1,198 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.dataset.columnar import ColumnTable
+
+# (Category, Platform, Gender); None in Platform/Gender matches any value
+IndexKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class AgeIntervals:
+    """Rows of one index bucket ordered by Age_Min, for range-overlap lookups"""
+    row_ids: np.ndarray  # Row ids ordered by Age_Min
+    age_min: np.ndarray  # Sorted Age_Min values
+    age_max: np.ndarray  # Age_Max values in the same order
+
+    def overlapping(self, age_min: int, age_max: int) -> np.ndarray:
+        """Row ids (in file order) whose [Age_Min, Age_Max] overlaps the given range"""
+        # Every row past this point starts above the requested range
+        end = np.searchsorted(self.age_min, age_max, side="right")
+        hits = self.row_ids[:end][self.age_max[:end] >= age_min]
+        hits.sort()
+        return hits
+
+
+def location_tokens(lists) -> pd.Series:
+    """Stripped, lowercased locations of comma-separated lists, indexed by list position"""
+    return pd.Series(lists, dtype=object).str.split(",").explode().dropna().str.strip().str.lower()
+
+
+class LocationMasks:
+    """
+    Locations column tokenized into per-row bitmasks.
+
+    Each distinct (stripped, lowercased) location gets one bit; rows hold a
+    ``(rows, words)`` uint64 matrix so the vocabulary can grow past 64 entries.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], masks: np.ndarray):
+        self.vocabulary = vocabulary
+        self.masks = masks
+
+    @classmethod
+    def build(cls, list_codes: np.ndarray, lists: np.ndarray) -> "LocationMasks":
+        """From the code of each row's location list (-1 for null) and the distinct lists"""
+        # Rows repeat the same location list a lot, so each distinct list is tokenized once
+        tokens = location_tokens(lists)
+        list_ids = tokens.index.to_numpy(dtype=np.int64)
+        codes, uniques = pd.factorize(tokens.to_numpy(dtype=object))
+
+        words = max(1, (len(uniques) + 63) // 64)
+        list_masks = np.zeros((len(lists) + 1, words), dtype=np.uint64)  # Last row stays empty for nulls
+        bits = np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64))
+        np.bitwise_or.at(list_masks, (list_ids, codes // 64), bits)
+
+        vocabulary = {location: bit for bit, location in enumerate(uniques)}
+        return cls(vocabulary, list_masks[list_codes])
+
+    @property
+    def nbytes(self) -> int:
+        return self.masks.nbytes
+
+    def query(self, locations: str) -> Optional[np.ndarray]:
+        """Mask for a comma-separated location list, or None if no location is known"""
+        query = np.zeros(self.masks.shape[1], dtype=np.uint64)
+        known = False
+        for location in locations.split(","):
+            bit = self.vocabulary.get(location.strip().lower())
+            if bit is not None:
+                query[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+                known = True
+        return query if known else None
+
+    def matching(self, row_ids: np.ndarray, query: Optional[np.ndarray]) -> np.ndarray:
+        """Subset of row_ids sharing at least one location with the query mask"""
+        if query is None or len(row_ids) == 0:
+            return EMPTY_ROWS
+        if len(query) == 1:
+            return row_ids[(self.masks[row_ids, 0] & query[0]) != 0]
+        return row_ids[(self.masks[row_ids] & query).any(axis=1)]
+
+    def matching_many(self, row_ids: np.ndarray, queries: List[Optional[np.ndarray]]) -> List[np.ndarray]:
+        """``matching`` for several query masks, reading the candidate masks once"""
+        results = [EMPTY_ROWS] * len(queries)
+        known = [i for i, query in enumerate(queries) if query is not None]
+        if not known or len(row_ids) == 0:
+            return results
+
+        row_masks = self.masks[row_ids]
+        stacked = np.stack([queries[i] for i in known])
+        # Bound the (rows, queries, words) intermediate to a few MB
+        block = max(1, (1 << 22) // (len(row_ids) * self.masks.shape[1]))
+        for start in range(0, len(known), block):
+            hits = (row_masks[:, None, :] & stacked[None, start:start + block, :]).any(axis=2)
+            for j, i in enumerate(known[start:start + block]):
+                results[i] = row_ids[hits[:, j]]
+        return results
+
+
+@dataclass(frozen=True)
+class IndexBucket:
+    row_ids: np.ndarray  # Sorted row ids, i.e. file order
+    ages: AgeIntervals
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.row_ids.nbytes + self.ages.row_ids.nbytes + self.ages.age_min.nbytes + self.ages.age_max.nbytes
+
+
+class SuggestionIndex:
+    """
+    Inverted index over Category, Platform and Gender.
+
+    Every (Category, Platform, Gender) combination, including the ones with
+    Platform and/or Gender left open, maps to a bucket of matching row ids, so
+    a lookup costs a dict access plus work proportional to the bucket size.
+    """
+
+    def __init__(self, num_rows: int, buckets: Dict[IndexKey, IndexBucket], locations: LocationMasks):
+        self.num_rows = num_rows
+        self.buckets = buckets
+        self.locations = locations
+        self.all_rows = np.arange(num_rows, dtype=np.int64)
+
+    @classmethod
+    def build(cls, table: ColumnTable) -> "SuggestionIndex":
+        # Rows are grouped by the integer codes of the filter columns; only
+        # their distinct values are decoded, and creative text stays in the table
+        codes = {name: table.codes(name) for name in ("Category", "Platform", "Gender")}
+        age_min = table.values("Age_Min")
+        age_max = table.values("Age_Max")
+
+        buckets: Dict[IndexKey, IndexBucket] = {}
+        for columns in (
+            ["Category", "Platform", "Gender"],
+            ["Category", "Platform"],
+            ["Category", "Gender"],
+            ["Category"],
+        ):
+            frame = pd.DataFrame({name: codes[name][0] for name in columns})
+            groups = frame.groupby(columns, sort=False).indices
+            for key_codes, positions in groups.items():
+                if not isinstance(key_codes, tuple):
+                    key_codes = (key_codes,)
+                # Code -1 is a null, which no filter matches
+                if min(key_codes) < 0:
+                    continue
+                named = {name: codes[name][1][code] for name, code in zip(columns, key_codes)}
+                key = (named["Category"], named.get("Platform"), named.get("Gender"))
+                buckets[key] = cls._bucket(positions.astype(np.int64), age_min, age_max)
+
+        return cls(len(table), buckets, LocationMasks.build(*table.codes("Locations")))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bucket.nbytes for bucket in self.buckets.values()) + self.locations.nbytes + self.all_rows.nbytes
+
+    @staticmethod
+    def _bucket(row_ids: np.ndarray, age_min: np.ndarray, age_max: np.ndarray) -> IndexBucket:
+        row_ids.sort()
+        order = np.argsort(age_min[row_ids], kind="stable")
+        by_age = row_ids[order]
+        return IndexBucket(
+            row_ids=row_ids,
+            ages=AgeIntervals(row_ids=by_age, age_min=age_min[by_age], age_max=age_max[by_age]),
+        )
+
+    def lookup(
+        self,
+        category: Optional[str],
+        platform: Optional[str] = None,
+        gender: Optional[str] = None,
+        age_min: Optional[int] = None,
+        age_max: Optional[int] = None,
+    ) -> np.ndarray:
+        """Sorted row ids matching the given filters; None means no filter"""
+        bucket = self.buckets.get((category, platform, gender))
+        if bucket is None:
+            return EMPTY_ROWS
+        if age_min is None or age_max is None:
+            return bucket.row_ids
+        return bucket.ages.overlapping(age_min, age_max)
+
+    def filter_locations(self, row_ids: np.ndarray, locations: str) -> np.ndarray:
+        """Rows sharing at least one of the comma-separated locations"""
+        return self.locations.matching(row_ids, self.locations.query(locations))
+
+    def category_rows(self, category: Optional[str]) -> np.ndarray:
+        """Sorted row ids for a whole category"""
+        return self.lookup(category)
@@ -0,0 +1,538 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.dataset.columnar import (
+    FORMAT_VERSION,
+    MANIFEST_NAME,
+    ColumnTable,
+    read_manifest,
+    write_columns,
+    write_manifest,
+)
+from app.dataset.index import EMPTY_ROWS, SuggestionIndex, location_tokens
+from app.dataset.vectors import (
+    NUM_FEATURES,
+    VectorIndex,
+    document_frequencies,
+    inverse_document_frequencies,
+    query_weights,
+)
+
+# Columns the dataset is partitioned by
+PARTITION_BY = ("Category", "Platform")
+
+PARTS_DIR = "parts"
+PARTITION_FILE = "partition.json"
+ROW_IDS_FILE = "rows.npy"
+# Feature ids of a partition's text and the number of its rows containing each
+TERMS_FILE = "terms.npy"
+# Dataset-wide document frequencies of a manifest version, for scoring every partition alike
+DOCUMENT_FREQUENCIES_FILE = "df-{version}.npy"
+
+
+@dataclass(frozen=True)
+class Partition:
+    """
+    One immutable slice of the dataset, stored under ``parts/<id>/``.
+
+    The id includes a hash of the content, so a partition directory never
+    changes once written and an unchanged partition keeps its id across builds.
+    ``rows.npy`` holds the dataset-wide row ids of its rows, which keeps
+    results in the original row order however the rows are partitioned.
+    ``locations`` lists the distinct (stripped, lowercased) locations of its rows.
+    """
+    id: str
+    key: Tuple[Optional[str], ...]
+    rows: int
+    columns: List[dict]
+    locations: Tuple[str, ...] = ()
+
+    def to_entry(self) -> dict:
+        return {
+            "id": self.id,
+            "key": list(self.key),
+            "rows": self.rows,
+            "columns": self.columns,
+            "locations": list(self.locations),
+        }
+
+    @classmethod
+    def from_entry(cls, entry: dict) -> "Partition":
+        return cls(
+            id=entry["id"],
+            key=tuple(entry["key"]),
+            rows=entry["rows"],
+            columns=entry["columns"],
+            locations=tuple(entry["locations"]),
+        )
+
+
+def read_partitions(path: str) -> Tuple[dict, List[Partition]]:
+    """Manifest of a partitioned dataset and its active partitions, in row order"""
+    manifest = read_manifest(path)
+    return manifest, [Partition.from_entry(entry) for entry in manifest["partitions"]]
+
+
+def read_document_frequencies(path: str, manifest: dict) -> np.ndarray:
+    """Dataset-wide document frequency of every feature (memory-mapped)"""
+    return np.load(os.path.join(path, manifest["document_frequencies"]), mmap_mode="r")
+
+
+def write_document_frequencies(path: str, version: str, partitions: List[Partition]) -> str:
+    """Sum the document frequencies of ``partitions`` into the file of a manifest version and return its name"""
+    name = DOCUMENT_FREQUENCIES_FILE.format(version=version)
+    if not os.path.exists(os.path.join(path, name)):
+        df = np.zeros(NUM_FEATURES, dtype=np.int64)
+        for partition in partitions:
+            features, counts = np.load(os.path.join(path, PARTS_DIR, partition.id, TERMS_FILE))
+            df[features] += counts
+        tmp_name = f"{name}.tmp-{os.getpid()}.npy"
+        np.save(os.path.join(path, tmp_name), df.astype(np.int32))
+        os.replace(os.path.join(path, tmp_name), os.path.join(path, name))
+    return name
+
+
+def open_partition(path: str, partition: Partition) -> Tuple[ColumnTable, np.ndarray]:
+    """Memory-map a partition: its table and the dataset-wide ids of its rows"""
+    part_path = os.path.join(path, PARTS_DIR, partition.id)
+    return ColumnTable.open(part_path, partition.columns, partition.rows), read_row_ids(path, partition)
+
+
+def read_row_ids(path: str, partition: Partition) -> np.ndarray:
+    """Sorted dataset-wide ids of a partition's rows (memory-mapped)"""
+    return np.load(os.path.join(path, PARTS_DIR, partition.id, ROW_IDS_FILE), mmap_mode="r")
+
+
+def split_frame(df: pd.DataFrame, first_row: int = 0) -> Iterator[Tuple[tuple, pd.DataFrame, np.ndarray]]:
+    """(key, rows, row ids) per partition, in order of first appearance"""
+    groups = df.groupby(list(PARTITION_BY), sort=False, dropna=False).indices
+    for values, positions in groups.items():
+        if not isinstance(values, tuple):
+            values = (values,)
+        key = tuple(None if pd.isna(value) else str(value) for value in values)
+        yield key, df.iloc[positions].reset_index(drop=True), positions.astype(np.int64) + first_row
+
+
+def frame_locations(frame: pd.DataFrame) -> Tuple[str, ...]:
+    """Sorted distinct locations of a frame's rows"""
+    if "Locations" not in frame:
+        return ()
+    return tuple(sorted(set(location_tokens(frame["Locations"].dropna().unique()).tolist())))
+
+
+def partition_id(key: tuple, frame: pd.DataFrame, row_ids: np.ndarray) -> str:
+    digest = hashlib.sha256()
+    # The format is part of the id, so a new layout never reuses an old partition directory
+    digest.update(json.dumps([FORMAT_VERSION, list(key), list(frame.columns)]).encode())
+    digest.update(row_ids.tobytes())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    # Partition values come from the data, so only keep safe characters in the name
+    slug = "-".join("null" if value is None else re.sub(r"[^A-Za-z0-9]+", "_", value)[:32] for value in key)
+    return f"{slug}-{digest.hexdigest()[:16]}"
+
+
+def write_partitions(df: pd.DataFrame, path: str, metadata: Optional[dict] = None, append: bool = False) -> dict:
+    """
+    Write ``df`` as partitions under ``path`` and switch the manifest to them.
+
+    Without ``append`` the manifest names exactly the partitions of ``df``;
+    partitions whose content didn't change keep their directory. With
+    ``append`` the rows of ``df`` are added after the current ones as new
+    partitions, leaving the existing ones untouched. The manifest is
+    replaced atomically; partitions only referenced by older manifests
+    (except the previous one) are removed.
+    """
+    parts_path = os.path.join(path, PARTS_DIR)
+    os.makedirs(parts_path, exist_ok=True)
+
+    previous: List[Partition] = []
+    previous_manifest: dict = {}
+    if os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        try:
+            previous_manifest, previous = read_partitions(path)
+        except (ValueError, KeyError, json.JSONDecodeError):
+            previous_manifest, previous = {}, []
+
+    partitions: List[Partition] = []
+    first_row = 0
+    if append:
+        if not previous:
+            raise ValueError(f"Nothing to append to, build {path} first")
+        names = [spec["name"] for spec in previous[0].columns]
+        if list(df.columns) != names:
+            raise ValueError(f"Appended rows must have the columns {names}")
+        partitions = list(previous)
+        first_row = previous_manifest["rows"]
+
+    for key, frame, row_ids in split_frame(df, first_row):
+        pid = partition_id(key, frame, row_ids)
+        part_path = os.path.join(parts_path, pid)
+        if not os.path.exists(os.path.join(part_path, PARTITION_FILE)):
+            tmp_path = f"{part_path}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            table = ColumnTable.from_frame(frame)
+            specs = write_columns(table, tmp_path)
+            np.save(os.path.join(tmp_path, ROW_IDS_FILE), row_ids)
+            np.save(os.path.join(tmp_path, TERMS_FILE), np.stack(document_frequencies(table)))
+            with open(os.path.join(tmp_path, PARTITION_FILE), "w") as f:
+                json.dump(Partition(pid, key, len(frame), specs, frame_locations(frame)).to_entry(), f)
+            shutil.rmtree(part_path, ignore_errors=True)
+            os.rename(tmp_path, part_path)
+        with open(os.path.join(part_path, PARTITION_FILE)) as f:
+            partitions.append(Partition.from_entry(json.load(f)))
+
+    ids = [partition.id for partition in partitions]
+    version = hashlib.sha256(",".join(ids).encode()).hexdigest()[:16]
+    manifest = {
+        "version": version,
+        "partition_by": list(PARTITION_BY),
+        "rows": first_row + len(df),
+        "partitions": [partition.to_entry() for partition in partitions],
+        # Every location of the dataset, so a query for none of them loads no partition
+        "locations": sorted({location for partition in partitions for location in partition.locations}),
+        "document_frequencies": write_document_frequencies(path, version, partitions),
+        **(metadata or {}),
+    }
+    write_manifest(path, manifest)
+
+    keep = set(ids) | {partition.id for partition in previous}
+    for entry in os.listdir(parts_path):
+        if entry not in keep and ".tmp-" not in entry:
+            shutil.rmtree(os.path.join(parts_path, entry), ignore_errors=True)
+    # Data directories of the older, unpartitioned layout
+    for entry in os.listdir(path):
+        if entry != PARTS_DIR and os.path.isdir(os.path.join(path, entry)):
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+    keep_files = {manifest["document_frequencies"], previous_manifest.get("document_frequencies")}
+    for entry in os.listdir(path):
+        if entry.startswith("df-") and entry not in keep_files and ".tmp-" not in entry:
+            os.remove(os.path.join(path, entry))
+    return manifest
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A loaded partition: its table, index and vectors"""
+    table: ColumnTable
+    index: SuggestionIndex
+    vectors: VectorIndex
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes + self.index.nbytes + self.vectors.nbytes
+
+
+class PartitionCache:
+    """
+    Loaded partitions in LRU order, within a byte budget.
+
+    Partitions are loaded by ``loader`` on first use. Once the loaded ones add
+    up to more than ``budget`` bytes, the least recently used are dropped until
+    they fit again; the partition just loaded always stays, even if it alone
+    is over budget. A budget of 0 keeps every partition loaded. Only the
+    current manifest ``generation`` adds partitions, so requests still running
+    on an older snapshot can't fill the cache with partitions it dropped.
+    """
+
+    def __init__(self, loader: Callable[[Partition], Segment], budget: int = 0):
+        self.budget = budget
+        self.generation: Optional[str] = None
+        self._loader = loader
+        self._segments: "OrderedDict[str, Tuple[Segment, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self._load_time_total = 0.0
+
+    def get(self, partition: Partition, generation: Optional[str] = None) -> Segment:
+        """The loaded partition, loading it (and evicting others) if needed"""
+        with self._lock:
+            entry = self._segments.get(partition.id)
+            if entry is not None:
+                self._segments.move_to_end(partition.id)
+                self.hits += 1
+                return entry[0]
+
+        # Loading takes a while, don't hold up lookups of loaded partitions meanwhile
+        started = time.perf_counter()
+        segment = self._loader(partition)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            entry = self._segments.get(partition.id)
+            if entry is not None:
+                # Another thread loaded it at the same time
+                self._segments.move_to_end(partition.id)
+                return entry[0]
+            self.loads += 1
+            self._load_time_total += elapsed
+            if generation != self.generation:
+                # Used by an old snapshot only, serve it without caching
+                return segment
+            size = segment.nbytes
+            self._segments[partition.id] = (segment, size)
+            self.bytes += size
+            while self.budget and self.bytes > self.budget and len(self._segments) > 1:
+                _, (_, evicted_size) = self._segments.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return segment
+
+    def retain(self, ids: Iterable[str], generation: Optional[str] = None):
+        """Switch to a manifest ``generation``, unloading partitions other than its ``ids``"""
+        ids = set(ids)
+        with self._lock:
+            self.generation = generation
+            for pid in [pid for pid in self._segments if pid not in ids]:
+                _, size = self._segments.pop(pid)
+                self.bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.loads
+            return {
+                "loaded_partitions": len(self._segments),
+                "loaded_bytes": self.bytes,
+                "budget_bytes": self.budget,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_load_time_ms": round(self._load_time_total / self.loads * 1000, 3) if self.loads else 0.0,
+            }
+
+
+class PartitionedTable:
+    """
+    ColumnTable interface over the partitions of a manifest.
+
+    Partitions are taken from ``cache`` as their rows are read, so only the
+    ones in use need to be loaded. Inside ``pinned()`` each partition is taken
+    once and held until the block ends, so a request never reloads a
+    partition the cache evicted while it was running. Row ids are
+    dataset-wide; ``part_of`` maps each one to its partition and the
+    partition's sorted ``row_ids`` give its row within it.
+    """
+
+    def __init__(
+        self,
+        partitions: List[Partition],
+        row_ids: List[np.ndarray],
+        cache: PartitionCache,
+        num_rows: int,
+        generation: Optional[str] = None,
+    ):
+        self.partitions = partitions
+        self.row_ids = row_ids
+        self.cache = cache
+        self.num_rows = num_rows
+        self.generation = generation
+        self._pins = threading.local()
+        self.columns = [spec["name"] for spec in partitions[0].columns] if partitions else []
+        self.part_of = np.empty(num_rows, dtype=np.int16 if len(partitions) < 2**15 else np.int32)
+        for p, ids in enumerate(row_ids):
+            self.part_of[ids] = p
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def segment(self, p: int) -> Segment:
+        pins = getattr(self._pins, "segments", None)
+        if pins is None:
+            return self.cache.get(self.partitions[p], self.generation)
+        segment = pins.get(p)
+        if segment is None:
+            segment = pins[p] = self.cache.get(self.partitions[p], self.generation)
+        return segment
+
+    @contextmanager
+    def pinned(self):
+        """Resolve each partition used in this thread once, and keep it until the block ends"""
+        if getattr(self._pins, "segments", None) is not None:
+            # Already inside an outer block
+            yield
+            return
+        self._pins.segments = {}
+        try:
+            yield
+        finally:
+            self._pins.segments = None
+
+    def locate(self, rows) -> Iterator[Tuple[np.ndarray, int, np.ndarray]]:
+        """(positions in ``rows``, partition, local row ids) for each partition the rows touch"""
+        rows = np.asarray(rows, dtype=np.int64)
+        parts = self.part_of[rows]
+        order = np.argsort(parts, kind="stable")
+        bounds = np.searchsorted(parts[order], np.arange(len(self.partitions) + 1))
+        for p in range(len(self.partitions)):
+            positions = order[bounds[p]:bounds[p + 1]]
+            if len(positions):
+                yield positions, p, np.searchsorted(self.row_ids[p], rows[positions])
+
+    def _dtype(self, name: str) -> np.dtype:
+        specs = [spec for partition in self.partitions for spec in partition.columns if spec["name"] == name]
+        if any(spec["kind"] != "numeric" for spec in specs):
+            return np.dtype(object)
+        return np.result_type(*[np.dtype(spec["dtype"]) for spec in specs])
+
+    def values(self, name: str) -> np.ndarray:
+        # One partition at a time, so a full scan stays within the cache budget
+        values = np.empty(self.num_rows, dtype=self._dtype(name))
+        for p, ids in enumerate(self.row_ids):
+            values[ids] = self.segment(p).table.values(name)
+        return values
+
+    def take(self, name: str, rows) -> List:
+        values: List = [None] * len(rows)
+        for positions, p, local in self.locate(rows):
+            for i, value in zip(positions.tolist(), self.segment(p).table.take(name, local)):
+                values[i] = value
+        return values
+
+    def to_frame(self, names: Optional[List[str]] = None) -> pd.DataFrame:
+        # Partition by partition, so each is loaded once for all the columns
+        names = names or self.columns
+        columns = {name: np.empty(self.num_rows, dtype=self._dtype(name)) for name in names}
+        for p, ids in enumerate(self.row_ids):
+            table = self.segment(p).table
+            for name in names:
+                columns[name][ids] = table.values(name)
+        return pd.DataFrame(columns)
+
+
+class PartitionedLocationMasks:
+    """
+    LocationMasks interface over the partitions. A query is resolved against
+    the dataset's ``vocabulary`` to the set of locations it names, and only
+    partitions having one of them are loaded to match it.
+    """
+
+    def __init__(self, table: PartitionedTable, vocabulary: Iterable[str]):
+        self.table = table
+        self.vocabulary = frozenset(vocabulary)
+        self._locations = [frozenset(partition.locations) for partition in table.partitions]
+
+    def query(self, locations: str) -> Optional[FrozenSet[str]]:
+        """Known locations of a comma-separated list, or None if no location is known"""
+        known = frozenset(location.strip().lower() for location in locations.split(",")) & self.vocabulary
+        return known or None
+
+    def matching(self, row_ids: np.ndarray, query: Optional[FrozenSet[str]]) -> np.ndarray:
+        return self.matching_many(row_ids, [query])[0]
+
+    def matching_many(self, row_ids: np.ndarray, queries: List[Optional[FrozenSet[str]]]) -> List[np.ndarray]:
+        keep = [np.zeros(len(row_ids), dtype=bool) for _ in queries]
+        if all(query is None for query in queries):
+            return [EMPTY_ROWS] * len(queries)
+        for positions, p, local in self.table.locate(row_ids):
+            shared = [query & self._locations[p] if query is not None else None for query in queries]
+            if not any(shared):
+                continue
+            masks = self.table.segment(p).index.locations
+            part_queries = [masks.query(",".join(sorted(known))) if known else None for known in shared]
+            for i, hits in enumerate(masks.matching_many(local, part_queries)):
+                if len(hits):
+                    keep[i][positions[np.isin(local, hits, assume_unique=True)]] = True
+        return [row_ids[mask] if mask.any() else EMPTY_ROWS for mask in keep]
+
+
+class PartitionedIndex:
+    """
+    SuggestionIndex interface over the partitions of a PartitionedTable.
+
+    A lookup only loads the partitions of the requested category (and
+    platform, if given) and maps their matches to dataset-wide row ids.
+    """
+
+    def __init__(self, table: PartitionedTable, locations: Iterable[str]):
+        self.table = table
+        self.num_rows = table.num_rows
+        self.all_rows = np.arange(table.num_rows, dtype=np.int64)
+        self.locations = PartitionedLocationMasks(table, locations)
+        category_at, platform_at = PARTITION_BY.index("Category"), PARTITION_BY.index("Platform")
+        self._parts: Dict[Tuple[str, Optional[str]], List[int]] = defaultdict(list)
+        for p, partition in enumerate(table.partitions):
+            category, platform = partition.key[category_at], partition.key[platform_at]
+            # Rows without a category are in no bucket
+            if category is None:
+                continue
+            self._parts[(category, None)].append(p)
+            if platform is not None:
+                self._parts[(category, platform)].append(p)
+
+    def lookup(
+        self,
+        category: Optional[str],
+        platform: Optional[str] = None,
+        gender: Optional[str] = None,
+        age_min: Optional[int] = None,
+        age_max: Optional[int] = None,
+    ) -> np.ndarray:
+        """Sorted row ids matching the given filters; None means no filter"""
+        found = []
+        for p in self._parts.get((category, platform), ()):
+            local = self.table.segment(p).index.lookup(category, platform, gender, age_min, age_max)
+            if len(local):
+                found.append(self.table.row_ids[p][local])
+        if not found:
+            return EMPTY_ROWS
+        if len(found) == 1:
+            return found[0]
+        rows = np.concatenate(found)
+        rows.sort()
+        return rows
+
+    def filter_locations(self, row_ids: np.ndarray, locations: str) -> np.ndarray:
+        """Rows sharing at least one of the comma-separated locations"""
+        return self.locations.matching(row_ids, self.locations.query(locations))
+
+    def category_rows(self, category: Optional[str]) -> np.ndarray:
+        """Sorted row ids for a whole category"""
+        return self.lookup(category)
+
+
+class PartitionedVectorIndex:
+    """
+    VectorIndex interface over the partitions of a PartitionedTable. Every
+    partition is scored with the dataset-wide document frequencies ``df``,
+    so rankings match those of the whole dataset indexed at once. The row
+    norms under those weights are kept with each loaded partition, so they
+    count towards the cache budget and are unloaded with it.
+    """
+
+    def __init__(self, table: PartitionedTable, df: np.ndarray):
+        self.table = table
+        self.idf = inverse_document_frequencies(df, table.num_rows)
+        self.known = np.asarray(df) > 0
+
+    def rank(self, row_ids: np.ndarray, text: str) -> np.ndarray:
+        weights = query_weights(text, self.idf, self.known)
+        if not weights or len(row_ids) == 0:
+            return row_ids
+        scores = np.zeros(len(row_ids), dtype=np.float32)
+        for positions, p, local in self.table.locate(row_ids):
+            vectors = self.table.segment(p).vectors
+            norms = vectors.norms_for(self.table.generation, self.idf)
+            scores[positions] = vectors.scores(local, weights, self.idf, norms)
+        return row_ids[np.argsort(-scores, kind="stable")]
@@ -0,0 +1,42 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app.dataset.store import DatasetSnapshot
+
+_cache: Optional[Tuple[str, Dict[str, Any]]] = None
+_cache_lock = threading.Lock()
+
+
+def compute_model_stats(snapshot: DatasetSnapshot) -> Dict[str, Any]:
+    """Summary statistics about the model data"""
+    df = snapshot.table.to_frame([
+        'User_ID', 'Category', 'Gender', 'Platform', 'Age_Min', 'Age_Max', 'Headline', 'Ad_Description'
+    ])
+
+    return {
+        "total_rows": len(df),
+        "total_users": int(df['User_ID'].nunique()),
+        "categories": df['Category'].unique().tolist(),
+        "genders": df['Gender'].unique().tolist(),
+        "platforms": df['Platform'].unique().tolist(),
+        "age_range": f"{df['Age_Min'].min()} - {df['Age_Max'].max()}",
+        "unique_headlines": int(df['Headline'].nunique()),
+        "unique_descriptions": int(df['Ad_Description'].nunique()),
+    }
+
+
+def model_stats(snapshot: DatasetSnapshot) -> Dict[str, Any]:
+    """Model statistics for a snapshot, computed once per dataset version"""
+    global _cache
+    cached = _cache
+    if cached and cached[0] == snapshot.version:
+        return cached[1]
+
+    with _cache_lock:
+        # Another request may have computed it while we waited
+        cached = _cache
+        if cached and cached[0] == snapshot.version:
+            return cached[1]
+        stats = compute_model_stats(snapshot)
+        _cache = (snapshot.version, stats)
+        return stats
@@ -0,0 +1,293 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.config.settings import settings
+
+from app.dataset.columnar import ColumnTable, MANIFEST_NAME, read_manifest
+from app.dataset.index import SuggestionIndex
+from app.dataset.partitions import (
+    Partition,
+    PartitionCache,
+    PartitionedIndex,
+    PartitionedTable,
+    PartitionedVectorIndex,
+    Segment,
+    open_partition,
+    read_document_frequencies,
+    read_partitions,
+    read_row_ids,
+)
+from app.dataset.vectors import VectorIndex, prune as prune_vectors
+
+# Load model data (CSV from notebook)
+# In Railway: backend/adpattern_final_production.csv
+# In local dev: can be in backend/ or root
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))  # Points to backend/
+CSV_PATH = settings.dataset_path or os.path.join(BACKEND_DIR, "adpattern_final_production.csv")
+
+# Fallback to root directory if not found in backend (for local dev)
+if not settings.dataset_path and not os.path.exists(CSV_PATH):
+    ROOT_DIR = os.path.dirname(BACKEND_DIR)
+    CSV_PATH = os.path.join(ROOT_DIR, "adpattern_final_production.csv")
+
+
+def columns_path_for(csv_path: str) -> str:
+    """Location of the memory-mappable build of a CSV (see app.commands.build_dataset)"""
+    return os.path.splitext(csv_path)[0] + ".columns"
+
+
+def vectors_path_for(csv_path: str) -> str:
+    """Location of the saved text vector indexes of a CSV, one directory per dataset version"""
+    return os.path.splitext(csv_path)[0] + ".vectors"
+
+
+def content_version(data: bytes) -> str:
+    """Short content hash used as the dataset version"""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def file_version(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """One immutable, fully loaded version of the suggestion dataset"""
+    table: ColumnTable
+    index: SuggestionIndex
+    vectors: VectorIndex
+    version: str
+    path: str
+    mtime: float
+    size: int
+    loaded_at: datetime
+    generation: int = 0  # Increases with every new version loaded, so snapshots can be ordered
+
+    def pinned(self):
+        """
+        Context for one request: partitions of a build are resolved once and
+        stay loaded until it ends (nothing to do for a parsed CSV)
+        """
+        pinned = getattr(self.table, "pinned", None)
+        return pinned() if pinned else nullcontext()
+
+
+class DatasetStore:
+    """
+    Keeps the suggestion dataset resident in memory.
+
+    The dataset is memory-mapped from its partitioned columnar build when
+    one exists for the current CSV, and parsed from the CSV otherwise. Either
+    way it is swapped in as a new snapshot whenever its content changes.
+    Readers grab ``snapshot`` once per request and keep using that object, so
+    a reload never changes data under a running request.
+
+    Partitions of a build are opened and indexed on first use and kept in
+    ``partition_cache``, which unloads the least recently used ones beyond
+    ``dataset_partition_budget_mb``. A node can then serve a catalog larger
+    than its memory, as long as the categories in demand fit.
+    """
+
+    def __init__(self, path: str, columns_path: Optional[str] = None, vectors_path: Optional[str] = None):
+        self.path = path
+        self.columns_path = columns_path or columns_path_for(path)
+        self.vectors_path = vectors_path or vectors_path_for(path)
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self._reload_lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._csv_version: Optional[Tuple[float, int, str]] = None  # (mtime, size, hash) of the CSV
+        self._partition_ids: Set[str] = set()  # Partitions of the current manifest
+        self._weighting: Optional[Tuple[str, Any]] = None  # (manifest version, IDF) partitions are scored with
+        self._generation = 0
+        self.partition_cache = PartitionCache(self._load_segment, budget=settings.dataset_partition_budget_mb << 20)
+
+    @property
+    def snapshot(self) -> Optional[DatasetSnapshot]:
+        """Current snapshot, or None if the dataset file is missing"""
+        return self._snapshot
+
+    @property
+    def version(self) -> Optional[str]:
+        """Content hash of the current snapshot, usable as a cache key"""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+    def get(self) -> Optional[DatasetSnapshot]:
+        """
+        Get the current snapshot, or None until ``start`` (or the watcher) has
+        loaded one. Never loads inline: callers run on the event loop.
+        """
+        return self._snapshot
+
+    def _csv_hash(self, stat: os.stat_result) -> str:
+        cached = self._csv_version
+        if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+        version = file_version(self.path)
+        self._csv_version = (stat.st_mtime, stat.st_size, version)
+        return version
+
+    def _source(self) -> Optional[str]:
+        """File to load from: the columnar manifest if it was built from the current CSV, else the CSV"""
+        manifest_path = os.path.join(self.columns_path, MANIFEST_NAME)
+        try:
+            csv_stat = os.stat(self.path)
+        except FileNotFoundError:
+            csv_stat = None
+
+        if os.path.exists(manifest_path):
+            try:
+                manifest = read_manifest(self.columns_path)
+            except ValueError as e:
+                # Built by an older version of the build command
+                print(f"⚠️ Ignoring {self.columns_path}: {e}")
+                manifest = None
+            if manifest is not None:
+                if csv_stat is None:
+                    return manifest_path
+                if (manifest.get("source_mtime"), manifest.get("source_size")) == (csv_stat.st_mtime, csv_stat.st_size):
+                    return manifest_path
+                if manifest.get("source_version") == self._csv_hash(csv_stat):
+                    return manifest_path
+
+        return self.path if csv_stat else None
+
+    def _load_segment(self, partition: Partition) -> Segment:
+        table, _ = open_partition(self.columns_path, partition)
+        vectors = VectorIndex.load_or_build(table, self.vectors_path, partition.id)
+        weighting = self._weighting
+        if weighting is not None:
+            # Computed up front so the partition's size in the cache includes them
+            vectors.norms_for(*weighting)
+        return Segment(table=table, index=SuggestionIndex.build(table), vectors=vectors)
+
+    def _load_partitions(self) -> Tuple[str, PartitionedTable, PartitionedIndex, PartitionedVectorIndex]:
+        """Switch to the manifest's partitions; they are loaded when first used"""
+        manifest, partitions = read_partitions(self.columns_path)
+        ids = {partition.id for partition in partitions}
+        row_ids = [read_row_ids(self.columns_path, partition) for partition in partitions]
+        table = PartitionedTable(partitions, row_ids, self.partition_cache, manifest["rows"], manifest["version"])
+        index = PartitionedIndex(table, manifest["locations"])
+        vectors = PartitionedVectorIndex(table, read_document_frequencies(self.columns_path, manifest))
+        self._weighting = (manifest["version"], vectors.idf)
+
+        # Loaded partitions still in the manifest stay loaded
+        self.partition_cache.retain(ids, manifest["version"])
+        prune_vectors(self.vectors_path, keep=ids | self._partition_ids)
+        self._partition_ids = ids
+        print(f"🧩 {len(partitions)} partitions, {len(self.partition_cache)} already loaded")
+        return manifest["version"], table, index, vectors
+
+    def partition_stats(self) -> Dict[str, Any]:
+        """Load/eviction counters and memory use of the partition cache"""
+        return {"partitions": len(self._partition_ids), **self.partition_cache.stats()}
+
+    def refresh(self) -> Optional[DatasetSnapshot]:
+        """Reload the dataset if the source changed and return the current snapshot"""
+        with self._reload_lock:
+            current = self._snapshot
+            source = self._source()
+            if source is None:
+                # Keep serving the last good snapshot if the file disappears
+                return current
+            stat = os.stat(source)
+
+            if current and current.path == source and current.mtime == stat.st_mtime and current.size == stat.st_size:
+                return current
+
+            from_csv = source == self.path
+            if from_csv:
+                with open(source, "rb") as f:
+                    data = f.read()
+                version = content_version(data)
+            else:
+                version = read_manifest(self.columns_path)["version"]
+
+            if current and current.version == version and current.path == source:
+                # Touched but unchanged, no need to load again
+                snapshot = DatasetSnapshot(
+                    table=current.table,
+                    index=current.index,
+                    vectors=current.vectors,
+                    version=version,
+                    path=source,
+                    mtime=stat.st_mtime,
+                    size=stat.st_size,
+                    loaded_at=current.loaded_at,
+                    generation=current.generation,
+                )
+            else:
+                if from_csv:
+                    table = ColumnTable.from_frame(pd.read_csv(io.BytesIO(data)))
+                    index = SuggestionIndex.build(table)
+                    vectors = VectorIndex.load_or_build(table, self.vectors_path, version)
+                    keep = {version} | ({current.version} if current else set())
+                    prune_vectors(self.vectors_path, keep=keep | self._partition_ids)
+                else:
+                    version, table, index, vectors = self._load_partitions()
+                snapshot = DatasetSnapshot(
+                    table=table,
+                    index=index,
+                    vectors=vectors,
+                    version=version,
+                    path=source,
+                    mtime=stat.st_mtime,
+                    size=stat.st_size,
+                    loaded_at=datetime.utcnow(),
+                    generation=self._generation + 1,
+                )
+                self._generation += 1
+                kind = "parsed" if from_csv else "memory-mapped"
+                print(f"📦 Loaded suggestion dataset ({kind}) - {len(table)} rows, version {version}")
+
+            # Single reference assignment, so readers see either the old or the new snapshot
+            self._snapshot = snapshot
+            return snapshot
+
+    async def start(self):
+        """Load the dataset and start watching the file for changes"""
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            print(f"❌ Error loading suggestion dataset: {e}")
+        if self._snapshot is None:
+            print(f"⚠️ Suggestion dataset not loaded from {self.path}")
+
+        if settings.dataset_reload_interval > 0:
+            self._watch_task = asyncio.create_task(self._watch(settings.dataset_reload_interval))
+
+    async def stop(self):
+        """Stop watching the dataset file"""
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self, interval: int):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                # A half-written file fails to parse; keep the old snapshot and retry next tick
+                print(f"❌ Error reloading suggestion dataset: {e}")
+
+
+# Dataset store instance
+dataset_store = DatasetStore(CSV_PATH)
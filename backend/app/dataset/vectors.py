@@ -0,0 +1,290 @@
+import json
+import os
+import re
+import shutil
+import zlib
+from itertools import chain
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.dataset.columnar import ColumnTable
+
+# Creative text columns the index is built from
+TEXT_COLUMNS = ("Headline", "Ad_Description", "Keyword", "Image_Prompt")
+
+# Hashed feature space; large enough that collisions are rare for ad copy
+NUM_FEATURES = 1 << 18
+
+# Width of the shingle signatures used for diversity re-ranking
+SIGNATURE_DIMS = 512
+
+# Bump when the saved layout changes
+FORMAT_VERSION = 2
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if isinstance(text, str) else []
+
+
+def _features(tokens: List[str]) -> List[str]:
+    """Unigrams plus bigrams, so word order carries a little weight"""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _hash(feature: str) -> int:
+    """Stable feature id (crc32, unlike hash() which changes per process)"""
+    return zlib.crc32(feature.encode("utf-8")) & (NUM_FEATURES - 1)
+
+
+def _column_features(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (row, feature id) pairs for every unigram and bigram of a text column.
+    Each distinct token and bigram is hashed once, the rest is array work.
+    """
+    token_lists = [tokenize(text) for text in values]
+    lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+    if lengths.sum() == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    codes, vocabulary = pd.factorize(pd.Series(list(chain.from_iterable(token_lists)), dtype=object))
+    vocabulary = vocabulary.tolist()
+    token_rows = np.repeat(np.arange(len(values)), lengths)
+    unigram_ids = np.array([_hash(token) for token in vocabulary], dtype=np.int64)[codes]
+
+    # Bigrams are adjacent tokens of the same text
+    starts = np.flatnonzero(token_rows[:-1] == token_rows[1:])
+    pairs = codes[starts].astype(np.int64) * len(vocabulary) + codes[starts + 1]
+    pair_codes, distinct_pairs = pd.factorize(pairs)
+    bigram_ids = np.array(
+        [_hash(f"{vocabulary[p // len(vocabulary)]} {vocabulary[p % len(vocabulary)]}") for p in distinct_pairs],
+        dtype=np.int64,
+    )[pair_codes] if len(pairs) else np.empty(0, dtype=np.int64)
+
+    return np.concatenate([token_rows, token_rows[starts]]), np.concatenate([unigram_ids, bigram_ids])
+
+
+def _postings(table: ColumnTable) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(feature, row, term count) of every feature of every row, sorted by feature then row"""
+    num_rows = len(table)
+    parts = [_column_features(table.values(name)) for name in TEXT_COLUMNS if name in table]
+    rows = np.concatenate([part[0] for part in parts] + [np.empty(0, dtype=np.int64)])
+    features = np.concatenate([part[1] for part in parts] + [np.empty(0, dtype=np.int64)])
+    pairs, tf = np.unique(features * num_rows + rows, return_counts=True)
+    return pairs // max(num_rows, 1), pairs % max(num_rows, 1), tf
+
+
+def document_frequencies(table: ColumnTable) -> Tuple[np.ndarray, np.ndarray]:
+    """(feature ids, number of rows containing each) for the features present in a table"""
+    features, _, _ = _postings(table)
+    return np.unique(features, return_counts=True)
+
+
+def inverse_document_frequencies(df: np.ndarray, num_rows: int) -> np.ndarray:
+    """Smoothed IDF weight of every feature, from its document frequency among ``num_rows`` rows"""
+    return (np.log((1 + num_rows) / (1 + np.asarray(df, dtype=np.float64))) + 1).astype(np.float32)
+
+
+def query_weights(text: str, idf: np.ndarray, known: np.ndarray) -> Dict[int, float]:
+    """Normalized TF-IDF weights of a query's ``known`` features (empty if it has none)"""
+    counts: Dict[int, int] = {}
+    for feature in _features(tokenize(text)):
+        feature_id = _hash(feature)
+        counts[feature_id] = counts.get(feature_id, 0) + 1
+    weights = {f: c * float(idf[f]) for f, c in counts.items() if known[f]}
+    norm = float(np.sqrt(sum(w * w for w in weights.values())))
+    return {f: w / norm for f, w in weights.items()} if norm else {}
+
+
+class VectorIndex:
+    """
+    Hashed TF-IDF vectors of the creative text of every row.
+
+    Term counts are stored column-wise (an inverted index: for each feature,
+    the rows containing it and how often), so scoring a query only touches
+    the postings of the query's own features. IDF weights and row norms are
+    applied when scoring, so the same index can be scored with the document
+    frequencies of a larger dataset it is part of.
+    """
+
+    def __init__(self, num_rows: int, indptr: np.ndarray, rows: np.ndarray, tf: np.ndarray):
+        self.num_rows = num_rows
+        self.indptr = indptr  # NUM_FEATURES + 1 offsets into rows/tf
+        self.rows = rows
+        self.tf = tf
+        self._weighting: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._norms: Optional[Tuple[Hashable, np.ndarray]] = None  # (key, norms) of the last norms_for
+
+    @classmethod
+    def build(cls, table: ColumnTable) -> "VectorIndex":
+        num_rows = len(table)
+        features, rows, tf = _postings(table)
+        indptr = np.zeros(NUM_FEATURES + 1, dtype=np.int64)
+        np.cumsum(np.bincount(features, minlength=NUM_FEATURES), out=indptr[1:])
+        row_dtype = np.int32 if num_rows < 2**31 else np.int64
+        return cls(num_rows, indptr, rows.astype(row_dtype), tf.astype(np.float32))
+
+    @property
+    def df(self) -> np.ndarray:
+        """Number of rows containing each feature"""
+        return np.diff(self.indptr)
+
+    @property
+    def nbytes(self) -> int:
+        weighting = sum(array.nbytes for array in self._weighting) if self._weighting else 0
+        norms = self._norms[1].nbytes if self._norms else 0
+        return self.indptr.nbytes + self.rows.nbytes + self.tf.nbytes + weighting + norms
+
+    def norms(self, idf: np.ndarray) -> np.ndarray:
+        """L2 norm of every row's TF-IDF vector under the given IDF weights"""
+        features = np.repeat(np.arange(NUM_FEATURES), np.diff(self.indptr))
+        weights = (self.tf * idf[features]).astype(np.float64)
+        return np.sqrt(np.bincount(self.rows, weights=weights ** 2, minlength=self.num_rows)).astype(np.float32)
+
+    def norms_for(self, key: Hashable, idf: np.ndarray) -> np.ndarray:
+        """``norms(idf)``, kept until it is asked for with another ``key``"""
+        cached = self._norms
+        if cached is None or cached[0] != key:
+            cached = self._norms = (key, self.norms(idf))
+        return cached[1]
+
+    def weighting(self) -> Tuple[np.ndarray, np.ndarray]:
+        """IDF weights and row norms from this index's own document frequencies"""
+        if self._weighting is None:
+            idf = inverse_document_frequencies(self.df, self.num_rows)
+            self._weighting = (idf, self.norms(idf))
+        return self._weighting
+
+    def query_weights(self, text: str) -> Dict[int, float]:
+        """Normalized TF-IDF weights of a query's features (empty if it has no known terms)"""
+        return query_weights(text, self.weighting()[0], self.df > 0)
+
+    def scores(
+        self,
+        row_ids: np.ndarray,
+        weights: Dict[int, float],
+        idf: Optional[np.ndarray] = None,
+        norms: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Cosine similarity of each candidate row to a query, with this index's own weighting by default"""
+        if idf is None or norms is None:
+            idf, norms = self.weighting()
+        totals = np.zeros(self.num_rows, dtype=np.float32)
+        for feature, weight in weights.items():
+            start, end = self.indptr[feature], self.indptr[feature + 1]
+            # Each row appears once per feature, so fancy-index += is exact
+            totals[self.rows[start:end]] += self.tf[start:end] * np.float32(idf[feature] * weight)
+        return totals[row_ids] / np.maximum(norms[row_ids], np.float32(1e-12))
+
+    def rank(self, row_ids: np.ndarray, text: str) -> np.ndarray:
+        """Candidates ordered by similarity to ``text``; ties keep their current order"""
+        weights = self.query_weights(text)
+        if not weights or len(row_ids) == 0:
+            return row_ids
+        return row_ids[np.argsort(-self.scores(row_ids, weights), kind="stable")]
+
+    # Persistence
+
+    _ARRAYS = ("indptr", "rows", "tf")
+
+    def save(self, path: str):
+        """Write the index to ``path`` (a directory), atomically"""
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name in self._ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(self._meta(self.num_rows), f)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another worker saved the same version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def open(cls, path: str) -> "VectorIndex":
+        """Memory-map a saved index (read-only)"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta != cls._meta(meta.get("rows")):
+            raise ValueError(f"Vector index at {path} was built with other settings")
+        arrays = (np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in cls._ARRAYS)
+        return cls(meta["rows"], *arrays)
+
+    @staticmethod
+    def _meta(num_rows: int) -> dict:
+        return {"format": FORMAT_VERSION, "features": NUM_FEATURES, "columns": list(TEXT_COLUMNS), "rows": num_rows}
+
+    @classmethod
+    def load_or_build(cls, table: ColumnTable, root: str, version: str) -> "VectorIndex":
+        """
+        Open the saved index for a dataset version (or partition), building
+        and saving it first if needed. See ``prune`` for removing old ones.
+        """
+        path = os.path.join(root, version)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            try:
+                return cls.open(path)
+            except ValueError:
+                shutil.rmtree(path, ignore_errors=True)
+
+        index = cls.build(table)
+        try:
+            os.makedirs(root, exist_ok=True)
+            index.save(path)
+        except OSError as e:
+            # Read-only deploys still work, each worker just keeps its own copy
+            print(f"⚠️ Could not save vector index to {root}: {e}")
+            return index
+        print(f"🧭 Built vector index for {version}")
+        return cls.open(path)
+
+
+def text_signatures(values: List[str]) -> np.ndarray:
+    """
+    Cheap near-duplicate representation of short texts: the set of their
+    unigram and bigram shingles hashed into SIGNATURE_DIMS bits, as
+    L2-normalized rows so a dot product is their cosine similarity.
+    """
+    rows, features = _column_features(values)
+    signatures = np.zeros((len(values), SIGNATURE_DIMS), dtype=np.float32)
+    signatures[rows, features & (SIGNATURE_DIMS - 1)] = 1.0
+    norms = np.sqrt(signatures.sum(axis=1, keepdims=True))
+    return signatures / np.maximum(norms, 1)
+
+
+def mmr_select(relevance: np.ndarray, signatures: np.ndarray, k: int, diversity: float) -> List[int]:
+    """
+    Maximal marginal relevance: greedily pick ``k`` items, each maximizing
+    ``(1 - diversity) * relevance - diversity * (similarity to the items picked so far)``.
+    """
+    available = np.ones(len(relevance), dtype=bool)
+    max_similarity = np.zeros(len(relevance), dtype=np.float32)
+    selected: List[int] = []
+    for _ in range(min(k, len(relevance))):
+        scores = (1 - diversity) * relevance - diversity * max_similarity
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(max_similarity, signatures @ signatures[pick], out=max_similarity)
+    return selected
+
+
+def prune(root: str, keep: Iterable[str]):
+    """Remove saved indexes under ``root`` other than the versions (or partitions) in ``keep``"""
+    if not os.path.isdir(root):
+        return
+    keep = set(keep)
+    for entry in os.listdir(root):
+        if entry not in keep and ".tmp-" not in entry:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def normalize_query(text: Optional[str]) -> Optional[str]:
+    """Canonical form of a query, so equivalent descriptions share cache entries"""
+    tokens = tokenize(text)
+    return " ".join(tokens) if tokens else None
@@ -3,7 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config.settings import settings
 from app.database.mongodb import db
-from app.routes import auth_router, campaigns_router, ad_accounts_router
+from app.database.indexes import ensure_indexes
+from app.dataset.store import dataset_store
+from app.services.executor import suggestion_executor, password_executor
+from app.services.suggestion_corpus import ensure_corpus_indexes
+from app.services.metrics_ingest import ensure_metrics_collection, metrics_buffer
+from app.routes import auth_router, campaigns_router, ad_accounts_router, metrics_router
 from app.routes.suggestions import router as suggestions_router
 
 
@@ -13,9 +18,21 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting AdPatterns API...")
     await db.connect_db()
+    await ensure_metrics_collection(db.get_database())
+    await ensure_indexes(db.get_database())
+    await metrics_buffer.start()
+    if settings.suggestion_source == "mongo":
+        # Suggestions come from the corpus collection, no local dataset needed
+        await ensure_corpus_indexes()
+    else:
+        await dataset_store.start()
     yield
     # Shutdown
     print("🛑 Shutting down AdPatterns API...")
+    await metrics_buffer.stop()
+    await dataset_store.stop()
+    suggestion_executor.shutdown()
+    password_executor.shutdown()
     await db.close_db()
 
 
@@ -40,6 +57,7 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(campaigns_router)
 app.include_router(ad_accounts_router)
+app.include_router(metrics_router)
 app.include_router(suggestions_router, prefix="/api", tags=["suggestions"])
 
 
@@ -5,18 +5,25 @@ from app.schemas.ad_account import (
     AdAccountUpdate,
     AdAccountResponse,
 )
-from app.schemas.user import UserInDB
+from app.schemas.user import CurrentUser
 from app.services.auth import get_current_active_user
 from app.database.mongodb import db
+from app.database.repository import (
+    delete_owned,
+    find_owned,
+    insert_document,
+    update_owned,
+    utcnow,
+)
 from bson import ObjectId
-from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/api/ad-accounts", tags=["Ad Accounts"])
 
 
 @router.get("", response_model=List[AdAccountResponse])
 async def get_ad_accounts(
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Get all ad accounts for the current user"""
     ad_accounts_collection = db.get_collection("ad_accounts")
@@ -35,53 +42,42 @@ async def get_ad_accounts(
 @router.post("", response_model=AdAccountResponse, status_code=status.HTTP_201_CREATED)
 async def connect_ad_account(
     ad_account: AdAccountCreate,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Connect a new ad account"""
     ad_accounts_collection = db.get_collection("ad_accounts")
     
-    # Check if account already exists
-    existing_account = await ad_accounts_collection.find_one({
-        "user_id": current_user.email,
-        "platform": ad_account.platform,
-        "account_id": ad_account.account_id
-    })
-    
-    if existing_account:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Ad account already connected"
-        )
-    
     # Prepare ad account document
     account_dict = ad_account.model_dump()
     account_dict["user_id"] = current_user.email
     account_dict["status"] = "connected"
-    account_dict["connected_at"] = datetime.utcnow()
+    account_dict["connected_at"] = utcnow()
     account_dict["last_sync"] = None
     account_dict["metadata"] = {}
     
-    # Insert ad account
-    result = await ad_accounts_collection.insert_one(account_dict)
+    # Insert ad account; the unique (user_id, platform, account_id) index rejects duplicates
+    try:
+        created_account = await insert_document(ad_accounts_collection, account_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ad account already connected"
+        )
     
     # Update user's ad_accounts list
     users_collection = db.get_collection("users")
     await users_collection.update_one(
         {"email": current_user.email},
-        {"$push": {"ad_accounts": str(result.inserted_id)}}
+        {"$push": {"ad_accounts": created_account["_id"]}}
     )
     
-    # Retrieve and return created ad account
-    created_account = await ad_accounts_collection.find_one({"_id": result.inserted_id})
-    created_account["_id"] = str(created_account["_id"])
-    
     return AdAccountResponse(**created_account)
 
 
 @router.get("/{account_id}", response_model=AdAccountResponse)
 async def get_ad_account(
     account_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Get a specific ad account by ID"""
     ad_accounts_collection = db.get_collection("ad_accounts")
@@ -94,10 +90,7 @@ async def get_ad_account(
         )
     
     # Get ad account
-    account = await ad_accounts_collection.find_one({
-        "_id": ObjectId(account_id),
-        "user_id": current_user.email
-    })
+    account = await find_owned(ad_accounts_collection, account_id, current_user.email)
     
     if not account:
         raise HTTPException(
@@ -105,7 +98,6 @@ async def get_ad_account(
             detail="Ad account not found"
         )
     
-    account["_id"] = str(account["_id"])
     return AdAccountResponse(**account)
 
 
@@ -113,7 +105,7 @@ async def get_ad_account(
 async def update_ad_account(
     account_id: str,
     account_update: AdAccountUpdate,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Update an ad account"""
     ad_accounts_collection = db.get_collection("ad_accounts")
@@ -125,38 +117,30 @@ async def update_ad_account(
             detail="Invalid account ID"
         )
     
-    # Check if account exists and belongs to user
-    existing_account = await ad_accounts_collection.find_one({
-        "_id": ObjectId(account_id),
-        "user_id": current_user.email
-    })
+    # Prepare update data
+    update_data = account_update.model_dump(exclude_unset=True)
+    
+    # Update the account if it belongs to the user and get it back as updated
+    if update_data:
+        updated_account = await update_owned(
+            ad_accounts_collection, account_id, current_user.email, {"$set": update_data}
+        )
+    else:
+        updated_account = await find_owned(ad_accounts_collection, account_id, current_user.email)
     
-    if not existing_account:
+    if not updated_account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ad account not found"
         )
     
-    # Prepare update data
-    update_data = account_update.model_dump(exclude_unset=True)
-    
-    # Update ad account
-    await ad_accounts_collection.update_one(
-        {"_id": ObjectId(account_id)},
-        {"$set": update_data}
-    )
-    
-    # Retrieve and return updated account
-    updated_account = await ad_accounts_collection.find_one({"_id": ObjectId(account_id)})
-    updated_account["_id"] = str(updated_account["_id"])
-    
     return AdAccountResponse(**updated_account)
 
 
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def disconnect_ad_account(
     account_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Disconnect an ad account"""
     ad_accounts_collection = db.get_collection("ad_accounts")
@@ -169,12 +153,9 @@ async def disconnect_ad_account(
         )
     
     # Delete ad account
-    result = await ad_accounts_collection.delete_one({
-        "_id": ObjectId(account_id),
-        "user_id": current_user.email
-    })
+    deleted = await delete_owned(ad_accounts_collection, account_id, current_user.email)
     
-    if result.deleted_count == 0:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ad account not found"
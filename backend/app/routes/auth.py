@@ -1,16 +1,20 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
-from app.schemas.user import UserCreate, UserResponse, UserLogin, Token, UserInDB
+from app.schemas.user import UserCreate, UserResponse, UserLogin, Token, CurrentUser
 from app.services.auth import (
-    get_password_hash,
+    hash_password,
     authenticate_user,
     create_access_token,
     get_current_active_user,
 )
+from app.services.executor import password_executor, ExecutorSaturatedError
+from app.services.principal_cache import principal_cache
 from app.database.mongodb import db
+from app.database.repository import utcnow
 from app.config.settings import settings
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -20,26 +24,27 @@ async def register(user: UserCreate):
     """Register a new user"""
     users_collection = db.get_collection("users")
     
-    # Check if user already exists
-    existing_user = await users_collection.find_one({"email": user.email})
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Hash the password
-    hashed_password = get_password_hash(user.password)
+    # Hash the password (off the event loop; shed load when too many are waiting)
+    try:
+        hashed_password = await hash_password(user.password)
+    except ExecutorSaturatedError:
+        raise auth_busy()
     
     # Create user document
     user_dict = user.model_dump(exclude={"password"})
     user_dict["hashed_password"] = hashed_password
     user_dict["is_active"] = True
     user_dict["ad_accounts"] = []
+    user_dict["created_at"] = user_dict["updated_at"] = utcnow()
     
-    # Insert user into database
-    result = await users_collection.insert_one(user_dict)
-    
+    # Insert user into database; the unique email index rejects existing users
+    try:
+        result = await users_collection.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     # Create access token for the new user
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -52,7 +57,10 @@ async def register(user: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login and get access token"""
-    user = await authenticate_user(form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password)
+    except ExecutorSaturatedError:
+        raise auth_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,7 +80,10 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 @router.post("/login/json", response_model=Token)
 async def login_json(user_login: UserLogin):
     """Login with JSON body and get access token"""
-    user = await authenticate_user(user_login.email, user_login.password)
+    try:
+        user = await authenticate_user(user_login.email, user_login.password)
+    except ExecutorSaturatedError:
+        raise auth_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -90,15 +101,26 @@ async def login_json(user_login: UserLogin):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: UserInDB = Depends(get_current_active_user)):
-    """Get current user information"""
-    users_collection = db.get_collection("users")
-    user = await users_collection.find_one({"email": current_user.email})
-    if user:
-        user["_id"] = str(user["_id"])
-        return UserResponse(**user)
-    
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail="User not found"
+async def get_me(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Get current user information (already loaded by authentication)"""
+    return UserResponse(**current_user.model_dump(by_alias=True))
+
+
+@router.get("/principal-cache-stats")
+async def get_principal_cache_stats(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Hit/miss/eviction counters of the authenticated user cache"""
+    return principal_cache.stats()
+
+
+@router.get("/password-executor-stats")
+async def get_password_executor_stats(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Concurrency, queue wait and hash time counters of the password executor"""
+    return password_executor.stats()
+
+
+def auth_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": "1"},
     )
@@ -1,31 +1,130 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from app.config.settings import settings
 from app.schemas.campaign import (
+    BulkOperationType,
+    CampaignBulkOperation,
+    CampaignBulkResponse,
+    CampaignBulkResult,
     CampaignCreate,
     CampaignUpdate,
     CampaignResponse,
+    CampaignPage,
     CampaignSummary,
     CampaignStatus,
 )
-from app.schemas.user import UserInDB
+from app.schemas.user import CurrentUser
 from app.services.auth import get_current_active_user
 from app.database.mongodb import db
+from app.database.repository import (
+    KEYSET_SORT,
+    delete_owned,
+    encode_keyset_cursor,
+    find_owned,
+    insert_document,
+    keyset_filter,
+    update_owned,
+    utcnow,
+    with_str_id,
+)
+from app.services.campaign_rollup import (
+    ROLLUP_FIELDS,
+    apply_delta,
+    campaign_delta,
+    get_rollup,
+    rebuild_rollup,
+    status_delta,
+)
 from bson import ObjectId
-from datetime import datetime
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
 router = APIRouter(prefix="/api/campaigns", tags=["Campaigns"])
 
+# Fields of every listed campaign; fields= picks which of the larger optional
+# ones (targeting, ad_creative, metrics) come with them
+LIST_FIELDS = (
+    "name", "platform", "objective", "budget", "budget_type", "start_date", "end_date",
+    "status", "user_id", "ad_account_id", "created_at", "updated_at",
+)
+OPTIONAL_LIST_FIELDS = ("targeting", "ad_creative", "metrics")
+
+
+def list_projection(fields: Optional[str]) -> Optional[dict]:
+    """Projection for a fields= value, or None for whole documents"""
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(LIST_FIELDS) - set(OPTIONAL_LIST_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Optional fields are {', '.join(OPTIONAL_LIST_FIELDS)}"
+        )
+    return {field: 1 for field in (*LIST_FIELDS, *requested)}
+
+
+def new_campaign(campaign: CampaignCreate, owner: str, now) -> Dict[str, Any]:
+    """Campaign document to insert for a create request"""
+    campaign_dict = campaign.model_dump()
+    campaign_dict["user_id"] = owner
+    campaign_dict["created_at"] = campaign_dict["updated_at"] = now
+    campaign_dict["metrics"] = {
+        "impressions": 0,
+        "clicks": 0,
+        "conversions": 0,
+        "spend": 0.0,
+        "ctr": 0.0,
+        "cpc": 0.0,
+    }
+    return campaign_dict
 
-@router.get("", response_model=List[CampaignResponse])
+
+def publish_update(now) -> List[Dict[str, Any]]:
+    """
+    Update pipeline that makes a campaign active, setting the start date to
+    now if not set (a pipeline, so it's one round trip)
+    """
+    return [{"$set": {
+        "status": "active",
+        "updated_at": now,
+        "start_date": {"$cond": [{"$not": ["$start_date"]}, now, "$start_date"]},
+    }}]
+
+
+def page_filter(cursor: str) -> dict:
+    """Filter for the campaigns after a next_cursor"""
+    try:
+        return keyset_filter(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("", response_model=CampaignPage, response_model_exclude_unset=True)
 async def get_campaigns(
     status: Optional[CampaignStatus] = None,
     platform: Optional[str] = None,
-    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    current_user: UserInDB = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    skip: int = Query(
+        0, ge=0, deprecated=True,
+        description="Campaigns to skip; scans every skipped campaign, use cursor instead",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated optional fields to include (targeting, ad_creative, metrics); all when omitted"
+    ),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    """Get all campaigns for the current user"""
+    """
+    Get the current user's campaigns, most recently updated first, a page at
+    a time as {campaigns, next_cursor}. With only one of status and platform,
+    the page may be sorted in memory from that user's matches.
+    """
     campaigns_collection = db.get_collection("campaigns")
+    projection = list_projection(fields)
     
     # Build query
     query = {"user_id": current_user.email}
@@ -33,54 +132,41 @@ async def get_campaigns(
         query["status"] = status
     if platform:
         query["platform"] = platform
+    if cursor:
+        query.update(page_filter(cursor))
     
-    # Get campaigns
-    cursor = campaigns_collection.find(query).skip(skip).limit(limit)
-    campaigns = await cursor.to_list(length=limit)
+    # One extra document tells whether there is a next page
+    page = campaigns_collection.find(query, projection).sort(KEYSET_SORT).skip(skip).limit(limit + 1)
+    campaigns = await page.to_list(length=limit + 1)
+    next_cursor = encode_keyset_cursor(campaigns[limit - 1]) if len(campaigns) > limit else None
     
-    # Convert ObjectId to string
-    for campaign in campaigns:
-        campaign["_id"] = str(campaign["_id"])
-    
-    return [CampaignResponse(**campaign) for campaign in campaigns]
+    return CampaignPage(
+        campaigns=[CampaignResponse(**with_str_id(campaign)) for campaign in campaigns[:limit]],
+        next_cursor=next_cursor,
+    )
 
 
 @router.post("", response_model=CampaignResponse, status_code=status.HTTP_201_CREATED)
 async def create_campaign(
     campaign: CampaignCreate,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Create a new campaign"""
     campaigns_collection = db.get_collection("campaigns")
     
     # Prepare campaign document
-    campaign_dict = campaign.model_dump()
-    campaign_dict["user_id"] = current_user.email
-    campaign_dict["created_at"] = datetime.utcnow()
-    campaign_dict["updated_at"] = datetime.utcnow()
-    campaign_dict["metrics"] = {
-        "impressions": 0,
-        "clicks": 0,
-        "conversions": 0,
-        "spend": 0.0,
-        "ctr": 0.0,
-        "cpc": 0.0,
-    }
-    
-    # Insert campaign
-    result = await campaigns_collection.insert_one(campaign_dict)
-    
-    # Retrieve and return created campaign
-    created_campaign = await campaigns_collection.find_one({"_id": result.inserted_id})
-    created_campaign["_id"] = str(created_campaign["_id"])
+    campaign_dict = new_campaign(campaign, current_user.email, utcnow())
     
+    # Insert campaign and return it as stored
+    created_campaign = await insert_document(campaigns_collection, campaign_dict)
+    await apply_delta(current_user.email, campaign_delta(created_campaign))
     return CampaignResponse(**created_campaign)
 
 
 @router.get("/{campaign_id}", response_model=CampaignResponse)
 async def get_campaign(
     campaign_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Get a specific campaign by ID"""
     campaigns_collection = db.get_collection("campaigns")
@@ -93,10 +179,7 @@ async def get_campaign(
         )
     
     # Get campaign
-    campaign = await campaigns_collection.find_one({
-        "_id": ObjectId(campaign_id),
-        "user_id": current_user.email
-    })
+    campaign = await find_owned(campaigns_collection, campaign_id, current_user.email)
     
     if not campaign:
         raise HTTPException(
@@ -104,7 +187,6 @@ async def get_campaign(
             detail="Campaign not found"
         )
     
-    campaign["_id"] = str(campaign["_id"])
     return CampaignResponse(**campaign)
 
 
@@ -112,7 +194,7 @@ async def get_campaign(
 async def update_campaign(
     campaign_id: str,
     campaign_update: CampaignUpdate,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Update a campaign"""
     campaigns_collection = db.get_collection("campaigns")
@@ -124,31 +206,34 @@ async def update_campaign(
             detail="Invalid campaign ID"
         )
     
-    # Check if campaign exists and belongs to user
-    existing_campaign = await campaigns_collection.find_one({
-        "_id": ObjectId(campaign_id),
-        "user_id": current_user.email
-    })
+    # Prepare update data
+    update_data = campaign_update.model_dump(exclude_unset=True)
+    update_data["updated_at"] = utcnow()
+    
+    # Update the campaign if it belongs to the user and get it back as updated.
+    # A status change needs the old status for the rollup, so get the document
+    # as it was instead and apply the (top-level) $set to it.
+    if "status" in update_data:
+        previous_campaign = await update_owned(
+            campaigns_collection, campaign_id, current_user.email, {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
+        )
+        updated_campaign = {**previous_campaign, **update_data} if previous_campaign else None
+    else:
+        updated_campaign = await update_owned(
+            campaigns_collection, campaign_id, current_user.email, {"$set": update_data}
+        )
     
-    if not existing_campaign:
+    if not updated_campaign:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campaign not found"
         )
     
-    # Prepare update data
-    update_data = campaign_update.model_dump(exclude_unset=True)
-    update_data["updated_at"] = datetime.utcnow()
-    
-    # Update campaign
-    await campaigns_collection.update_one(
-        {"_id": ObjectId(campaign_id)},
-        {"$set": update_data}
-    )
-    
-    # Retrieve and return updated campaign
-    updated_campaign = await campaigns_collection.find_one({"_id": ObjectId(campaign_id)})
-    updated_campaign["_id"] = str(updated_campaign["_id"])
+    if "status" in update_data:
+        await apply_delta(
+            current_user.email, status_delta(previous_campaign.get("status"), updated_campaign["status"])
+        )
     
     return CampaignResponse(**updated_campaign)
 
@@ -156,7 +241,7 @@ async def update_campaign(
 @router.delete("/{campaign_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_campaign(
     campaign_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Delete a campaign"""
     campaigns_collection = db.get_collection("campaigns")
@@ -169,44 +254,39 @@ async def delete_campaign(
         )
     
     # Delete campaign
-    result = await campaigns_collection.delete_one({
-        "_id": ObjectId(campaign_id),
-        "user_id": current_user.email
-    })
+    deleted = await delete_owned(campaigns_collection, campaign_id, current_user.email, projection=ROLLUP_FIELDS)
     
-    if result.deleted_count == 0:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campaign not found"
         )
     
+    await apply_delta(current_user.email, campaign_delta(deleted, sign=-1))
     return None
 
 
 @router.get("/summary/stats", response_model=CampaignSummary)
 async def get_campaign_summary(
-    current_user: UserInDB = Depends(get_current_active_user)
+    refresh: bool = Query(False, description="Recompute the totals from the campaigns"),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Get campaign summary statistics"""
-    campaigns_collection = db.get_collection("campaigns")
-    
-    # Get all user campaigns
-    campaigns = await campaigns_collection.find({"user_id": current_user.email}).to_list(length=None)
-    
-    # Calculate summary
-    total_campaigns = len(campaigns)
-    active_campaigns = len([c for c in campaigns if c.get("status") == "active"])
-    
-    total_spend = sum(c.get("metrics", {}).get("spend", 0) for c in campaigns)
-    total_impressions = sum(c.get("metrics", {}).get("impressions", 0) for c in campaigns)
-    total_clicks = sum(c.get("metrics", {}).get("clicks", 0) for c in campaigns)
-    
+    # Totals come from the user's rollup document, kept up to date by the
+    # campaign writes; refresh rebuilds it with an aggregation
+    if refresh:
+        totals = await rebuild_rollup(current_user.email)
+    else:
+        totals = await get_rollup(current_user.email)
+    
+    total_impressions = totals["total_impressions"]
+    total_clicks = totals["total_clicks"]
     average_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
     
     return CampaignSummary(
-        total_campaigns=total_campaigns,
-        active_campaigns=active_campaigns,
-        total_spend=total_spend,
+        total_campaigns=totals["total_campaigns"],
+        active_campaigns=totals["active_campaigns"],
+        total_spend=totals["total_spend"],
         total_impressions=total_impressions,
         total_clicks=total_clicks,
         average_ctr=round(average_ctr, 2)
@@ -216,7 +296,7 @@ async def get_campaign_summary(
 @router.post("/{campaign_id}/publish", response_model=CampaignResponse)
 async def publish_campaign(
     campaign_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Publish a campaign (change status from draft to active)"""
     campaigns_collection = db.get_collection("campaigns")
@@ -228,42 +308,163 @@ async def publish_campaign(
             detail="Invalid campaign ID"
         )
     
-    # Check if campaign exists and belongs to user
-    existing_campaign = await campaigns_collection.find_one({
-        "_id": ObjectId(campaign_id),
-        "user_id": current_user.email
-    })
+    # Update campaign status to active unless it is already active
+    published_campaign = await update_owned(
+        campaigns_collection,
+        campaign_id,
+        current_user.email,
+        publish_update(utcnow()),
+        status={"$ne": "active"},
+    )
     
-    if not existing_campaign:
+    if not published_campaign:
+        # Only failures need a second look, to tell why nothing matched
+        if await find_owned(campaigns_collection, campaign_id, current_user.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Campaign is already active"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campaign not found"
         )
     
-    # Check if campaign is already active
-    if existing_campaign.get("status") == "active":
+    await apply_delta(current_user.email, status_delta(None, "active"))
+    return CampaignResponse(**published_campaign)
+
+
+def bulk_operation_error(operation: CampaignBulkOperation) -> Optional[str]:
+    """Why an operation can't run as given, or None"""
+    if operation.op == BulkOperationType.CREATE:
+        return None if operation.campaign else "Missing campaign"
+    if not operation.campaign_id or not ObjectId.is_valid(operation.campaign_id):
+        return "Invalid campaign ID"
+    if operation.op == BulkOperationType.UPDATE and operation.update is None:
+        return "Missing update"
+    if operation.op == BulkOperationType.STATUS and operation.status is None:
+        return "Missing status"
+    return None
+
+
+@router.post("/bulk", response_model=CampaignBulkResponse)
+async def bulk_campaigns(
+    operations: List[CampaignBulkOperation],
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Create, update, change the status of and publish many campaigns at once.
+    Ownership is checked with one query and the writes are sent as one
+    unordered bulk_write; each operation gets its own result.
+    """
+    if len(operations) > settings.campaign_bulk_max_size:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Campaign is already active"
+            detail=f"Too many operations, at most {settings.campaign_bulk_max_size} allowed"
         )
     
-    # Update campaign status to active
-    update_data = {
-        "status": "active",
-        "updated_at": datetime.utcnow()
+    campaigns_collection = db.get_collection("campaigns")
+    now = utcnow()
+    results = [
+        CampaignBulkResult(index=i, op=operation.op, ok=False, campaign_id=operation.campaign_id)
+        for i, operation in enumerate(operations)
+    ]
+    
+    # Validate the operations and collect the campaigns they target. Writes in
+    # an unordered bulk may run in any order, so a campaign can be targeted once.
+    targets = set()
+    for i, operation in enumerate(operations):
+        results[i].error = bulk_operation_error(operation)
+        if results[i].error is None and operation.op != BulkOperationType.CREATE:
+            campaign_id = ObjectId(operation.campaign_id)
+            if campaign_id in targets:
+                results[i].error = "Campaign appears more than once in this request"
+            targets.add(campaign_id)
+    
+    # One query for which of them belong to the user, and their current status
+    owned = {}
+    if targets:
+        cursor = campaigns_collection.find(
+            {"_id": {"$in": list(targets)}, "user_id": current_user.email}, {"status": 1}
+        )
+        owned = {campaign["_id"]: campaign.get("status") async for campaign in cursor}
+    
+    # Build the writes, with the change each makes to the summary rollup
+    writes, written_items, deltas = [], [], []
+    for i, operation in enumerate(operations):
+        if results[i].error is not None:
+            continue
+        
+        if operation.op == BulkOperationType.CREATE:
+            document = new_campaign(operation.campaign, current_user.email, now)
+            document["_id"] = ObjectId()
+            results[i].campaign_id = str(document["_id"])
+            writes.append(InsertOne(document))
+            deltas.append(campaign_delta(document))
+            written_items.append(i)
+            continue
+        
+        campaign_id = ObjectId(operation.campaign_id)
+        if campaign_id not in owned:
+            results[i].error = "Campaign not found"
+            continue
+        current_status = owned[campaign_id]
+        # The rollup delta assumes the status read above, so only write if it still holds
+        owned_campaign = {"_id": campaign_id, "user_id": current_user.email, "status": current_status}
+        
+        if operation.op == BulkOperationType.UPDATE:
+            update_data = operation.update.model_dump(exclude_unset=True)
+            update_data["updated_at"] = now
+            writes.append(UpdateOne(owned_campaign, {"$set": update_data}))
+            deltas.append(status_delta(current_status, update_data["status"]) if "status" in update_data else {})
+        elif operation.op == BulkOperationType.STATUS:
+            writes.append(UpdateOne(owned_campaign, {"$set": {"status": operation.status, "updated_at": now}}))
+            deltas.append(status_delta(current_status, operation.status))
+        else:
+            if current_status == "active":
+                results[i].error = "Campaign is already active"
+                continue
+            writes.append(UpdateOne(owned_campaign, publish_update(now)))
+            deltas.append(status_delta(current_status, "active"))
+        written_items.append(i)
+    
+    # Run them; an unordered bulk carries on past failed writes and reports them by position
+    write_errors = {}
+    matched = 0
+    if writes:
+        try:
+            matched = (await campaigns_collection.bulk_write(writes, ordered=False)).matched_count
+        except BulkWriteError as e:
+            write_errors = {error["index"]: error["errmsg"] for error in e.details["writeErrors"]}
+            matched = e.details["nMatched"]
+    
+    # An update matches nothing if its campaign was deleted or changed status
+    # since it was read. The counts only say how many, so when some are missing
+    # the updated campaigns are found by the updated_at this request set.
+    updates = {
+        position: ObjectId(operations[i].campaign_id)
+        for position, i in enumerate(written_items)
+        if operations[i].op != BulkOperationType.CREATE and position not in write_errors
     }
-    
-    # Set start date to now if not set
-    if not existing_campaign.get("start_date"):
-        update_data["start_date"] = datetime.utcnow()
-    
-    await campaigns_collection.update_one(
-        {"_id": ObjectId(campaign_id)},
-        {"$set": update_data}
-    )
-    
-    # Retrieve and return published campaign
-    published_campaign = await campaigns_collection.find_one({"_id": ObjectId(campaign_id)})
-    published_campaign["_id"] = str(published_campaign["_id"])
-    
-    return CampaignResponse(**published_campaign)
+    if matched < len(updates):
+        cursor = campaigns_collection.find(
+            {"_id": {"$in": list(updates.values())}, "user_id": current_user.email, "updated_at": now}, {"_id": 1}
+        )
+        applied = {campaign["_id"] async for campaign in cursor}
+        for position, campaign_id in updates.items():
+            if campaign_id not in applied:
+                write_errors[position] = "Campaign was changed or deleted during the request"
+    
+    rollup_delta: Dict[str, Any] = {}
+    for position, i in enumerate(written_items):
+        if position in write_errors:
+            results[i].error = write_errors[position]
+            if operations[i].op == BulkOperationType.CREATE:
+                results[i].campaign_id = None
+            continue
+        results[i].ok = True
+        for field, value in deltas[position].items():
+            rollup_delta[field] = rollup_delta.get(field, 0) + value
+    await apply_delta(current_user.email, rollup_delta)
+    
+    succeeded = sum(result.ok for result in results)
+    return CampaignBulkResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from typing import AsyncIterator
+from pydantic import ValidationError
+from app.schemas.metrics import MetricEvent, MetricEventError, MetricIngestResponse
+from app.schemas.user import CurrentUser
+from app.config.settings import settings
+from app.services.auth import get_current_active_user
+from app.services.metrics_ingest import MetricsBufferFullError, metrics_buffer
+from app.database.mongodb import db
+from app.database.repository import utcnow
+from bson import ObjectId
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"])
+
+
+def event_error(error: ValidationError) -> str:
+    """Short message for the first problem with an event line"""
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+def body_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body is larger than {max_bytes} bytes, send the events in smaller batches",
+    )
+
+
+async def body_lines(request: Request, max_bytes: int) -> AsyncIterator[bytes]:
+    """Lines of the request body as it arrives; 413 once it passes ``max_bytes``"""
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise body_too_large(max_bytes)
+    received = 0
+    pending = b""
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise body_too_large(max_bytes)
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+@router.post("/events", response_model=MetricIngestResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_metric_events(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Record campaign performance from an NDJSON body (application/x-ndjson),
+    one MetricEvent per line. Accepted events are buffered and written in
+    batches: to the time-series collection, and added to the campaigns'
+    metrics. Lines that can't be used are reported by line number. Bodies
+    over METRICS_BODY_MAX_MB get 413.
+    """
+    received_at = utcnow()
+    
+    # Parse every line, then check ownership of all their campaigns with one query
+    events, rejected = [], []
+    number = 0
+    async for line in body_lines(request, settings.metrics_body_max_mb * 1024 * 1024):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            event = MetricEvent.model_validate_json(line)
+        except ValidationError as e:
+            rejected.append(MetricEventError(line=number, error=event_error(e)))
+            continue
+        if not ObjectId.is_valid(event.campaign_id):
+            rejected.append(MetricEventError(line=number, error="Invalid campaign ID"))
+            continue
+        events.append((number, event))
+    
+    campaign_ids = list({ObjectId(event.campaign_id) for _, event in events})
+    owned = set()
+    if campaign_ids:
+        cursor = db.get_collection("campaigns").find(
+            {"_id": {"$in": campaign_ids}, "user_id": current_user.email}, {"_id": 1}
+        )
+        owned = {campaign["_id"] async for campaign in cursor}
+    
+    documents = []
+    for number, event in events:
+        campaign_id = ObjectId(event.campaign_id)
+        if campaign_id not in owned:
+            rejected.append(MetricEventError(line=number, error="Campaign not found"))
+            continue
+        documents.append({
+            "timestamp": event.timestamp or received_at,
+            "campaign": {"campaign_id": campaign_id, "user_id": current_user.email},
+            "impressions": event.impressions,
+            "clicks": event.clicks,
+            "conversions": event.conversions,
+            "spend": event.spend,
+        })
+    
+    if documents:
+        try:
+            metrics_buffer.add(documents)
+        except MetricsBufferFullError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many metric events waiting to be written, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+    
+    rejected.sort(key=lambda error: error.line)
+    return MetricIngestResponse(accepted=len(documents), rejected=rejected)
+
+
+@router.get("/ingest-stats")
+async def get_metrics_ingest_stats(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Buffered, written and dropped metric events of this worker"""
+    return metrics_buffer.stats()
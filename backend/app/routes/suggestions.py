@@ -1,157 +1,298 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List
-import pandas as pd
-import os
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+import numpy as np
+from app.config.settings import settings
+from app.dataset.stats import model_stats
+from app.dataset.store import dataset_store, CSV_PATH
+from app.schemas.suggestion import SuggestionRequest, SuggestionResponse
+from app.schemas.user import CurrentUser
+from app.dataset.store import DatasetSnapshot
+from app.services.suggestions import (
+    column_page,
+    compute_suggestions,
+    compute_suggestions_batch,
+    cta_for,
+    decode_cursor,
+    next_cursor_for,
+    ordered_matches,
+    request_key,
+    match_cache,
+    InvalidCursorError,
+    MOCK_SUGGESTIONS,
+    RESPONSE_FIELDS,
+    SUGGESTION_COLUMNS,
+)
+from app.services.suggestion_cache import suggestion_cache
+from app.services.suggestion_corpus import generate_corpus_suggestions
+from app.services.executor import suggestion_executor, ExecutorSaturatedError
+from app.services.auth import get_current_active_user
 
 router = APIRouter()
 
-# Load model data (CSV from notebook)
-# In Railway: backend/adpattern_final_production.csv
-# In local dev: can be in backend/ or root
-BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))  # Points to backend/
-CSV_PATH = os.path.join(BACKEND_DIR, "adpattern_final_production.csv")
-
-# Fallback to root directory if not found in backend (for local dev)
-if not os.path.exists(CSV_PATH):
-    ROOT_DIR = os.path.dirname(BACKEND_DIR)
-    CSV_PATH = os.path.join(ROOT_DIR, "adpattern_final_production.csv")
-
-class SuggestionRequest(BaseModel):
-    category: Optional[str] = "Clothing"
-    user_description: Optional[str] = None
-    price: Optional[str] = None
-    price_range: Optional[str] = None
-    gender: Optional[str] = "Male"
-    age_min: Optional[int] = 1
-    age_max: Optional[int] = 100
-    locations: Optional[str] = None
-    target_audience: Optional[str] = None
-    platform: Optional[str] = "Meta"  # Platform from model: Meta, Google
-
-class SuggestionResponse(BaseModel):
-    headlines: List[str]
-    descriptions: List[str]
-    keywords: List[str]
-    image_prompts: List[str]
-    cta: str
-    total_matches: int
 
 @router.post("/generate-suggestions", response_model=SuggestionResponse)
 async def generate_suggestions(request: SuggestionRequest):
     """
     Generate AI suggestions from model data based on campaign parameters.
     Filters model CSV by category, gender, age range and returns matching headlines/descriptions.
+    Pass a response's next_cursor back as ``cursor`` to get the next page of matches.
     """
     try:
-        # Check if CSV exists
-        if not os.path.exists(CSV_PATH):
-            # Return mock data if CSV not found (for development)
-            return SuggestionResponse(
-                headlines=[
-                    "Premium fashion crafted for everyday comfort shop today",
-                    "Stylish clothing designed for modern lifestyle explore now",
-                    "Elegant apparel tailored for confident look discover more"
-                ],
-                descriptions=[
-                    "Experience premium clothing that combines style and comfort for everyday wear",
-                    "Modern fashion collection designed for confident individuals",
-                    "Discover elegant apparel crafted for your active lifestyle"
-                ],
-                keywords=["premium", "fashion", "clothing", "style", "comfort"],
-                image_prompts=[
-                    "Premium stylish clothing photoshoot",
-                    "Modern fashion apparel lifestyle",
-                    "Elegant comfortable wear collection"
-                ],
-                cta="Shop Now",
-                total_matches=0
-            )
-        
-        # Load model data
-        df = pd.read_csv(CSV_PATH)
-        
-        # Filter by category
-        filtered_df = df[df['Category'] == request.category]
+        if settings.suggestion_source == "mongo":
+            return await generate_corpus_suggestions(request)
         
-        # Filter by platform (model has Platform column: Meta, Google)
-        if request.platform:
-            filtered_df = filtered_df[filtered_df['Platform'] == request.platform]
-        
-        # Filter by gender (if model has specific gender, match it; "All" in frontend maps to any gender in model)
-        if request.gender and request.gender != "All":
-            filtered_df = filtered_df[filtered_df['Gender'] == request.gender]
+        # Use the resident dataset snapshot; it stays the same for this whole request
+        snapshot = dataset_store.get()
+        if snapshot is None:
+            # Return mock data if CSV not found (for development)
+            return MOCK_SUGGESTIONS
         
-        # Filter by age range (model has Age_Min and Age_Max)
-        if request.age_min and request.age_max:
-            # Find rows where the age ranges overlap
-            filtered_df = filtered_df[
-                (filtered_df['Age_Min'] <= request.age_max) & 
-                (filtered_df['Age_Max'] >= request.age_min)
-            ]
+        # Filtering runs on the suggestion executor so it never blocks the event loop
+        if request.cursor:
+            request, positions = decode_cursor(snapshot, request.cursor)
+            return await suggestion_executor.run(compute_suggestions, snapshot, request, positions)
         
-        # If locations specified, try to find matching locations (model has comma-separated Locations)
-        if request.locations:
-            user_locations = [loc.strip().lower() for loc in request.locations.split(',')]
-            # Filter rows where any location matches
-            def location_matches(row_locations):
-                if pd.isna(row_locations):
-                    return False
-                model_locations = [loc.strip().lower() for loc in str(row_locations).split(',')]
-                return any(loc in model_locations for loc in user_locations)
-            
-            filtered_df = filtered_df[filtered_df['Locations'].apply(location_matches)]
+        async def compute():
+            return await suggestion_executor.run(compute_suggestions, snapshot, request)
         
-        # If no matches found, use all data from same category
-        if len(filtered_df) == 0:
-            filtered_df = df[df['Category'] == request.category]
+        # Identical requests share one cached (or in-flight) result per dataset version
+        return await suggestion_cache.get_or_compute(
+            request_key(request), snapshot.version, compute, snapshot.generation
+        )
         
-        # If still no matches, use all data
-        if len(filtered_df) == 0:
-            filtered_df = df
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ExecutorSaturatedError:
+        raise service_busy()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating suggestions: {str(e)}")
+
+
+@router.post("/generate-suggestions/batch", response_model=List[SuggestionResponse])
+async def generate_suggestions_batch(requests: List[SuggestionRequest]):
+    """
+    Generate suggestions for many campaign parameter sets in one call.
+    Returns one response per request, in the same order.
+    """
+    if len(requests) > settings.suggestion_batch_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch too large, at most {settings.suggestion_batch_max_size} requests allowed"
+        )
+    
+    try:
+        if settings.suggestion_source == "mongo":
+            return list(await asyncio.gather(*(generate_corpus_suggestions(request) for request in requests)))
         
-        # Get headlines, descriptions, keywords, and prompts (up to 10 items)
-        # Don't use unique() since each product should have 10 distinct ads
-        # Just limit the results to avoid too much data
-        headlines = filtered_df['Headline'].dropna().head(10).tolist()
-        descriptions = filtered_df['Ad_Description'].dropna().head(10).tolist()
-        keywords = filtered_df['Keyword'].dropna().head(10).tolist()
-        image_prompts = filtered_df['Image_Prompt'].dropna().head(10).tolist()
+        snapshot = dataset_store.get()
+        if snapshot is None:
+            return [MOCK_SUGGESTIONS] * len(requests)
         
-        # Determine CTA based on price
-        cta = "Shop Now" if request.price or request.price_range else "Learn More"
+        # Continuation pages are served one by one from their cached match lists
+        pages = {
+            i: decode_cursor(snapshot, request.cursor)
+            for i, request in enumerate(requests) if request.cursor
+        }
         
-        return SuggestionResponse(
-            headlines=headlines,
-            descriptions=descriptions,
-            keywords=keywords,
-            image_prompts=image_prompts,
-            cta=cta,
-            total_matches=len(filtered_df)
+        # Serve what we can from the cache and compute the rest together
+        keys = [request_key(request) for request in requests]
+        responses = suggestion_cache.get_many(
+            [key for i, key in enumerate(keys) if i not in pages], snapshot.version, snapshot.generation
         )
+        for i in sorted(pages):
+            responses.insert(i, await suggestion_executor.run(compute_suggestions, snapshot, *pages[i]))
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            computed = await suggestion_executor.run(
+                compute_suggestions_batch, snapshot, [requests[i] for i in missing]
+            )
+            for i, response in zip(missing, computed):
+                responses[i] = response
+                suggestion_cache.put(keys[i], snapshot.version, response, snapshot.generation)
+        
+        return responses
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ExecutorSaturatedError:
+        raise service_busy()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating suggestions: {str(e)}")
+
+
+@router.post("/generate-suggestions/stream")
+async def stream_suggestions(request: SuggestionRequest, http_request: Request):
+    """
+    Streaming form of generate-suggestions.
+    Sends a summary (total_matches, cta) first, then each SuggestionResponse list
+    as soon as it is ready, then next_cursor. The body is NDJSON, or Server-Sent
+    Events when the client accepts text/event-stream.
+    """
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    try:
+        snapshot = None if settings.suggestion_source == "mongo" else dataset_store.get()
+        if settings.suggestion_source == "mongo":
+            # A corpus page is read by one query, so there is nothing to send early
+            events = response_events(await generate_corpus_suggestions(request))
+        elif snapshot is None:
+            events = response_events(MOCK_SUGGESTIONS)
+        else:
+            positions = None
+            if request.cursor:
+                request, positions = decode_cursor(snapshot, request.cursor)
+            cached = None if positions else suggestion_cache.lookup(
+                request_key(request), snapshot.version, snapshot.generation
+            )
+            if cached is not None:
+                events = response_events(cached)
+            else:
+                # Match before the response starts, so errors and a busy executor keep their status codes
+                rows = await suggestion_executor.run(ordered_matches, snapshot, request)
+                events = suggestion_events(snapshot, request, rows, positions)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ExecutorSaturatedError:
+        raise service_busy()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating suggestions: {str(e)}")
+    
+    return StreamingResponse(
+        encode_events(events, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def suggestion_events(
+    snapshot: DatasetSnapshot,
+    request: SuggestionRequest,
+    rows: np.ndarray,
+    positions: Optional[Tuple[int, ...]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Events of one suggestion page, each list computed on demand.
+
+    The generator only runs when the response pulls the next event, and that
+    waits until the previous one was handed to the client connection, so a
+    slow reader holds back the work instead of buffering it. A disconnect
+    stops the generator before the remaining lists are computed.
+    """
+    first_page = positions is None
+    positions = positions or (0,) * len(SUGGESTION_COLUMNS)
+    yield {"event": "summary", "total_matches": len(rows), "cta": cta_for(request)}
+    
+    lists: Dict[str, List[str]] = {}
+    next_positions = []
+    for field, column, start in zip(RESPONSE_FIELDS, SUGGESTION_COLUMNS, positions):
+        try:
+            values, position = await suggestion_executor.run(column_page, snapshot, request, rows, column, start)
+        except ExecutorSaturatedError:
+            yield {"event": "error", "detail": "Suggestion service is busy, please retry shortly"}
+            return
+        lists[field] = values
+        next_positions.append(position)
+        yield {"event": "list", "field": field, "values": values}
+    
+    next_cursor = next_cursor_for(snapshot, request, rows, tuple(next_positions))
+    yield {"event": "done", "next_cursor": next_cursor}
+    
+    if first_page:
+        # A complete first page is the same as the regular endpoint's response
+        response = SuggestionResponse(
+            **lists, cta=cta_for(request), total_matches=len(rows), next_cursor=next_cursor
+        )
+        suggestion_cache.put(request_key(request), snapshot.version, response, snapshot.generation)
+
+
+async def response_events(response: SuggestionResponse) -> AsyncIterator[Dict[str, Any]]:
+    """Events of an already computed response"""
+    yield {"event": "summary", "total_matches": response.total_matches, "cta": response.cta}
+    for field in RESPONSE_FIELDS:
+        yield {"event": "list", "field": field, "values": getattr(response, field)}
+    yield {"event": "done", "next_cursor": response.next_cursor}
+
+
+async def encode_events(events: AsyncIterator[Dict[str, Any]], sse: bool) -> AsyncIterator[str]:
+    async for event in events:
+        data = json.dumps(event)
+        if sse:
+            yield f"event: {event['event']}\ndata: {data}\n\n"
+        else:
+            yield data + "\n"
+
+
+@router.get("/suggestion-executor-stats")
+async def get_suggestion_executor_stats(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Concurrency, queue and timing counters of the suggestion executor"""
+    return suggestion_executor.stats()
+
+
+@router.get("/dataset-partition-stats")
+async def get_dataset_partition_stats(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Loaded partitions, memory use and load/eviction counters of the suggestion dataset"""
+    return dataset_store.partition_stats()
+
+
+@router.get("/suggestion-cache-stats")
+async def get_suggestion_cache_stats(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Hit/miss/eviction counters of the suggestion result and match list caches"""
+    return {
+        "results": suggestion_cache.stats(),
+        "match_lists": match_cache.stats(),
+    }
 
 @router.get("/model-stats")
-async def get_model_stats():
-    """Get statistics about the model data"""
+async def get_model_stats(request: Request, response: Response):
+    """
+    Get statistics about the model data.
+    Statistics are computed once per dataset version and served with an ETag,
+    so pollers sending If-None-Match get a 304 until the dataset changes.
+    """
+    if settings.suggestion_source == "mongo":
+        # The local dataset isn't loaded in this mode, and scanning the corpus per request is too costly
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model statistics are only available with SUGGESTION_SOURCE=dataset"
+        )
+    
     try:
-        if not os.path.exists(CSV_PATH):
+        snapshot = dataset_store.get()
+        if snapshot is None:
             return {"error": "Model CSV not found", "path": CSV_PATH}
         
-        df = pd.read_csv(CSV_PATH)
+        etag = f'"{snapshot.version}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        stats = await suggestion_executor.run(model_stats, snapshot)
         
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
         return {
-            "total_rows": len(df),
-            "total_users": df['User_ID'].nunique(),
-            "categories": df['Category'].unique().tolist(),
-            "genders": df['Gender'].unique().tolist(),
-            "platforms": df['Platform'].unique().tolist(),
-            "age_range": f"{df['Age_Min'].min()} - {df['Age_Max'].max()}",
-            "unique_headlines": df['Headline'].nunique(),
-            "unique_descriptions": df['Ad_Description'].nunique(),
-            "csv_path": CSV_PATH
+            **stats,
+            "csv_path": snapshot.path,
+            "dataset_version": snapshot.version
         }
+    except ExecutorSaturatedError:
+        raise service_busy()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def service_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Suggestion service is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (weak comparison) against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
@@ -4,6 +4,7 @@ from app.schemas.user import (
     UserUpdate,
     UserResponse,
     UserInDB,
+    CurrentUser,
     UserLogin,
     Token,
     TokenData,
@@ -13,6 +14,11 @@ from app.schemas.campaign import (
     CampaignCreate,
     CampaignUpdate,
     CampaignResponse,
+    CampaignPage,
+    CampaignBulkOperation,
+    CampaignBulkResult,
+    CampaignBulkResponse,
+    BulkOperationType,
     CampaignInDB,
     CampaignSummary,
     PlatformType,
@@ -29,6 +35,15 @@ from app.schemas.ad_account import (
     AdAccountPlatform,
     AdAccountStatus,
 )
+from app.schemas.metrics import (
+    MetricEvent,
+    MetricEventError,
+    MetricIngestResponse,
+)
+from app.schemas.suggestion import (
+    SuggestionRequest,
+    SuggestionResponse,
+)
 
 __all__ = [
     "UserBase",
@@ -36,6 +51,7 @@ __all__ = [
     "UserUpdate",
     "UserResponse",
     "UserInDB",
+    "CurrentUser",
     "UserLogin",
     "Token",
     "TokenData",
@@ -43,6 +59,11 @@ __all__ = [
     "CampaignCreate",
     "CampaignUpdate",
     "CampaignResponse",
+    "CampaignPage",
+    "CampaignBulkOperation",
+    "CampaignBulkResult",
+    "CampaignBulkResponse",
+    "BulkOperationType",
     "CampaignInDB",
     "CampaignSummary",
     "PlatformType",
@@ -56,4 +77,9 @@ __all__ = [
     "AdAccountConnect",
     "AdAccountPlatform",
     "AdAccountStatus",
+    "MetricEvent",
+    "MetricEventError",
+    "MetricIngestResponse",
+    "SuggestionRequest",
+    "SuggestionResponse",
 ]
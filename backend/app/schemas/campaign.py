@@ -76,6 +76,44 @@ class CampaignResponse(CampaignBase):
         use_enum_values = True
 
 
+# Page of the campaign list
+class CampaignPage(BaseModel):
+    campaigns: List[CampaignResponse]
+    next_cursor: Optional[str] = None  # pass as cursor for the next page; None on the last page
+
+
+# Kinds of operation in a bulk request
+class BulkOperationType(str, Enum):
+    CREATE = "create"    # campaign
+    UPDATE = "update"    # campaign_id, update
+    STATUS = "status"    # campaign_id, status
+    PUBLISH = "publish"  # campaign_id
+
+
+# One operation of POST /api/campaigns/bulk
+class CampaignBulkOperation(BaseModel):
+    op: BulkOperationType
+    campaign_id: Optional[str] = None
+    campaign: Optional[CampaignCreate] = None
+    update: Optional[CampaignUpdate] = None
+    status: Optional[CampaignStatus] = None
+
+
+# Outcome of one bulk operation, in request order
+class CampaignBulkResult(BaseModel):
+    index: int
+    op: BulkOperationType
+    ok: bool
+    campaign_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CampaignBulkResponse(BaseModel):
+    results: List[CampaignBulkResult]
+    succeeded: int
+    failed: int
+
+
 # Campaign in DB Schema
 class CampaignInDB(CampaignBase):
     user_id: str
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+
+# One line of an NDJSON metrics upload: what a campaign did since the last event
+class MetricEvent(BaseModel):
+    campaign_id: str
+    timestamp: Optional[datetime] = None  # Defaults to when the event is received
+    impressions: int = Field(default=0, ge=0)
+    clicks: int = Field(default=0, ge=0)
+    conversions: int = Field(default=0, ge=0)
+    spend: float = Field(default=0.0, ge=0)
+
+
+class MetricEventError(BaseModel):
+    line: int  # 1-based line number in the upload
+    error: str
+
+
+class MetricIngestResponse(BaseModel):
+    accepted: int
+    rejected: List[MetricEventError]
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+
+# Suggestion Request Schema
+class SuggestionRequest(BaseModel):
+    category: Optional[str] = "Clothing"
+    user_description: Optional[str] = None
+    price: Optional[str] = None
+    price_range: Optional[str] = None
+    gender: Optional[str] = "Male"
+    age_min: Optional[int] = 1
+    age_max: Optional[int] = 100
+    locations: Optional[str] = None
+    target_audience: Optional[str] = None
+    platform: Optional[str] = "Meta"  # Platform from model: Meta, Google
+    seed: Optional[int] = None  # Shuffle matches reproducibly instead of dataset order
+    diversity: Optional[float] = Field(default=None, ge=0, le=1)  # Trade relevance for variety in each list (0 = off)
+    cursor: Optional[str] = None  # next_cursor of a previous response; replaces the other fields
+
+
+# Suggestion Response Schema
+class SuggestionResponse(BaseModel):
+    headlines: List[str]
+    descriptions: List[str]
+    keywords: List[str]
+    image_prompts: List[str]
+    cta: str
+    total_matches: int
+    next_cursor: Optional[str] = None  # None when every match has been returned
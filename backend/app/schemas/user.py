@@ -63,6 +63,17 @@ class UserInDB(UserBase):
     ad_accounts: List[str] = []  # List of connected ad account IDs
 
 
+# Authenticated user (no password hash or ad accounts), as cached per token
+class CurrentUser(UserBase):
+    id: str = Field(alias="_id")
+    is_active: bool = True
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        populate_by_name = True
+
+
 # Login Schema
 class UserLogin(BaseModel):
     email: EmailStr
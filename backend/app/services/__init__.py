@@ -1,19 +1,56 @@
 from app.services.auth import (
     verify_password,
     get_password_hash,
+    hash_password,
+    check_password,
     create_access_token,
     get_user_by_email,
     authenticate_user,
     get_current_user,
     get_current_active_user,
 )
+from app.services.suggestions import (
+    compute_suggestions,
+    compute_suggestions_batch,
+    match_rows,
+    request_key,
+)
+from app.services.suggestion_cache import suggestion_cache
+from app.services.principal_cache import principal_cache
+from app.services.campaign_rollup import apply_delta, apply_deltas, get_rollup, rebuild_rollup
+from app.services.metrics_ingest import MetricsBuffer, MetricsBufferFullError, metrics_buffer
+from app.services.executor import (
+    BoundedExecutor,
+    ExecutorSaturatedError,
+    suggestion_executor,
+    password_executor,
+)
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "hash_password",
+    "check_password",
     "create_access_token",
     "get_user_by_email",
     "authenticate_user",
     "get_current_user",
     "get_current_active_user",
+    "compute_suggestions",
+    "compute_suggestions_batch",
+    "match_rows",
+    "request_key",
+    "suggestion_cache",
+    "principal_cache",
+    "apply_delta",
+    "apply_deltas",
+    "get_rollup",
+    "rebuild_rollup",
+    "MetricsBuffer",
+    "MetricsBufferFullError",
+    "metrics_buffer",
+    "BoundedExecutor",
+    "ExecutorSaturatedError",
+    "suggestion_executor",
+    "password_executor",
 ]
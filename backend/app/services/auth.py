@@ -5,8 +5,10 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.config.settings import settings
-from app.schemas.user import TokenData, UserInDB
+from app.schemas.user import CurrentUser, TokenData, UserInDB
 from app.database.mongodb import db
+from app.services.executor import password_executor
+from app.services.principal_cache import principal_cache
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -14,6 +16,11 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# User fields loaded for authenticated requests (not the password hash or ad accounts)
+CURRENT_USER_FIELDS = {
+    "email": 1, "full_name": 1, "phone_number": 1, "company": 1, "is_active": 1, "created_at": 1, "updated_at": 1,
+}
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -25,6 +32,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """Hash a password on the password executor, off the event loop"""
+    return await password_executor.run(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password executor, off the event loop"""
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -53,13 +70,21 @@ async def authenticate_user(email: str, password: str) -> Optional[UserInDB]:
     user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await check_password(password, user.hashed_password):
         return None
     return user
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
-    """Get current authenticated user"""
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    """
+    Get current authenticated user.
+    Verified users are cached per token, so most requests skip both the JWT
+    check and the database lookup.
+    """
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -75,13 +100,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
     except JWTError:
         raise credentials_exception
     
-    user = await get_user_by_email(email=token_data.email)
+    users_collection = db.get_collection("users")
+    user = await users_collection.find_one({"email": token_data.email}, CURRENT_USER_FIELDS)
     if user is None:
         raise credentials_exception
-    return user
+    user["_id"] = str(user["_id"])
+    current_user = CurrentUser(**user)
+    principal_cache.put(token, current_user, token_expires=payload.get("exp"))
+    return current_user
 
 
-async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)) -> UserInDB:
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
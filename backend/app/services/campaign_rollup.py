@@ -0,0 +1,139 @@
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+
+from app.database.mongodb import db
+from app.database.repository import utcnow
+
+# One document per user (_id = user_id) with the totals behind the campaign summary
+ROLLUP_COLLECTION = "campaign_rollups"
+
+# Campaign metrics summed into the rollup, as metric -> rollup field
+ROLLUP_METRICS = {
+    "spend": "total_spend",
+    "impressions": "total_impressions",
+    "clicks": "total_clicks",
+}
+
+EMPTY_TOTALS = {
+    "total_campaigns": 0,
+    "active_campaigns": 0,
+    "total_spend": 0.0,
+    "total_impressions": 0,
+    "total_clicks": 0,
+}
+
+# Campaign fields a rollup delta needs, for writes that return the old document
+ROLLUP_FIELDS = {"status": 1, "metrics": 1}
+
+# Times a rebuild aggregates again when deltas keep landing meanwhile
+REBUILD_ATTEMPTS = 3
+
+
+def rollup_collection():
+    return db.get_collection(ROLLUP_COLLECTION)
+
+
+def is_active(status: Optional[str]) -> int:
+    return 1 if status == "active" else 0
+
+
+def campaign_delta(campaign: Dict[str, Any], sign: int = 1) -> Dict[str, Any]:
+    """Change in the totals from adding (sign=1) or removing (sign=-1) a campaign"""
+    delta = {"total_campaigns": sign, "active_campaigns": sign * is_active(campaign.get("status"))}
+    delta.update(metrics_delta(campaign.get("metrics") or {}, sign))
+    return delta
+
+
+def status_delta(old_status: Optional[str], new_status: Optional[str]) -> Dict[str, Any]:
+    return {"active_campaigns": is_active(new_status) - is_active(old_status)}
+
+
+def metrics_delta(increments: Dict[str, Any], sign: int = 1) -> Dict[str, Any]:
+    """Change in the totals from incrementing campaign metrics by ``increments``"""
+    return {
+        field: sign * (increments.get(metric) or 0)
+        for metric, field in ROLLUP_METRICS.items()
+        if increments.get(metric)
+    }
+
+
+def delta_update(delta: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """$inc of a delta, also counting it in ``writes`` so a concurrent rebuild knows it missed one"""
+    delta = {field: value for field, value in delta.items() if value}
+    return {"$inc": {**delta, "writes": 1}} if delta else None
+
+
+async def apply_delta(user_id: str, delta: Dict[str, Any]):
+    """
+    $inc a user's rollup, creating the document if needed. A document that
+    no rebuild has completed yet isn't served: it is built from the user's
+    campaigns the first time the summary is read.
+    """
+    update = delta_update(delta)
+    if update:
+        await rollup_collection().update_one({"_id": user_id}, update, upsert=True)
+
+
+async def apply_deltas(deltas: Dict[str, Dict[str, Any]]):
+    """apply_delta for many users (user_id -> delta) in one bulk_write"""
+    writes = []
+    for user_id, delta in deltas.items():
+        update = delta_update(delta)
+        if update:
+            writes.append(UpdateOne({"_id": user_id}, update, upsert=True))
+    if writes:
+        await rollup_collection().bulk_write(writes, ordered=False)
+
+
+async def aggregate_totals(user_id: str) -> Dict[str, Any]:
+    """Totals computed from the user's campaigns with a $group, reading only status and metrics"""
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$project": {"status": 1, "metrics": 1}},
+        {"$group": {
+            "_id": None,
+            "total_campaigns": {"$sum": 1},
+            "active_campaigns": {"$sum": {"$cond": [{"$eq": ["$status", "active"]}, 1, 0]}},
+            **{field: {"$sum": f"$metrics.{metric}"} for metric, field in ROLLUP_METRICS.items()},
+        }},
+    ]
+    results = await db.get_collection("campaigns").aggregate(pipeline).to_list(length=1)
+    totals = dict(EMPTY_TOTALS)
+    if results:
+        totals.update({field: results[0][field] for field in EMPTY_TOTALS})
+    return totals
+
+
+async def rebuild_rollup(user_id: str) -> Dict[str, Any]:
+    """
+    Recompute a user's rollup from their campaigns and store it, unless a
+    delta landed while aggregating: the totals may have missed its write, so
+    aggregate again (and after REBUILD_ATTEMPTS, return them unstored)
+    """
+    collection = rollup_collection()
+    for _ in range(REBUILD_ATTEMPTS):
+        rollup = await collection.find_one_and_update(
+            {"_id": user_id},
+            {"$setOnInsert": {"writes": 0}},
+            projection={"writes": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        totals = await aggregate_totals(user_id)
+        result = await collection.update_one(
+            {"_id": user_id, "writes": rollup.get("writes")},
+            {"$set": {**totals, "built": True, "rebuilt_at": utcnow()}},
+        )
+        if result.matched_count:
+            return totals
+    print(f"⚠️ Campaign summary of {user_id} kept changing while rebuilding, serving it unstored")
+    return totals
+
+
+async def get_rollup(user_id: str) -> Dict[str, Any]:
+    """A user's totals: one document read, or an aggregation the first time"""
+    rollup = await rollup_collection().find_one({"_id": user_id})
+    if rollup is None or not rollup.get("built"):
+        return await rebuild_rollup(user_id)
+    return {field: rollup.get(field, default) for field, default in EMPTY_TOTALS.items()}
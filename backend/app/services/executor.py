@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.config.settings import settings
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a bounded executor has no room for more work"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-bound work with a cap on queued jobs.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a thread; further submissions are rejected straight away instead
+    of piling up behind the others. Jobs still waiting after ``queue_timeout``
+    seconds are dropped too. Either way callers get ExecutorSaturatedError and
+    can shed load, while the event loop stays free for other routes.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, queue_timeout: float = 0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._pending = 0  # Only touched from the event loop
+        self._running = 0
+        self._lock = threading.Lock()
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._run_time_total = 0.0
+        self._run_time_max = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` on the pool and wait for its result"""
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturatedError(f"{self.name} executor is busy")
+
+        self._pending += 1
+        try:
+            future = self._pool.submit(self._call, time.perf_counter(), functools.partial(fn, *args, **kwargs))
+            waiter = asyncio.wrap_future(future)
+            if self.queue_timeout > 0:
+                done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+                # cancel() only succeeds for jobs that haven't started yet
+                if not done and future.cancel():
+                    self.timed_out += 1
+                    raise ExecutorSaturatedError(f"{self.name} executor queue timed out")
+            return await waiter
+        finally:
+            self._pending -= 1
+
+    def _call(self, submitted: float, job: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        ok = False
+        try:
+            result = job()
+            ok = True
+            return result
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                queue_wait, run_time = started - submitted, finished - started
+                self._queue_wait_total += queue_wait
+                self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+                self._run_time_total += run_time
+                self._run_time_max = max(self._run_time_max, run_time)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "running": self._running,
+                "queued": max(0, self._pending - self._running),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "avg_queue_wait_ms": round(self._queue_wait_total / finished * 1000, 3) if finished else 0.0,
+                "max_queue_wait_ms": round(self._queue_wait_max * 1000, 3),
+                "avg_run_time_ms": round(self._run_time_total / finished * 1000, 3) if finished else 0.0,
+                "max_run_time_ms": round(self._run_time_max * 1000, 3),
+            }
+
+
+# Executor for suggestion filtering and ranking
+suggestion_executor = BoundedExecutor(
+    name="suggestions",
+    max_workers=settings.suggestion_workers,
+    max_queue=settings.suggestion_queue_size,
+    queue_timeout=settings.suggestion_queue_timeout,
+)
+
+# Executor for bcrypt password hashing and verification (bcrypt releases the GIL)
+password_executor = BoundedExecutor(
+    name="passwords",
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue_size,
+    queue_timeout=settings.password_hash_queue_timeout,
+)
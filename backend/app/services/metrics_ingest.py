@@ -0,0 +1,209 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, PyMongoError
+
+from app.config.settings import settings
+from app.database.mongodb import db
+from app.services.campaign_rollup import apply_deltas, metrics_delta
+
+# Counters of an event, added to the campaign's metrics
+METRIC_FIELDS = ("impressions", "clicks", "conversions", "spend")
+
+
+class MetricsBufferFullError(RuntimeError):
+    """Raised when the metrics buffer has no room for more events"""
+
+
+def metrics_collection():
+    return db.get_collection(settings.metrics_collection)
+
+
+async def ensure_metrics_collection(database):
+    """Create the time-series collection for metric events; must run before its indexes are created"""
+    name = settings.metrics_collection
+    if await database.list_collection_names(filter={"name": name}):
+        return
+    try:
+        await database.create_collection(
+            name, timeseries={"timeField": "timestamp", "metaField": "campaign", "granularity": "minutes"}
+        )
+        print(f"✅ Created time-series collection {name}")
+    except CollectionInvalid:
+        pass  # Created by another worker in the meantime
+    except PyMongoError as e:
+        print(f"❌ Could not create time-series collection {name}: {e}")
+
+
+def metrics_update(totals: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Update pipeline adding ``totals`` to a campaign's metrics and recomputing its CTR and CPC"""
+    return [
+        {"$set": {
+            f"metrics.{metric}": {"$add": [{"$ifNull": [f"$metrics.{metric}", 0]}, totals[metric]]}
+            for metric in METRIC_FIELDS
+        }},
+        {"$set": {
+            "metrics.ctr": {"$cond": [
+                {"$gt": ["$metrics.impressions", 0]},
+                {"$round": [{"$multiply": [{"$divide": ["$metrics.clicks", "$metrics.impressions"]}, 100]}, 2]},
+                0.0,
+            ]},
+            "metrics.cpc": {"$cond": [
+                {"$gt": ["$metrics.clicks", 0]},
+                {"$round": [{"$divide": ["$metrics.spend", "$metrics.clicks"]}, 2]},
+                0.0,
+            ]},
+        }},
+    ]
+
+
+class MetricsBuffer:
+    """In-memory buffer of metric events, written to MongoDB in batches of ``flush_size`` or every ``flush_interval``"""
+
+    def __init__(self, flush_size: int, flush_interval: float, max_pending: int):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._events: List[Dict[str, Any]] = []
+        self._flushing = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._timer_task: Optional[asyncio.Task] = None
+
+        self.received = 0
+        self.written = 0  # Stored in the time-series collection
+        self.dropped = 0  # Not stored
+        self.unapplied = 0  # Stored, but not added to their campaigns or rollups
+        self.rejected = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self._flush_time_total = 0.0
+        self._flush_time_max = 0.0
+
+    def add(self, events: List[Dict[str, Any]]):
+        """Queue events for the next flush, or raise MetricsBufferFullError if they don't fit"""
+        if len(self._events) + len(events) > self.max_pending:
+            self.rejected += len(events)
+            raise MetricsBufferFullError("Metrics buffer is full")
+        self._events.extend(events)
+        self.received += len(events)
+        if len(self._events) >= self.flush_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Write every waiting event"""
+        async with self._flushing:
+            if not self._events:
+                return
+            events, self._events = self._events, []
+            started = time.perf_counter()
+            # Not retried: after a partial write a retry would count some events twice
+            stored = await self._store(events)
+            applied = await self._apply(stored) if stored else True
+            self.written += len(stored)
+            self.dropped += len(events) - len(stored)
+            if len(stored) < len(events) or not applied:
+                self.failed_flushes += 1
+            elapsed = time.perf_counter() - started
+            self.flushes += 1
+            self._flush_time_total += elapsed
+            self._flush_time_max = max(self._flush_time_max, elapsed)
+
+    async def _store(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert the events into the time-series collection and return the ones stored"""
+        try:
+            await metrics_collection().insert_many(events, ordered=False)
+            return events
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            print(f"❌ Error storing {len(failed)} of {len(events)} metric events: {e}")
+            return [event for i, event in enumerate(events) if i not in failed]
+        except PyMongoError as e:
+            print(f"❌ Error storing {len(events)} metric events: {e}")
+            return []
+
+    async def _apply(self, events: List[Dict[str, Any]]) -> bool:
+        """Add the sums of stored events to their campaigns' metrics and owners' rollups"""
+        totals: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+        for event in events:
+            campaign = event["campaign"]
+            key = (campaign["campaign_id"], campaign["user_id"])
+            campaign_totals = totals.setdefault(key, dict.fromkeys(METRIC_FIELDS, 0))
+            for metric in METRIC_FIELDS:
+                campaign_totals[metric] += event[metric]
+
+        user_deltas: Dict[str, Dict[str, Any]] = {}
+        for (_, user_id), campaign_totals in totals.items():
+            user_delta = user_deltas.setdefault(user_id, {})
+            for field, value in metrics_delta(campaign_totals).items():
+                user_delta[field] = user_delta.get(field, 0) + value
+
+        try:
+            await db.get_collection("campaigns").bulk_write(
+                [
+                    UpdateOne({"_id": campaign_id, "user_id": user_id}, metrics_update(campaign_totals))
+                    for (campaign_id, user_id), campaign_totals in totals.items()
+                ],
+                ordered=False,
+            )
+        except PyMongoError as e:
+            self.unapplied += len(events)
+            print(f"❌ {len(events)} metric events were stored but not added to their campaigns: {e}")
+            return False
+        try:
+            await apply_deltas(user_deltas)
+        except PyMongoError as e:
+            self.unapplied += len(events)
+            print(f"❌ {len(events)} metric events were added to their campaigns but not to the summaries: {e}")
+            return False
+        return True
+
+    async def start(self):
+        """Start flushing partly filled buffers every flush_interval seconds"""
+        if self.flush_interval > 0:
+            self._timer_task = asyncio.create_task(self._tick(self.flush_interval))
+
+    async def stop(self):
+        """Stop the timer and write what is left"""
+        if self._timer_task:
+            self._timer_task.cancel()
+            try:
+                await self._timer_task
+            except asyncio.CancelledError:
+                pass
+            self._timer_task = None
+        await self.flush()
+
+    async def _tick(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Error flushing metric events: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._events),
+            "max_pending": self.max_pending,
+            "flush_size": self.flush_size,
+            "flush_interval_seconds": self.flush_interval,
+            "received": self.received,
+            "written": self.written,
+            "dropped": self.dropped,
+            "unapplied": self.unapplied,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "avg_flush_ms": round(self._flush_time_total / self.flushes * 1000, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self._flush_time_max * 1000, 2),
+        }
+
+
+# Metrics buffer instance
+metrics_buffer = MetricsBuffer(
+    flush_size=settings.metrics_flush_size,
+    flush_interval=settings.metrics_flush_interval,
+    max_pending=settings.metrics_buffer_max,
+)
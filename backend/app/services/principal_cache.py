@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.schemas.user import CurrentUser
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of authenticated users by access token, expiring with
+    the token or after ``ttl``. Nothing in the API changes the cached fields
+    yet, so nothing invalidates entries: a change made directly in the
+    database (e.g. deactivating a user) shows after at most ``ttl`` seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, CurrentUser]]" = OrderedDict()
+        self._tokens_by_email: Dict[str, Set[str]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        """Cached user for a token, or None if missing or expired"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(token)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: CurrentUser, token_expires: Optional[float]):
+        """Cache a user until ``token_expires`` (a Unix timestamp, the token's exp) at the latest"""
+        lifetime = self.ttl if token_expires is None else min(self.ttl, token_expires - time.time())
+        if self.max_entries <= 0 or lifetime <= 0:
+            return
+        if token in self._entries:
+            self._remove(token)
+        self._entries[token] = (time.monotonic() + lifetime, user)
+        self._tokens_by_email.setdefault(user.email, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate_user(self, email: str):
+        """Drop every cached token of a user; for endpoints that deactivate a user or change their profile"""
+        tokens = self._tokens_by_email.pop(email, set())
+        for token in tokens:
+            self._entries.pop(token, None)
+        if tokens:
+            self.invalidations += 1
+
+    def _remove(self, token: str):
+        _, user = self._entries.pop(token)
+        tokens = self._tokens_by_email.get(user.email)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_email[user.email]
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_email.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "users": len(self._tokens_by_email),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Principal cache instance
+principal_cache = PrincipalCache(
+    max_entries=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+)
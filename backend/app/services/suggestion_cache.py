@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config.settings import settings
+
+
+class SuggestionCache:
+    """
+    Bounded LRU + TTL cache for suggestion data with single-flight loading.
+
+    Concurrent misses for the same key share one computation. Entries belong
+    to one dataset version and are dropped as soon as a request for a newer
+    generation arrives; gets and puts of requests still running on an older
+    generation are ignored, so they can't switch the cache back.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version: Optional[str] = None
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()  # get/put may also be called from worker threads
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale = 0
+
+    def _check_version(self, version: str, generation: int) -> bool:
+        """Switch to a newer dataset version; False for a request on an older generation"""
+        if generation < self.generation:
+            self.stale += 1
+            return False
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+        self.generation = generation
+        return True
+
+    def get(self, key: Hashable, version: str, generation: int = 0) -> Optional[Any]:
+        """Cached value for a key, or None if missing, expired or for an older generation"""
+        with self._lock:
+            if not self._check_version(version, generation):
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, version: str, value: Any, generation: int = 0):
+        with self._lock:
+            if not self._check_version(version, generation) or self.max_entries <= 0:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def lookup(self, key: Hashable, version: str, generation: int = 0) -> Optional[Any]:
+        """Like ``get``, but counted as a hit or miss"""
+        value = self.get(key, version, generation)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get_many(self, keys: List[Hashable], version: str, generation: int = 0) -> List[Optional[Any]]:
+        """Cached values for several keys (None for misses), counted like single lookups"""
+        return [self.lookup(key, version, generation) for key in keys]
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        version: str,
+        compute: Callable[[], Awaitable[Any]],
+        generation: int = 0,
+    ) -> Any:
+        """Return the cached value or compute it once, however many callers are waiting"""
+        value = self.get(key, version, generation)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        flight_key = (version, key)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fill(key, version, compute, generation))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+        else:
+            self.coalesced += 1
+
+        # Shielded so a disconnecting client doesn't cancel the work for everyone else
+        return await asyncio.shield(task)
+
+    async def _fill(
+        self, key: Hashable, version: str, compute: Callable[[], Awaitable[Any]], generation: int
+    ) -> Any:
+        value = await compute()
+        self.put(key, version, value, generation)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "dataset_version": self.version,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "stale": self.stale,
+            "inflight": len(self._inflight),
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Suggestion cache instance
+suggestion_cache = SuggestionCache(
+    max_entries=settings.suggestion_cache_size,
+    ttl=settings.suggestion_cache_ttl,
+)
@@ -0,0 +1,223 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING
+
+from app.config.settings import settings
+from app.database.mongodb import db
+from app.schemas.suggestion import SuggestionRequest, SuggestionResponse
+from app.services.suggestion_cache import suggestion_cache
+from app.services.suggestions import (
+    MAX_SUGGESTIONS,
+    RESPONSE_FIELDS,
+    SUGGESTION_COLUMNS,
+    InvalidCursorError,
+    candidate_key,
+    cta_for,
+    decode_cursor_extra,
+    encode_cursor_state,
+    request_key,
+)
+
+# Cache and cursor version of responses served from a corpus without a metadata document
+CORPUS_VERSION = "mongo"
+
+# _id of the metadata document load_corpus writes at the start and end of every import
+CORPUS_META_ID = "corpus"
+
+# Indexes of the corpus collection, as (keys, options). Pages are read in _id
+# order, so _id follows the equality filters and comes before the age ranges:
+# the index then serves the sort instead of an in-memory one.
+CORPUS_INDEXES = [
+    (
+        [
+            ("Category", ASCENDING), ("Platform", ASCENDING), ("Gender", ASCENDING),
+            ("_id", ASCENDING), ("Age_Min", ASCENDING), ("Age_Max", ASCENDING),
+        ],
+        {"name": "suggestion_filters_by_id"},
+    ),
+    # Category fallback, and requests without a platform or gender
+    ([("Category", ASCENDING), ("_id", ASCENDING)], {"name": "category_by_id"}),
+    # Multikey: one entry per location of a row
+    ([("location_tokens", ASCENDING)], {"name": "location_tokens"}),
+]
+
+# Earlier indexes replaced by CORPUS_INDEXES, dropped when the indexes are created
+LEGACY_CORPUS_INDEXES = ("suggestion_filters",)
+
+# Only the suggestion columns are sent back from the database
+PROJECTION = {column: 1 for column in SUGGESTION_COLUMNS}
+
+# Documents read per query while filling a page (a few spare for null values)
+FETCH_SIZE = MAX_SUGGESTIONS * 4
+
+
+def corpus_collection():
+    return db.get_collection(settings.suggestion_corpus_collection)
+
+
+def corpus_meta_name(corpus_name: str) -> str:
+    """Collection holding the metadata document of a corpus collection"""
+    return f"{corpus_name}_meta"
+
+
+def corpus_meta_collection():
+    return db.get_collection(corpus_meta_name(settings.suggestion_corpus_collection))
+
+
+async def corpus_version() -> str:
+    """
+    Cache and cursor version of the corpus: the id of its latest import, so
+    cached pages and cursors expire whenever load_corpus changes the data
+    """
+    meta = await corpus_meta_collection().find_one({"_id": CORPUS_META_ID}, {"import_id": 1})
+    return f"{CORPUS_VERSION}:{meta['import_id']}" if meta else CORPUS_VERSION
+
+
+def location_tokens(locations: Optional[str]) -> List[str]:
+    """Distinct stripped, lowercased locations of a comma-separated list"""
+    if not isinstance(locations, str):
+        return []
+    return sorted({location.strip().lower() for location in locations.split(",") if location.strip()})
+
+
+def corpus_document(row: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Corpus document of a dataset row. The row number is the _id, so documents
+    sort in dataset order and an import can be repeated without duplicates.
+    """
+    document: Dict[str, Any] = {"_id": row}
+    for name, value in record.items():
+        document[name] = None if isinstance(value, float) and math.isnan(value) else value
+    document["location_tokens"] = location_tokens(record.get("Locations"))
+    return document
+
+
+async def ensure_corpus_indexes():
+    """Create the corpus indexes if they don't exist yet"""
+    collection = corpus_collection()
+    for keys, options in CORPUS_INDEXES:
+        await collection.create_index(keys, **options)
+    existing = await collection.index_information()
+    for name in LEGACY_CORPUS_INDEXES:
+        if name in existing:
+            await collection.drop_index(name)
+    print(f"✅ Suggestion corpus indexes ready on {settings.suggestion_corpus_collection}")
+
+
+def corpus_filter(request: SuggestionRequest) -> Dict[str, Any]:
+    """Query for the category, platform, gender, age and location filters of a request"""
+    category, platform, gender, ages = candidate_key(request)
+    query: Dict[str, Any] = {"Category": category}
+    if platform is not None:
+        query["Platform"] = platform
+    if gender is not None:
+        query["Gender"] = gender
+    if ages:
+        # Overlapping age ranges
+        query["Age_Min"] = {"$lte": ages[1]}
+        query["Age_Max"] = {"$gte": ages[0]}
+    if request.locations:
+        query["location_tokens"] = {"$in": location_tokens(request.locations)}
+    return query
+
+
+def corpus_queries(request: SuggestionRequest) -> List[Dict[str, Any]]:
+    """A request's filter, then the fallbacks when nothing matches: its whole category, then all data"""
+    queries = [corpus_filter(request), {"Category": request.category}] if request.category is not None else []
+    return queries + [{}]
+
+
+async def matching_filter(collection, request: SuggestionRequest) -> Tuple[int, int]:
+    """Position in corpus_queries of the first query with matches, and its count"""
+    queries = corpus_queries(request)
+    for level, query in enumerate(queries[:-1]):
+        total = await collection.count_documents(query)
+        if total:
+            return level, total
+    return len(queries) - 1, await collection.estimated_document_count()
+
+
+async def corpus_page(
+    collection, query: Dict[str, Any], positions: Tuple[int, ...]
+) -> Tuple[Dict[str, List[str]], Tuple[int, ...], bool]:
+    """
+    One page of every suggestion list: the lists, the last row each one used,
+    and whether any rows are left. Rows are read in _id order from the lowest
+    position on, in batches of FETCH_SIZE.
+    """
+    lists: Dict[str, List[str]] = {field: [] for field in RESPONSE_FIELDS}
+    next_positions = list(positions)
+    after = min(positions)
+    while True:
+        documents = await (
+            collection.find({**query, "_id": {"$gt": after}}, PROJECTION)
+            .sort("_id", ASCENDING)
+            .limit(FETCH_SIZE)
+            .to_list(FETCH_SIZE)
+        )
+        for document in documents:
+            for i, (field, column) in enumerate(zip(RESPONSE_FIELDS, SUGGESTION_COLUMNS)):
+                if document["_id"] > next_positions[i] and len(lists[field]) < MAX_SUGGESTIONS:
+                    next_positions[i] = document["_id"]
+                    if document.get(column) is not None:
+                        lists[field].append(document[column])
+
+        if len(documents) < FETCH_SIZE:
+            last_row = documents[-1]["_id"] if documents else after
+            return lists, tuple(next_positions), min(next_positions) < last_row
+        if all(len(values) == MAX_SUGGESTIONS for values in lists.values()):
+            return lists, tuple(next_positions), True
+        after = documents[-1]["_id"]
+
+
+async def compute_corpus_suggestions(
+    request: SuggestionRequest,
+    version: str,
+    positions: Optional[Tuple[int, ...]] = None,
+    matches: Optional[Tuple[int, int]] = None,
+) -> SuggestionResponse:
+    """
+    One page of suggestions from the corpus collection, in dataset order.
+    ``matches`` is the (query level, count) of matching_filter, carried in
+    cursors so only first pages count the matches. seed, user_description and
+    diversity need the local dataset and are ignored.
+    """
+    collection = corpus_collection()
+    level, total = matches or await matching_filter(collection, request)
+    lists, next_positions, more = await corpus_page(
+        collection, corpus_queries(request)[level], positions or (-1,) * len(SUGGESTION_COLUMNS)
+    )
+    return SuggestionResponse(
+        **lists,
+        cta=cta_for(request),
+        total_matches=total,
+        next_cursor=(
+            encode_cursor_state(version, request, next_positions, {"q": level, "t": total}) if more else None
+        ),
+    )
+
+
+def cursor_matches(request: SuggestionRequest, extra: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """The (query level, count) carried in a corpus cursor; None for cursors issued without them"""
+    if not extra:
+        return None
+    level, total = extra.get("q"), extra.get("t")
+    if not isinstance(level, int) or not isinstance(total, int):
+        raise InvalidCursorError("Invalid cursor")
+    if not 0 <= level < len(corpus_queries(request)) or total < 0:
+        raise InvalidCursorError("Invalid cursor")
+    return level, total
+
+
+async def generate_corpus_suggestions(request: SuggestionRequest) -> SuggestionResponse:
+    """Corpus suggestions for a request or cursor; first pages are cached like local ones"""
+    version = await corpus_version()
+    if request.cursor:
+        request, positions, extra = decode_cursor_extra(version, request.cursor)
+        return await compute_corpus_suggestions(request, version, positions, cursor_matches(request, extra))
+
+    async def compute():
+        return await compute_corpus_suggestions(request, version)
+
+    return await suggestion_cache.get_or_compute(request_key(request), version, compute)
@@ -0,0 +1,358 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.config.settings import settings
+from app.dataset.columnar import ColumnTable
+from app.dataset.index import SuggestionIndex
+from app.dataset.store import DatasetSnapshot
+from app.dataset.vectors import mmr_select, normalize_query, text_signatures
+from app.schemas.suggestion import SuggestionRequest, SuggestionResponse
+from app.services.suggestion_cache import SuggestionCache
+
+# Number of items returned per suggestion list
+MAX_SUGGESTIONS = 10
+
+# Columns returned per response, in the order their cursor positions are stored
+SUGGESTION_COLUMNS = ('Headline', 'Ad_Description', 'Keyword', 'Image_Prompt')
+
+# SuggestionResponse list field filled from each of SUGGESTION_COLUMNS
+RESPONSE_FIELDS = ('headlines', 'descriptions', 'keywords', 'image_prompts')
+
+# Ordered match lists of recent requests, so following pages skip the filtering
+match_cache = SuggestionCache(
+    max_entries=settings.suggestion_match_cache_size,
+    ttl=settings.suggestion_cache_ttl,
+)
+
+
+class InvalidCursorError(ValueError):
+    """Raised for cursors that are malformed or belong to another dataset version"""
+
+# Returned when the model CSV is not available (for development)
+MOCK_SUGGESTIONS = SuggestionResponse(
+    headlines=[
+        "Premium fashion crafted for everyday comfort shop today",
+        "Stylish clothing designed for modern lifestyle explore now",
+        "Elegant apparel tailored for confident look discover more"
+    ],
+    descriptions=[
+        "Experience premium clothing that combines style and comfort for everyday wear",
+        "Modern fashion collection designed for confident individuals",
+        "Discover elegant apparel crafted for your active lifestyle"
+    ],
+    keywords=["premium", "fashion", "clothing", "style", "comfort"],
+    image_prompts=[
+        "Premium stylish clothing photoshoot",
+        "Modern fashion apparel lifestyle",
+        "Elegant comfortable wear collection"
+    ],
+    cta="Shop Now",
+    total_matches=0
+)
+
+
+def candidate_key(request: SuggestionRequest) -> Tuple:
+    """
+    The index filters of a request: category, platform, gender and age range.
+
+    Platform (model has Platform column: Meta, Google) and gender ("All" in
+    frontend maps to any gender in model) are open (None) when not given; the
+    age range only applies when both bounds are set.
+    """
+    platform = request.platform or None
+    gender = request.gender if request.gender and request.gender != "All" else None
+    ages = (request.age_min, request.age_max) if request.age_min and request.age_max else None
+    return (request.category, platform, gender, ages)
+
+
+def request_key(request: SuggestionRequest) -> Tuple:
+    """
+    Normalized form of a suggestion request.
+
+    Requests that select the same rows, order and CTA map to the same key,
+    e.g. gender "All" and no gender, the same locations in another order, or
+    descriptions that differ only in case and punctuation.
+    """
+    locations = (
+        tuple(sorted({loc.strip().lower() for loc in request.locations.split(',')}))
+        if request.locations else None
+    )
+    has_price = bool(request.price or request.price_range)
+    query = normalize_query(request.user_description)
+    return candidate_key(request) + (locations, has_price, request.seed, query, request.diversity or None)
+
+
+def candidate_rows(index: SuggestionIndex, request: SuggestionRequest) -> np.ndarray:
+    """Sorted row ids matching the category, platform, gender and age filters"""
+    category, platform, gender, ages = candidate_key(request)
+    if ages:
+        return index.lookup(category, platform, gender, *ages)
+    return index.lookup(category, platform, gender)
+
+
+def with_fallback(index: SuggestionIndex, request: SuggestionRequest, rows: np.ndarray) -> np.ndarray:
+    # If no matches found, use all data from same category
+    if len(rows) == 0:
+        rows = index.category_rows(request.category)
+
+    # If still no matches, use all data
+    if len(rows) == 0:
+        rows = index.all_rows
+
+    return rows
+
+
+def match_rows(snapshot: DatasetSnapshot, request: SuggestionRequest) -> np.ndarray:
+    """
+    Sorted row ids of the dataset rows matching a suggestion request.
+    Falls back to the whole category, then to all data, when nothing matches.
+    """
+    index = snapshot.index
+    rows = candidate_rows(index, request)
+
+    # If locations specified, keep rows where any location matches (model has comma-separated Locations)
+    if request.locations:
+        rows = index.filter_locations(rows, request.locations)
+
+    return with_fallback(index, request, rows)
+
+
+def ordered_matches(snapshot: DatasetSnapshot, request: SuggestionRequest) -> np.ndarray:
+    """
+    Matching rows in the order they are returned: dataset order, or a
+    reproducible shuffle when the request has a seed. With a user description
+    the rows most similar to it come first (the seed then only breaks ties).
+    Cached per request so paging doesn't filter again.
+    """
+    key = request_key(request)
+    rows = match_cache.lookup(key, snapshot.version, snapshot.generation)
+    if rows is None:
+        with snapshot.pinned():
+            rows = match_rows(snapshot, request)
+            if request.seed is not None:
+                rows = rows[np.random.default_rng(request.seed).permutation(len(rows))]
+            query = normalize_query(request.user_description)
+            if query:
+                rows = snapshot.vectors.rank(rows, query)
+        rows = rows.astype(np.int32 if snapshot.index.num_rows < 2**31 else np.int64)
+        match_cache.put(key, snapshot.version, rows, snapshot.generation)
+    return rows
+
+
+def encode_cursor(snapshot: DatasetSnapshot, request: SuggestionRequest, positions: Tuple[int, ...]) -> str:
+    return encode_cursor_state(snapshot.version, request, positions)
+
+
+def decode_cursor(snapshot: DatasetSnapshot, cursor: str) -> Tuple[SuggestionRequest, Tuple[int, ...]]:
+    """The original request and per-column row positions stored in a cursor"""
+    return decode_cursor_state(snapshot.version, cursor)
+
+
+def encode_cursor_state(
+    version: str, request: SuggestionRequest, positions: Tuple[int, ...], extra: Optional[Dict[str, Any]] = None
+) -> str:
+    state = {
+        "v": version,
+        "r": request.model_dump(exclude={"cursor"}, exclude_defaults=True),
+        "p": list(positions),
+    }
+    if extra:
+        state["x"] = extra
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor_state(current_version: str, cursor: str) -> Tuple[SuggestionRequest, Tuple[int, ...]]:
+    """Request and positions of a cursor issued for ``current_version`` of the data"""
+    request, positions, _ = decode_cursor_extra(current_version, cursor)
+    return request, positions
+
+
+def decode_cursor_extra(
+    current_version: str, cursor: str
+) -> Tuple[SuggestionRequest, Tuple[int, ...], Dict[str, Any]]:
+    """decode_cursor_state, plus the ``extra`` state given to encode_cursor_state"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        request = SuggestionRequest(**state["r"])
+        positions = tuple(int(p) for p in state["p"])
+        version = state["v"]
+        extra = dict(state.get("x") or {})
+    except (ValueError, KeyError, TypeError, ValidationError):
+        raise InvalidCursorError("Invalid cursor")
+
+    if version != current_version:
+        raise InvalidCursorError("Cursor has expired because the model data changed, start again without a cursor")
+    if len(positions) != len(SUGGESTION_COLUMNS) or min(positions) < 0:
+        raise InvalidCursorError("Invalid cursor")
+    return request, positions, extra
+
+
+def head_values(
+    table: ColumnTable, column: str, rows: np.ndarray, start: int = 0, limit: int = MAX_SUGGESTIONS
+) -> Tuple[List[str], int]:
+    """
+    First ``limit`` non-null values of a column over ``rows[start:]``, and the
+    position right after the last row used
+    """
+    values: List[str] = []
+    position = start
+    while len(values) < limit and position < len(rows):
+        # Only decode as many rows as needed instead of the whole match set
+        chunk = table.take(column, rows[position:position + limit])
+        for value in chunk:
+            position += 1
+            if value is not None:
+                values.append(value)
+                if len(values) == limit:
+                    break
+    return values, position
+
+
+def diverse_values(
+    table: ColumnTable, column: str, rows: np.ndarray, diversity: float, start: int = 0, limit: int = MAX_SUGGESTIONS
+) -> Tuple[List[str], int]:
+    """
+    Like ``head_values``, but each block of ``suggestion_diversity_pool`` rows
+    is ordered by maximal marginal relevance (relevance is the match order),
+    so near-identical templates don't fill the list. A position is the first
+    row of a block plus an offset into that order, so the next page goes on
+    with the values this one didn't pick and every value is still shown once.
+    """
+    pool = settings.suggestion_diversity_pool
+    values: List[str] = []
+    position = start
+    while len(values) < limit and position < len(rows):
+        block = position - position % pool
+        offset = position - block
+        candidates = [value for value in table.take(column, rows[block:block + pool]) if value is not None]
+        ordered = diverse_order(candidates, diversity, offset + limit - len(values))
+        taken = ordered[offset:offset + limit - len(values)]
+        values.extend(taken)
+        offset += len(taken)
+        position = block + offset if offset < len(candidates) else min(block + pool, len(rows))
+    return values, position
+
+
+def diverse_order(values: List[str], diversity: float, count: int) -> List[str]:
+    """
+    The first ``count`` values in MMR order, or all of them in match order
+    when there aren't more than ``MAX_SUGGESTIONS`` to choose from
+    """
+    if len(values) <= MAX_SUGGESTIONS:
+        return values
+    relevance = 1 - np.arange(len(values), dtype=np.float32) / len(values)
+    # Greedy, so the first picks are the same however many are asked for
+    picks = mmr_select(relevance, text_signatures(values), min(count, len(values)), diversity)
+    return [values[i] for i in picks]
+
+
+def column_page(
+    snapshot: DatasetSnapshot, request: SuggestionRequest, rows: np.ndarray, column: str, start: int = 0
+) -> Tuple[List[str], int]:
+    """One page of one suggestion list, and the position the next page starts at"""
+    with snapshot.pinned():
+        if request.diversity:
+            return diverse_values(snapshot.table, column, rows, request.diversity, start)
+        return head_values(snapshot.table, column, rows, start)
+
+
+def cta_for(request: SuggestionRequest) -> str:
+    # Determine CTA based on price
+    return "Shop Now" if request.price or request.price_range else "Learn More"
+
+
+def next_cursor_for(
+    snapshot: DatasetSnapshot, request: SuggestionRequest, rows: np.ndarray, positions: Tuple[int, ...]
+) -> Optional[str]:
+    """Cursor for the following page, or None when every list is exhausted"""
+    if min(positions) < len(rows):
+        return encode_cursor(snapshot, request, positions)
+    return None
+
+
+def build_response(
+    snapshot: DatasetSnapshot,
+    request: SuggestionRequest,
+    rows: np.ndarray,
+    positions: Optional[Tuple[int, ...]] = None,
+) -> SuggestionResponse:
+    # Don't use unique() since each product should have 10 distinct ads
+    positions = positions or (0,) * len(SUGGESTION_COLUMNS)
+    pages = [
+        column_page(snapshot, request, rows, column, start)
+        for column, start in zip(SUGGESTION_COLUMNS, positions)
+    ]
+    headlines, descriptions, keywords, image_prompts = (values for values, _ in pages)
+    next_positions = tuple(position for _, position in pages)
+
+    return SuggestionResponse(
+        headlines=headlines,
+        descriptions=descriptions,
+        keywords=keywords,
+        image_prompts=image_prompts,
+        cta=cta_for(request),
+        total_matches=len(rows),
+        next_cursor=next_cursor_for(snapshot, request, rows, next_positions)
+    )
+
+
+def compute_suggestions(
+    snapshot: DatasetSnapshot,
+    request: SuggestionRequest,
+    positions: Optional[Tuple[int, ...]] = None,
+) -> SuggestionResponse:
+    """Build one page of suggestions for a request from one dataset snapshot"""
+    with snapshot.pinned():
+        return build_response(snapshot, request, ordered_matches(snapshot, request), positions)
+
+
+def compute_suggestions_batch(
+    snapshot: DatasetSnapshot, requests: List[SuggestionRequest]
+) -> List[SuggestionResponse]:
+    """
+    Build the first page of suggestions for many requests at once, in request order.
+
+    Identical requests are computed once. Requests with the same index
+    filters share one candidate lookup, and their location filters are
+    evaluated together in a single pass over the candidate rows.
+    """
+    with snapshot.pinned():
+        return _compute_suggestions_batch(snapshot, requests)
+
+
+def _compute_suggestions_batch(
+    snapshot: DatasetSnapshot, requests: List[SuggestionRequest]
+) -> List[SuggestionResponse]:
+    index = snapshot.index
+
+    unique: Dict[Tuple, SuggestionRequest] = {}
+    for request in requests:
+        unique.setdefault(request_key(request), request)
+
+    responses: Dict[Tuple, SuggestionResponse] = {}
+    groups: Dict[Tuple, List[Tuple]] = {}
+    for key, request in unique.items():
+        if request.seed is not None or normalize_query(request.user_description):
+            # Shuffled and ranked match lists are built (and cached) one by one
+            responses[key] = compute_suggestions(snapshot, request)
+        else:
+            groups.setdefault(candidate_key(request), []).append(key)
+
+    for keys in groups.values():
+        rows = candidate_rows(index, unique[keys[0]])
+
+        located = [key for key in keys if unique[key].locations]
+        queries = [index.locations.query(unique[key].locations) for key in located]
+        matched = dict(zip(located, index.locations.matching_many(rows, queries)))
+
+        for key in keys:
+            request = unique[key]
+            request_rows = with_fallback(index, request, matched.get(key, rows))
+            responses[key] = build_response(snapshot, request, request_rows)
+
+    return [responses[request_key(request)] for request in requests]
@@ -0,0 +1,35 @@
+import os
+
+# Settings require these; the tests never connect to MongoDB
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+
+from app.commands.generate_dataset import generate
+from app.database.mongodb import db
+from app.dataset.store import DatasetStore
+from tests.fake_mongo import FakeDatabase
+
+
+@pytest.fixture(scope="session")
+def dataset_csv(tmp_path_factory) -> str:
+    path = str(tmp_path_factory.mktemp("dataset") / "ads.csv")
+    generate(path, rows=2000, seed=1, ads_per_user=20)
+    return path
+
+
+@pytest.fixture
+def dataset_store(dataset_csv, tmp_path) -> DatasetStore:
+    """Store parsing the test CSV (no columnar build)"""
+    store = DatasetStore(dataset_csv, columns_path=str(tmp_path / "columns"), vectors_path=str(tmp_path / "vectors"))
+    store.refresh()
+    return store
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeDatabase:
+    """In-memory collections behind ``db.get_collection``"""
+    database = FakeDatabase()
+    monkeypatch.setattr(db, "get_collection", database.get_collection)
+    return database
@@ -0,0 +1,226 @@
+"""
+In-memory stand-ins for the few Motor collection methods the services use,
+enough to exercise their write logic without a MongoDB server.
+"""
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+def _get(document: Dict[str, Any], path: str) -> Any:
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _set(document: Dict[str, Any], path: str, value: Any):
+    *parents, last = path.split(".")
+    for part in parents:
+        document = document.setdefault(part, {})
+    document[last] = value
+
+
+def matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        value = _get(document, field)
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            for op, operand in condition.items():
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$gt" and not (value is not None and value > operand):
+                    return False
+                if op == "$lte" and not (value is not None and value <= operand):
+                    return False
+                if op == "$gte" and not (value is not None and value >= operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def apply_update(document: Dict[str, Any], update: Any, inserting: bool = False):
+    if isinstance(update, list):
+        # Aggregation pipelines aren't evaluated, only recorded
+        document.setdefault("_pipelines", []).append(update)
+        return
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                _set(document, path, copy.deepcopy(value))
+            elif op == "$inc":
+                _set(document, path, (_get(document, path) or 0) + value)
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[Dict[str, Any]] = []
+        self.indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)]}}
+        self.fail_writes: Optional[Exception] = None  # Raised by the next write, then cleared
+
+    def _check_failure(self):
+        error, self.fail_writes = self.fail_writes, None
+        if error is not None:
+            raise error
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection=None) -> "FakeCursor":
+        return FakeCursor([copy.deepcopy(document) for document in self.documents if matches(document, query or {})])
+
+    async def count_documents(self, query: Dict[str, Any]) -> int:
+        return sum(matches(document, query) for document in self.documents)
+
+    async def estimated_document_count(self) -> int:
+        return len(self.documents)
+
+    async def find_one(self, query: Dict[str, Any], projection=None) -> Optional[Dict[str, Any]]:
+        for document in self.documents:
+            if matches(document, query):
+                return copy.deepcopy(document)
+        return None
+
+    async def insert_one(self, document: Dict[str, Any]):
+        self._check_failure()
+        document.setdefault("_id", ObjectId())
+        if any(existing["_id"] == document["_id"] for existing in self.documents):
+            raise DuplicateKeyError("duplicate _id")
+        self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True):
+        self._check_failure()
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+            self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_ids=[document["_id"] for document in documents])
+
+    def _update(self, query, update, upsert: bool) -> Dict[str, Any]:
+        for document in self.documents:
+            if matches(document, query):
+                apply_update(document, update)
+                return {"matched": 1, "document": document}
+        if upsert:
+            document = {field: value for field, value in query.items() if not isinstance(value, dict)}
+            apply_update(document, update, inserting=True)
+            self.documents.append(document)
+            return {"matched": 0, "document": document, "upserted": True}
+        return {"matched": 0, "document": None}
+
+    async def update_one(self, query: Dict[str, Any], update: Any, upsert: bool = False):
+        self._check_failure()
+        result = self._update(query, update, upsert)
+        return SimpleNamespace(matched_count=result["matched"], modified_count=result["matched"])
+
+    async def replace_one(self, query: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False):
+        self._check_failure()
+        for i, document in enumerate(self.documents):
+            if matches(document, query):
+                self.documents[i] = {"_id": document["_id"], **copy.deepcopy(replacement)}
+                return SimpleNamespace(matched_count=1, modified_count=1)
+        if upsert:
+            self.documents.append({**{k: v for k, v in query.items() if not isinstance(v, dict)}, **replacement})
+        return SimpleNamespace(matched_count=0, modified_count=0)
+
+    async def find_one_and_update(
+        self, query, update, projection=None, upsert: bool = False, return_document=ReturnDocument.BEFORE
+    ):
+        self._check_failure()
+        before = await self.find_one(query)
+        result = self._update(query, update, upsert)
+        if return_document == ReturnDocument.AFTER:
+            return copy.deepcopy(result["document"]) if result["document"] is not None else None
+        return before
+
+    async def bulk_write(self, operations: List[Any], ordered: bool = True):
+        self._check_failure()
+        matched = 0
+        for operation in operations:
+            doc = operation._doc
+            result = self._update(operation._filter, doc, operation._upsert or False)
+            matched += result["matched"]
+        return SimpleNamespace(matched_count=matched, modified_count=matched)
+
+    async def index_information(self) -> Dict[str, Dict[str, Any]]:
+        return copy.deepcopy(self.indexes)
+
+    async def drop_index(self, name: str):
+        del self.indexes[name]
+
+    async def create_index(self, keys, name: str, unique: bool = False):
+        self._check_failure()
+        for existing_name, info in self.indexes.items():
+            if list(info["key"]) == list(keys) and existing_name != name:
+                raise DuplicateKeyError(f"Index with the same keys already exists: {existing_name}")
+        if unique:
+            seen = set()
+            for document in self.documents:
+                key = tuple(_get(document, field) for field, _ in keys)
+                if key in seen:
+                    raise DuplicateKeyError(f"E11000 duplicate key error: {key}")
+                seen.add(key)
+        self.indexes[name] = {"key": list(keys), "unique": unique} if unique else {"key": list(keys)}
+
+    def aggregate(self, pipeline: List[Dict[str, Any]]):
+        return FakeCursor(self._aggregate(pipeline))
+
+    def _aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        documents = [copy.deepcopy(document) for document in self.documents]
+        for stage in pipeline:
+            if "$match" in stage:
+                documents = [document for document in documents if matches(document, stage["$match"])]
+            elif "$group" in stage:
+                keys = [field.lstrip("$") for field in stage["$group"]["_id"].values()]
+                groups: Dict[tuple, int] = {}
+                for document in documents:
+                    key = tuple(_get(document, field) for field in keys)
+                    groups[key] = groups.get(key, 0) + 1
+                documents = [
+                    {"_id": dict(zip(stage["$group"]["_id"], key)), "count": count} for key, count in groups.items()
+                ]
+            elif "$limit" in stage:
+                documents = documents[:stage["$limit"]]
+        return documents
+
+
+class FakeCursor:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.documents = documents
+
+    def sort(self, field: str, direction: int = 1) -> "FakeCursor":
+        self.documents.sort(key=lambda document: _get(document, field), reverse=direction < 0)
+        return self
+
+    def limit(self, count: int) -> "FakeCursor":
+        self.documents = self.documents[:count]
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.documents if length is None else self.documents[:length]
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections: Dict[str, FakeCollection] = {}
+
+    def get_collection(self, name: str) -> FakeCollection:
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(name)
+        return self.collections[name]
+
+    __getitem__ = get_collection
+
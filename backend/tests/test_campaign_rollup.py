@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.services import campaign_rollup
+from app.services.campaign_rollup import (
+    ROLLUP_COLLECTION,
+    apply_delta,
+    apply_deltas,
+    campaign_delta,
+    get_rollup,
+    rebuild_rollup,
+)
+
+USER = "user@example.com"
+
+
+def campaign(status: str = "draft", spend: float = 0.0) -> dict:
+    return {"user_id": USER, "status": status, "metrics": {"spend": spend, "impressions": 0, "clicks": 0}}
+
+
+@pytest.fixture
+def campaigns(fake_db, monkeypatch):
+    """Campaign documents, summed by a stand-in for the $group aggregation"""
+    documents = []
+
+    async def aggregate_totals(user_id):
+        return {
+            "total_campaigns": len(documents),
+            "active_campaigns": sum(document["status"] == "active" for document in documents),
+            "total_spend": sum(document["metrics"]["spend"] for document in documents),
+            "total_impressions": 0,
+            "total_clicks": 0,
+        }
+
+    monkeypatch.setattr(campaign_rollup, "aggregate_totals", aggregate_totals)
+    return documents
+
+
+async def create(documents, document):
+    """A campaign write followed by its delta, like the create route"""
+    documents.append(document)
+    await apply_delta(USER, campaign_delta(document))
+
+
+@pytest.mark.asyncio
+async def test_deltas_update_a_built_rollup(campaigns):
+    await create(campaigns, campaign("active", 10.0))
+    assert (await get_rollup(USER))["total_campaigns"] == 1
+
+    await create(campaigns, campaign("draft", 5.0))
+    totals = await get_rollup(USER)
+
+    assert totals["total_campaigns"] == 2
+    assert totals["active_campaigns"] == 1
+    assert totals["total_spend"] == 15.0
+
+
+@pytest.mark.asyncio
+async def test_delta_before_the_first_read_is_not_counted_twice(campaigns):
+    await create(campaigns, campaign("active", 10.0))
+
+    totals = await get_rollup(USER)
+
+    assert totals["total_campaigns"] == 1
+    assert totals["total_spend"] == 10.0
+
+
+@pytest.mark.asyncio
+async def test_delta_during_a_first_read_rebuild_is_not_lost(campaigns, monkeypatch):
+    aggregate = campaign_rollup.aggregate_totals
+    interleaved = False
+
+    async def aggregate_then_write(user_id):
+        nonlocal interleaved
+        totals = await aggregate(user_id)
+        if not interleaved:
+            # A campaign is created after the aggregation read, before the rollup is stored
+            interleaved = True
+            await create(campaigns, campaign("active", 7.0))
+        return totals
+
+    monkeypatch.setattr(campaign_rollup, "aggregate_totals", aggregate_then_write)
+    await get_rollup(USER)
+    monkeypatch.setattr(campaign_rollup, "aggregate_totals", aggregate)
+
+    totals = await get_rollup(USER)
+    assert totals["total_campaigns"] == 1
+    assert totals["active_campaigns"] == 1
+    assert totals["total_spend"] == 7.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_reads_keep_later_deltas(campaigns):
+    await create(campaigns, campaign("draft", 1.0))
+
+    await asyncio.gather(get_rollup(USER), get_rollup(USER))
+    await create(campaigns, campaign("active", 2.0))
+
+    totals = await get_rollup(USER)
+    assert totals["total_campaigns"] == 2
+    assert totals["total_spend"] == 3.0
+
+
+@pytest.mark.asyncio
+async def test_batched_deltas(campaigns, fake_db):
+    await rebuild_rollup(USER)
+    await apply_deltas({USER: {"total_spend": 4.0, "total_clicks": 2}, "other@example.com": {"total_clicks": 1}})
+
+    assert (await get_rollup(USER))["total_spend"] == 4.0
+    other = await fake_db[ROLLUP_COLLECTION].find_one({"_id": "other@example.com"})
+    assert other["total_clicks"] == 1 and not other.get("built")
@@ -0,0 +1,83 @@
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.database.indexes import INDEXES, ensure_indexes
+from tests.fake_mongo import FakeDatabase
+
+
+def spec_named(name: str):
+    return next(spec for spec in INDEXES if spec.name == name)
+
+
+@pytest.mark.asyncio
+async def test_creates_every_index():
+    database = FakeDatabase()
+
+    assert await ensure_indexes(database) == []
+    for spec in INDEXES:
+        assert spec.name in database[spec.collection].indexes
+
+
+@pytest.mark.asyncio
+async def test_failed_plain_index_is_reported():
+    database = FakeDatabase()
+    plain = next(spec for spec in INDEXES if not spec.unique)
+    database[plain.collection].fail_writes = OperationFailure("no space")
+
+    assert await ensure_indexes(database) == [plain.name]
+
+
+@pytest.mark.asyncio
+async def test_failed_unique_index_stops_startup():
+    database = FakeDatabase()
+    users = database["users"]
+    users.documents = [{"_id": 1, "email": "a@example.com"}, {"_id": 2, "email": "a@example.com"}]
+
+    with pytest.raises(RuntimeError, match="users.email_unique"):
+        await ensure_indexes(database)
+
+
+def with_legacy_ad_account_index(database: FakeDatabase):
+    spec = spec_named("user_platform_account_unique")
+    database["ad_accounts"].indexes["user_platform_account"] = {"key": list(spec.keys)}
+    return database["ad_accounts"]
+
+
+@pytest.mark.asyncio
+async def test_legacy_index_is_replaced():
+    database = FakeDatabase()
+    ad_accounts = with_legacy_ad_account_index(database)
+    ad_accounts.documents = [
+        {"_id": 1, "user_id": "a", "platform": "meta", "account_id": "1"},
+        {"_id": 2, "user_id": "a", "platform": "meta", "account_id": "2"},
+    ]
+
+    assert await ensure_indexes(database) == []
+    assert "user_platform_account" not in ad_accounts.indexes
+    assert ad_accounts.indexes["user_platform_account_unique"]["unique"]
+
+
+@pytest.mark.asyncio
+async def test_legacy_index_is_kept_when_duplicates_exist():
+    database = FakeDatabase()
+    ad_accounts = with_legacy_ad_account_index(database)
+    ad_accounts.documents = [
+        {"_id": 1, "user_id": "a", "platform": "meta", "account_id": "1"},
+        {"_id": 2, "user_id": "a", "platform": "meta", "account_id": "1"},
+    ]
+
+    with pytest.raises(RuntimeError, match="ad_accounts.user_platform_account_unique"):
+        await ensure_indexes(database)
+    assert "user_platform_account" in ad_accounts.indexes
+
+
+@pytest.mark.asyncio
+async def test_operator_indexes_are_left_alone():
+    database = FakeDatabase()
+    spec = spec_named("user_status_platform_updated_id")
+    campaigns = database["campaigns"]
+    # Same keys as a registered index, but created by hand under another name
+    campaigns.indexes["ops_user_status_platform"] = {"key": list(spec.keys)}
+
+    assert await ensure_indexes(database) == [spec.name]
+    assert "ops_user_status_platform" in campaigns.indexes
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+from app.config.settings import settings
+from app.routes.metrics import body_lines
+from app.services.campaign_rollup import ROLLUP_COLLECTION
+from app.services.metrics_ingest import MetricsBuffer
+
+USER = "user@example.com"
+
+
+def events(campaign_id, count: int) -> list:
+    return [
+        {
+            "campaign": {"campaign_id": campaign_id, "user_id": USER},
+            "impressions": 10, "clicks": 1, "conversions": 0, "spend": 2.0,
+        }
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def buffer(fake_db) -> MetricsBuffer:
+    return MetricsBuffer(flush_size=1000, flush_interval=60, max_pending=1000)
+
+
+@pytest.mark.asyncio
+async def test_flush_counts_written_events(fake_db, buffer):
+    campaign_id = ObjectId()
+    buffer.add(events(campaign_id, 3))
+    await buffer.flush()
+
+    assert (buffer.written, buffer.dropped, buffer.unapplied, buffer.failed_flushes) == (3, 0, 0, 0)
+    assert len(fake_db[settings.metrics_collection].documents) == 3
+    assert fake_db[ROLLUP_COLLECTION].documents[0]["total_impressions"] == 30
+
+
+@pytest.mark.asyncio
+async def test_stored_events_are_not_dropped_when_campaign_update_fails(fake_db, buffer):
+    fake_db["campaigns"].fail_writes = ServerSelectionTimeoutError("no primary")
+    buffer.add(events(ObjectId(), 3))
+    await buffer.flush()
+
+    assert len(fake_db[settings.metrics_collection].documents) == 3
+    assert (buffer.written, buffer.dropped, buffer.unapplied, buffer.failed_flushes) == (3, 0, 3, 1)
+    assert buffer.stats()["unapplied"] == 3
+
+
+@pytest.mark.asyncio
+async def test_stored_events_are_not_dropped_when_rollup_update_fails(fake_db, buffer):
+    fake_db[ROLLUP_COLLECTION].fail_writes = ServerSelectionTimeoutError("no primary")
+    buffer.add(events(ObjectId(), 2))
+    await buffer.flush()
+
+    assert (buffer.written, buffer.dropped, buffer.unapplied) == (2, 0, 2)
+
+
+@pytest.mark.asyncio
+async def test_partial_insert_drops_only_failed_events(fake_db, buffer):
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate"}]})
+    fake_db[settings.metrics_collection].fail_writes = error
+    buffer.add(events(ObjectId(), 3))
+    await buffer.flush()
+
+    # The fake raises before storing anything; the count comes from the reported write errors
+    assert (buffer.written, buffer.dropped, buffer.unapplied, buffer.failed_flushes) == (2, 1, 0, 1)
+    assert fake_db[ROLLUP_COLLECTION].documents[0]["total_impressions"] == 20
+
+
+@pytest.mark.asyncio
+async def test_failed_insert_drops_every_event(fake_db, buffer):
+    fake_db[settings.metrics_collection].fail_writes = ServerSelectionTimeoutError("no primary")
+    buffer.add(events(ObjectId(), 3))
+    await buffer.flush()
+
+    assert (buffer.written, buffer.dropped, buffer.unapplied) == (0, 3, 0)
+    assert fake_db["campaigns"].documents == []
+
+
+def request(chunks, headers=None):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return SimpleNamespace(headers=headers or {}, stream=stream)
+
+
+async def read_lines(request, max_bytes):
+    return [line async for line in body_lines(request, max_bytes)]
+
+
+@pytest.mark.asyncio
+async def test_body_lines_split_across_chunks():
+    lines = await read_lines(request([b'{"a": 1}\n{"b"', b': 2}\n\n{"c": 3}']), max_bytes=100)
+
+    assert lines == [b'{"a": 1}', b'{"b": 2}', b"", b'{"c": 3}']
+
+
+@pytest.mark.asyncio
+async def test_body_over_limit_is_rejected_while_streaming():
+    with pytest.raises(HTTPException) as e:
+        await read_lines(request([b"x" * 60, b"x" * 60]), max_bytes=100)
+
+    assert e.value.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_body_over_limit_is_rejected_by_content_length():
+    chunks = [b"never read"]
+    with pytest.raises(HTTPException) as e:
+        await read_lines(request(chunks, {"content-length": "101"}), max_bytes=100)
+
+    assert e.value.status_code == 413
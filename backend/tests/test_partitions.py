@@ -0,0 +1,63 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from app.commands.build_dataset import build
+from app.dataset.store import DatasetStore
+
+
+@pytest.fixture
+def built_store(dataset_csv, tmp_path) -> DatasetStore:
+    """Store memory-mapping a partitioned build of the test CSV"""
+    csv_path = str(tmp_path / "ads.csv")
+    shutil.copy(dataset_csv, csv_path)
+    build(csv_path, str(tmp_path / "ads.columns"))
+    store = DatasetStore(csv_path)
+    store.refresh()
+    return store
+
+
+def test_build_is_partitioned(built_store):
+    snapshot = built_store.get()
+    assert snapshot.path.endswith("manifest.json")
+    assert len(snapshot.table.partitions) > 1
+
+
+def test_rankings_match_the_unpartitioned_dataset(built_store, dataset_store):
+    built, parsed = built_store.get(), dataset_store.get()
+    for text in ("comfortable stylish apparel", "premium feel explore now", "shop today"):
+        rows = parsed.index.lookup("Clothing")
+        assert np.array_equal(built.index.lookup("Clothing"), rows)
+        assert np.array_equal(built.vectors.rank(rows, text), parsed.vectors.rank(rows, text))
+
+
+def test_unknown_locations_load_no_partition(built_store):
+    snapshot = built_store.get()
+    rows = snapshot.index.all_rows
+
+    assert snapshot.index.locations.query("Atlantis, Nowhere") is None
+    assert len(snapshot.index.filter_locations(rows, "Atlantis")) == 0
+    assert built_store.partition_cache.loads == 0
+
+
+def test_norms_count_towards_the_budget(built_store):
+    snapshot = built_store.get()
+    cache = built_store.partition_cache
+    snapshot.vectors.rank(snapshot.index.all_rows, "premium feel explore now")
+
+    segments = [entry[0] for entry in cache._segments.values()]
+    assert segments
+    assert cache.bytes == sum(segment.nbytes for segment in segments)
+    assert all(segment.vectors._norms is not None for segment in segments)
+
+
+def test_budget_evicts_least_recently_used(built_store):
+    snapshot = built_store.get()
+    cache = built_store.partition_cache
+    cache.budget = 1  # Keeps only the partition loaded last
+
+    with snapshot.pinned():
+        snapshot.vectors.rank(snapshot.index.all_rows, "premium feel explore now")
+    assert len(cache) == 1
+    assert cache.evictions == len(snapshot.table.partitions) - 1
@@ -0,0 +1,78 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.schemas.user import CurrentUser
+from app.services import auth
+from app.services.auth import create_access_token, get_current_user
+from app.services.principal_cache import PrincipalCache
+
+EMAIL = "user@example.com"
+
+
+def user(email: str = EMAIL) -> CurrentUser:
+    return CurrentUser(_id="0" * 24, email=email, full_name="Test User")
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache = PrincipalCache(max_entries=10, ttl=60)
+    cache.put("token", user(), token_expires=None)
+    now = time.monotonic()
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 59)
+    assert cache.get("token") is not None
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get("token") is None
+    assert cache.expirations == 1
+
+
+def test_entries_never_outlive_their_token():
+    cache = PrincipalCache(max_entries=10, ttl=60)
+    cache.put("expired", user(), token_expires=time.time() - 1)
+    cache.put("soon", user(), token_expires=time.time() + 5)
+
+    assert cache.get("expired") is None
+    assert cache._entries["soon"][0] <= time.monotonic() + 5
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PrincipalCache(max_entries=2, ttl=60)
+    cache.put("a", user("a@example.com"), token_expires=None)
+    cache.put("b", user("b@example.com"), token_expires=None)
+    cache.get("a")
+    cache.put("c", user("c@example.com"), token_expires=None)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["users"] == 2
+
+
+def test_invalidate_user_drops_all_their_tokens():
+    cache = PrincipalCache(max_entries=10, ttl=60)
+    cache.put("first", user(), token_expires=None)
+    cache.put("second", user(), token_expires=None)
+    cache.put("other", user("other@example.com"), token_expires=None)
+    cache.invalidate_user(EMAIL)
+
+    assert cache.get("first") is None and cache.get("second") is None
+    assert cache.get("other") is not None
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_user_skips_the_database(fake_db, monkeypatch):
+    monkeypatch.setattr(auth, "principal_cache", PrincipalCache(max_entries=10, ttl=60))
+    users = fake_db["users"]
+    await users.insert_one({
+        "email": EMAIL, "full_name": "Test User", "is_active": True,
+        "created_at": datetime.now(timezone.utc), "updated_at": datetime.now(timezone.utc),
+    })
+    token = create_access_token({"sub": EMAIL}, expires_delta=timedelta(minutes=5))
+
+    first = await get_current_user(token)
+    users.documents.clear()  # A second database lookup would now fail
+    second = await get_current_user(token)
+
+    assert first.email == second.email == EMAIL
+    assert auth.principal_cache.stats()["hits"] == 1
@@ -0,0 +1,84 @@
+import asyncio
+import dataclasses
+
+import pytest
+
+from app.schemas.suggestion import SuggestionRequest
+from app.services.suggestion_cache import SuggestionCache
+from app.services.suggestions import match_cache, ordered_matches
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once():
+    cache = SuggestionCache(max_entries=10, ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(cache.get_or_compute("key", "v1", compute, 1) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.get("key", "v1", 1) == "value"
+
+
+def test_newer_generation_replaces_entries():
+    cache = SuggestionCache(max_entries=10, ttl=60)
+    cache.put("key", "v1", "old", generation=1)
+    cache.put("key", "v2", "new", generation=2)
+
+    assert cache.get("key", "v2", 2) == "new"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_older_generation_is_ignored():
+    cache = SuggestionCache(max_entries=10, ttl=60)
+    cache.put("key", "v2", "new", generation=2)
+
+    # A request still running on the previous snapshot
+    cache.put("key", "v1", "old", generation=1)
+    assert cache.get("key", "v1", 1) is None
+
+    assert cache.version == "v2"
+    assert cache.get("key", "v2", 2) == "new"
+    assert cache.stats()["stale"] == 2
+
+
+def test_earlier_content_in_a_new_generation_is_cached():
+    cache = SuggestionCache(max_entries=10, ttl=60)
+    cache.put("key", "v1", "first", generation=1)
+    cache.put("key", "v2", "second", generation=2)
+    cache.put("key", "v1", "rolled back", generation=3)
+
+    assert cache.get("key", "v1", 3) == "rolled back"
+
+
+def test_lru_and_ttl():
+    cache = SuggestionCache(max_entries=2, ttl=60)
+    for key in ("a", "b", "c"):
+        cache.put(key, "v1", key, generation=1)
+    assert cache.get("a", "v1", 1) is None
+    assert cache.stats()["evictions"] == 1
+
+    expired = SuggestionCache(max_entries=2, ttl=0)
+    expired.put("a", "v1", "a", generation=1)
+    assert expired.get("a", "v1", 1) is None
+
+
+def test_match_lists_of_an_older_snapshot_are_not_cached(dataset_store):
+    match_cache.clear()
+    current = dataset_store.get()
+    ordered_matches(current, SuggestionRequest(category="Clothing", gender="Female"))
+
+    # A request that started before the reload finishes after it
+    older = dataclasses.replace(current, version="previous", generation=current.generation - 1)
+    ordered_matches(older, SuggestionRequest(category="Clothing", gender="Male"))
+
+    stats = match_cache.stats()
+    assert stats["dataset_version"] == current.version
+    assert stats["entries"] == 1
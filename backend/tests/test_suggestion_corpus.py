@@ -0,0 +1,71 @@
+import pytest
+
+from app.config.settings import settings
+from app.schemas.suggestion import SuggestionRequest
+from app.services.suggestion_corpus import (
+    CORPUS_META_ID,
+    CORPUS_VERSION,
+    corpus_document,
+    corpus_meta_name,
+    corpus_version,
+    generate_corpus_suggestions,
+)
+
+
+@pytest.mark.asyncio
+async def test_corpus_version_follows_the_latest_import(fake_db):
+    assert await corpus_version() == CORPUS_VERSION
+
+    meta = fake_db[corpus_meta_name(settings.suggestion_corpus_collection)]
+    await meta.replace_one({"_id": CORPUS_META_ID}, {"import_id": "first"}, upsert=True)
+    first = await corpus_version()
+    await meta.replace_one({"_id": CORPUS_META_ID}, {"import_id": "second"}, upsert=True)
+
+    assert first != CORPUS_VERSION
+    assert await corpus_version() not in (first, CORPUS_VERSION)
+
+
+@pytest.fixture
+def corpus(fake_db):
+    collection = fake_db[settings.suggestion_corpus_collection]
+    for row in range(95):
+        collection.documents.append(corpus_document(row, {
+            "Category": "Clothing" if row % 3 else "Shoes",
+            "Platform": "Meta", "Gender": "Male", "Age_Min": 18, "Age_Max": 65, "Locations": "Paris",
+            "Headline": f"headline {row}", "Ad_Description": f"description {row}",
+            "Keyword": f"keyword {row}", "Image_Prompt": f"prompt {row}",
+        }))
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_carry_the_match_count(corpus, monkeypatch):
+    counts = []
+    count_documents = corpus.count_documents
+
+    async def counting(query):
+        counts.append(query)
+        return await count_documents(query)
+
+    monkeypatch.setattr(corpus, "count_documents", counting)
+    request = SuggestionRequest(category="Clothing", age_min=20, age_max=30)
+    headlines = []
+    page = await generate_corpus_suggestions(request)
+    while True:
+        assert page.total_matches == 63
+        headlines += page.headlines
+        if page.next_cursor is None:
+            break
+        page = await generate_corpus_suggestions(SuggestionRequest(cursor=page.next_cursor))
+
+    assert len(counts) == 1
+    assert headlines == [f"headline {row}" for row in range(95) if row % 3]
+
+
+@pytest.mark.asyncio
+async def test_cursor_keeps_the_fallback_query(corpus):
+    page = await generate_corpus_suggestions(SuggestionRequest(category="Clothing", platform="Google"))
+    second = await generate_corpus_suggestions(SuggestionRequest(cursor=page.next_cursor))
+
+    assert page.total_matches == second.total_matches == 63
+    assert second.headlines[0] == "headline 16"
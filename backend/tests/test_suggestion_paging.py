@@ -0,0 +1,83 @@
+import dataclasses
+from typing import Dict, List
+
+import pytest
+
+from app.schemas.suggestion import SuggestionRequest
+from app.services.suggestions import (
+    RESPONSE_FIELDS,
+    SUGGESTION_COLUMNS,
+    InvalidCursorError,
+    compute_suggestions,
+    decode_cursor,
+    match_cache,
+    ordered_matches,
+)
+
+
+def all_pages(snapshot, request: SuggestionRequest) -> Dict[str, List[str]]:
+    """Every value of every list, following next_cursor to the end"""
+    lists: Dict[str, List[str]] = {field: [] for field in RESPONSE_FIELDS}
+    response = compute_suggestions(snapshot, request)
+    while True:
+        for field in RESPONSE_FIELDS:
+            lists[field].extend(getattr(response, field))
+        if response.next_cursor is None:
+            return lists
+        page_request, positions = decode_cursor(snapshot, response.next_cursor)
+        response = compute_suggestions(snapshot, page_request, positions)
+
+
+@pytest.fixture(autouse=True)
+def empty_match_cache():
+    match_cache.clear()
+
+
+def test_pages_cover_every_match_once(dataset_store):
+    snapshot = dataset_store.get()
+    request = SuggestionRequest(category="Clothing", gender="Female", platform="Meta")
+    rows = ordered_matches(snapshot, request)
+
+    lists = all_pages(snapshot, request)
+
+    for field, column in zip(RESPONSE_FIELDS, SUGGESTION_COLUMNS):
+        expected = [value for value in snapshot.table.take(column, rows) if value is not None]
+        assert lists[field] == expected
+
+
+def test_seed_shuffles_reproducibly(dataset_store):
+    snapshot = dataset_store.get()
+    plain = compute_suggestions(snapshot, SuggestionRequest(category="Clothing", gender="Female"))
+    seeded = compute_suggestions(snapshot, SuggestionRequest(category="Clothing", gender="Female", seed=7))
+    match_cache.clear()
+    again = compute_suggestions(snapshot, SuggestionRequest(category="Clothing", gender="Female", seed=7))
+
+    assert seeded.headlines == again.headlines
+    assert seeded.headlines != plain.headlines
+    assert seeded.total_matches == plain.total_matches
+
+
+def test_cursor_of_another_version_is_rejected(dataset_store):
+    snapshot = dataset_store.get()
+    response = compute_suggestions(snapshot, SuggestionRequest(category="Clothing", gender="Female"))
+
+    reloaded = dataclasses.replace(snapshot, version="other", generation=snapshot.generation + 1)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(reloaded, response.next_cursor)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(snapshot, "not-a-cursor")
+
+
+def test_diversified_pages_cover_every_match_once(dataset_store):
+    snapshot = dataset_store.get()
+    request = SuggestionRequest(category="Clothing", gender="Female", platform="Meta", diversity=0.7)
+    rows = ordered_matches(snapshot, request)
+
+    first = compute_suggestions(snapshot, request)
+    lists = all_pages(snapshot, request)
+
+    for field, column in zip(RESPONSE_FIELDS, SUGGESTION_COLUMNS):
+        expected = [value for value in snapshot.table.take(column, rows) if value is not None]
+        assert sorted(lists[field]) == sorted(expected)
+        assert lists[field] != expected  # Actually re-ranked
+    assert lists["headlines"][:len(first.headlines)] == first.headlines
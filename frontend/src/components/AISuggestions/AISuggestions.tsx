@@ -132,10 +132,10 @@ export default function AISuggestions(_: Props) {
         selectedPlatform = localStorage.getItem('adpatterns_selected_platform') || 'Meta';
       } catch (e) {}
 
-      // Call backend API endpoint to get model data
-      const response = await fetch(API_ENDPOINTS.generateSuggestions, {
+      // Call backend streaming endpoint so the first lists render while the rest are ranked
+      const response = await fetch(API_ENDPOINTS.generateSuggestionsStream, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'Accept': 'application/x-ndjson' },
         body: JSON.stringify({
           category: payload?.category || 'Clothing',
           user_description: payload?.description,
@@ -152,15 +152,36 @@ export default function AISuggestions(_: Props) {
         })
       });
       
-      if (response.ok) {
-        const data = await response.json();
-        setModelData({
-          headlines: data.headlines || [],
-          descriptions: data.descriptions || [],
-          keywords: data.keywords || [],
-          cta: data.cta || 'Shop Now',
-          total_matches: data.total_matches || 0
-        });
+      if (response.ok && response.body) {
+        // One JSON event per line: summary, then one per list, then done
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        const handleEvent = (event: any) => {
+          if (event.event === 'summary') {
+            setModelData({
+              headlines: [],
+              descriptions: [],
+              keywords: [],
+              cta: event.cta || 'Shop Now',
+              total_matches: event.total_matches || 0
+            });
+          } else if (event.event === 'list' && event.field !== 'image_prompts') {
+            setModelData((prev: any) => ({ ...prev, [event.field]: event.values || [] }));
+            if (event.field === 'headlines') setLoading(false);
+          } else if (event.event === 'error') {
+            console.error('Suggestion stream failed:', event.detail);
+          }
+        };
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffered += decoder.decode(value, { stream: true });
+          const lines = buffered.split('\n');
+          buffered = lines.pop() || '';
+          lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+        }
+        if (buffered.trim()) handleEvent(JSON.parse(buffered));
       } else {
         console.error('Failed to fetch suggestions:', response.statusText);
         // Fallback to default message
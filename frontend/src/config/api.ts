@@ -11,6 +11,7 @@ export const API_ENDPOINTS = {
   // Campaigns
   campaigns: `${API_URL}/api/campaigns`,
   generateSuggestions: `${API_URL}/api/generate-suggestions`,
+  generateSuggestionsStream: `${API_URL}/api/generate-suggestions/stream`,
   
   // Health Check
   health: `${API_URL}/health`,